@@ -0,0 +1,80 @@
+"""Time the JSON API's batch calls against the same work done one form POST at a time.
+
+    python bench/bench_api.py --shifts 100 --repeat 20
+
+Signs a volunteer up for --shifts shifts and cancels them again, both through
+the form routes (one request each, answered with a redirect) and through one
+batch API call each; also reports per-call latency of the read endpoints.
+"""
+import argparse, os, pathlib, statistics, sys, tempfile, time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--shifts", type=int, default=100)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = appmod.create_app(dict(
+            TESTING=True, WTF_CSRF_ENABLED=False, SIGNUP_CONFLICTS="allow", API_BATCH_MAX=max(args.shifts, 100),
+            DB_PATH=os.path.join(tmp, "bench.db"), DATABASE_URL=None, OUTBOX_FILE=os.path.join(tmp, "outbox.jsonl"),
+        ), init=True)
+        with app.app_context():
+            db = appmod.get_db()
+            uid = db.execute("INSERT INTO app_user(email,password_hash,role) VALUES ('b@test','x','VOLUNTEER')").lastrowid
+            sids = [db.execute(
+                "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+                (f"Shift {i}", "Hall", f"2031-01-01T{i % 24:02d}:00", f"2031-01-01T{i % 24:02d}:30", 1_000_000),
+            ).lastrowid for i in range(args.shifts)]
+            db.commit()
+            headers = {"Authorization": "Bearer " + appmod.issue_api_token(db, uid)}
+
+        form = app.test_client()
+        with form.session_transaction() as s:
+            s["uid"], s["role"] = uid, "VOLUNTEER"
+        api = app.test_client()
+
+        def signup_ids():
+            with app.app_context():
+                return [r[0] for r in appmod.get_db().execute("SELECT id FROM signup WHERE user_id=?", (uid,))]
+
+        def form_round():
+            for sid in sids:
+                form.post(f"/shifts/{sid}/signups")
+            for su in signup_ids():
+                form.post(f"/signups/{su}/cancel")
+
+        def api_round():
+            api.post("/api/v1/signups", json={"shift_ids": sids}, headers=headers)
+            api.post("/api/v1/signups/cancel", json={"signup_ids": signup_ids()}, headers=headers)
+
+        ids = ",".join(map(str, sids))
+        reads = {
+            "GET /api/v1/shifts": lambda: api.get("/api/v1/shifts?limit=50", headers=headers),
+            "GET /api/v1/shifts?fields=id,taken": lambda: api.get("/api/v1/shifts?limit=50&fields=id,taken", headers=headers),
+            f"GET /api/v1/shifts/availability ({len(sids)} ids)": lambda: api.get(f"/api/v1/shifts/availability?ids={ids}", headers=headers),
+            "GET /api/v1/me/signups": lambda: api.get("/api/v1/me/signups", headers=headers),
+        }
+        print(f"sign up for and cancel {args.shifts} shifts (median / p95 of {args.repeat}):")
+        for name, fn in (("form POSTs", form_round), ("API batch", api_round)):
+            p50, p95 = timed(fn, args.repeat)
+            print(f"  {name:<11} {p50:8.1f} / {p95:8.1f} ms")
+        print("read endpoints:")
+        for name, fn in reads.items():
+            p50, p95 = timed(fn, args.repeat)
+            print(f"  {name:<45} {p50:6.2f} / {p95:6.2f} ms")
+
+if __name__ == "__main__":
+    main()
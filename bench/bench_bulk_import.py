@@ -0,0 +1,55 @@
+"""Time the CSV shift import against creating the same shifts one form POST at a time.
+
+    python bench/bench_bulk_import.py --shifts 50000 --single 500
+
+The one-at-a-time figure is measured on --single shifts and scaled up.
+"""
+import argparse, io, os, pathlib, sys, tempfile, time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+
+def rows(n, offset=0):
+    start = datetime(2031, 1, 1, 8, 0)
+    for i in range(offset, offset + n):
+        s = start + timedelta(hours=i)
+        yield f"Shift {i}", f"Site {i % 40}", s.strftime("%Y-%m-%dT%H:%M"), (s + timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M"), str(1 + i % 8)
+
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["role"] = "ADMIN"
+    return client
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--shifts", type=int, default=50_000)
+    ap.add_argument("--single", type=int, default=500)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = appmod.create_app(dict(TESTING=True, WTF_CSRF_ENABLED=False,
+                                     DB_PATH=os.path.join(tmp, "bench.db"), DATABASE_URL=None), init=True)
+        client = admin_client(app)
+
+        t0 = time.perf_counter()
+        for title, loc, s, e, cap in rows(args.single, offset=args.shifts):
+            client.post("/admin/shifts", data={"title": title, "location": loc, "starts_at": s,
+                                               "ends_at": e, "capacity": cap})
+        single = (time.perf_counter() - t0) / args.single
+
+        csv_bytes = ("title,location,starts_at,ends_at,capacity\n"
+                     + "".join(",".join(r) + "\n" for r in rows(args.shifts))).encode()
+        t0 = time.perf_counter()
+        resp = client.post("/admin/shifts/import", data={"file": (io.BytesIO(csv_bytes), "shifts.csv")},
+                           content_type="multipart/form-data", follow_redirects=True)
+        bulk = time.perf_counter() - t0
+        assert f"{args.shifts} shift(s) created".encode() in resp.data, resp.data[-2000:]
+
+    print(f"{args.shifts} shifts ({len(csv_bytes) / 1e6:.1f} MB CSV)")
+    print(f"  one POST per shift: {single * 1000:.2f} ms each, ~{single * args.shifts:.0f} s total (from {args.single})")
+    print(f"  CSV import:         {bulk:.2f} s ({args.shifts / bulk:,.0f} shifts/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time the overlapping-signup report and the per-signup overlap check.
+
+    python bench/bench_conflicts.py --signups 1000000
+
+Shifts are spread over two years, three quarters of them already over, the way a
+live database looks after a few seasons. The report is timed both for upcoming
+shifts (what /admin/conflicts shows) and over the whole history (?all=1).
+"""
+import argparse, os, pathlib, random, sys, tempfile, time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+
+PER_USER = 20
+
+def seed(db, signups):
+    rnd = random.Random(42)
+    n_users = signups // PER_USER
+    n_shifts = max(signups // 10, 1000)
+    start = datetime.utcnow() - timedelta(days=548)
+    step = timedelta(days=730) / n_shifts
+    db.executemany(
+        "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+        ((f"Shift {i}", "Hall", appmod.iso_no_seconds(start + i * step),
+          appmod.iso_no_seconds(start + i * step + timedelta(hours=rnd.choice([2, 3, 4]))), 50)
+         for i in range(n_shifts)),
+    )
+    db.executemany(
+        "INSERT INTO app_user(email,password_hash,role) VALUES (?,?,'VOLUNTEER')",
+        ((f"volunteer{i}@example.org", "x") for i in range(n_users)),
+    )
+    first_shift = db.execute("SELECT MIN(id) FROM shift WHERE title LIKE 'Shift %'").fetchone()[0]
+    first_user = db.execute("SELECT MIN(id) FROM app_user WHERE email LIKE 'volunteer%'").fetchone()[0]
+    db.executemany(
+        "INSERT INTO signup(shift_id,user_id) VALUES (?,?)",
+        ((first_shift + s, first_user + u) for u in range(n_users)
+         for s in rnd.sample(range(n_shifts), PER_USER)),
+    )
+    db.execute("ANALYZE")
+    db.commit()
+    return first_user, first_shift, n_users, n_shifts
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--signups", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = appmod.create_app(dict(DB_PATH=os.path.join(tmp, "bench.db"), DATABASE_URL=None), init=True)
+        with app.app_context():
+            db = appmod.get_db()
+            t0 = time.perf_counter()
+            first_user, first_shift, n_users, n_shifts = seed(db, args.signups)
+            print(f"seeded {args.signups} signups in {time.perf_counter() - t0:.1f} s")
+
+            for label, since in (("upcoming", appmod.utc_now_iso()), ("all history", None)):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    pairs = appmod.find_conflicts(db, since=since)
+                    best = min(best, time.perf_counter() - t0)
+                print(f"conflict report, {label}: {len(pairs)} overlapping pairs in {best:.3f} s "
+                      f"(best of {args.repeat})")
+
+            rnd = random.Random(1)
+            checks = [(first_user + rnd.randrange(n_users), first_shift + rnd.randrange(n_shifts))
+                      for _ in range(10_000)]
+            t0 = time.perf_counter()
+            for uid, sid in checks:
+                appmod.find_overlap(db, uid, sid)
+            print(f"signup overlap check: {(time.perf_counter() - t0) / len(checks) * 1e6:.1f} µs each")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Peak memory of streaming /admin/signups.csv as the number of signups grows.
+
+    python bench/bench_csv_export.py --sizes 25000 100000 400000
+
+Each export runs in a fresh child process; the reported figure is how far the
+child's peak RSS rose while streaming the whole response (SQLite mmap and page
+cache are kept small in the child so they don't swamp the figure).
+"""
+import argparse, os, pathlib, resource, subprocess, sys, tempfile, time
+from datetime import datetime, timedelta
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+SHIFT_CAPACITY = 50
+
+def seed(path, signups):
+    os.environ["DB_PATH"] = path
+    import app as appmod
+    with appmod.create_app(init=True).app_context():
+        db = appmod.get_db()
+        n_shifts = signups // SHIFT_CAPACITY
+        n_users = SHIFT_CAPACITY * 4
+        start = datetime(2031, 1, 1, 8, 0)
+        db.executemany(
+            "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+            ((f"Shift {i}", "Hall", appmod.iso_no_seconds(start + timedelta(hours=i)),
+              appmod.iso_no_seconds(start + timedelta(hours=i + 2)), SHIFT_CAPACITY) for i in range(n_shifts)),
+        )
+        db.executemany(
+            "INSERT INTO app_user(email,password_hash,role) VALUES (?,?,'VOLUNTEER')",
+            ((f"volunteer{i}@example.org", "x") for i in range(n_users)),
+        )
+        first_shift = db.execute("SELECT MIN(id) FROM shift WHERE title LIKE 'Shift %'").fetchone()[0]
+        first_user = db.execute("SELECT MIN(id) FROM app_user WHERE email LIKE 'volunteer%'").fetchone()[0]
+        db.executemany(
+            "INSERT INTO signup(shift_id,user_id) VALUES (?,?)",
+            ((first_shift + i, first_user + (i * 7 + j) % n_users)
+             for i in range(n_shifts) for j in range(SHIFT_CAPACITY)),
+        )
+        db.commit()
+
+def child(path):
+    """Stream the export once; print (rows, bytes, seconds, peak RSS growth in KiB)."""
+    os.environ["DB_PATH"] = path
+    # mmap'd database pages and a large page cache count towards RSS and grow with the
+    # file, so keep them small to measure what the export itself holds on to
+    os.environ.setdefault("DB_MMAP_SIZE", "0")
+    os.environ.setdefault("DB_CACHE_SIZE", "-2000")
+    import app as appmod
+    client = appmod.create_app(init=False).test_client()
+    with client.session_transaction() as s:
+        s["role"] = "ADMIN"
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    resp = client.get("/admin/signups.csv", buffered=False)
+    size = lines = 0
+    for chunk in resp.response:
+        size += len(chunk)
+        lines += chunk.count(b"\n")
+    resp.close()
+    elapsed = time.perf_counter() - t0
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(lines - 1, size, f"{elapsed:.3f}", after - before)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[25_000, 100_000, 400_000])
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return child(args.child)
+
+    print(f"{'signups':>10}{'rows':>10}{'MB out':>10}{'seconds':>10}{'peak RSS +KiB':>15}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            subprocess.run([sys.executable, "-c",
+                            f"import sys; sys.path.insert(0, {str(ROOT / 'bench')!r}); "
+                            f"import bench_csv_export as b; b.seed({path!r}, {n})"], check=True)
+            out = subprocess.run([sys.executable, __file__, "--child", path],
+                                 check=True, capture_output=True, text=True).stdout.split()
+            rows, size, secs, rss = int(out[0]), int(out[1]), out[2], int(out[3])
+            print(f"{n:>10}{rows:>10}{size / 1e6:>10.1f}{secs:>10}{rss:>15}")
+
+if __name__ == "__main__":
+    main()
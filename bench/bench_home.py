@@ -0,0 +1,83 @@
+"""Home page latency as the catalogue grows, with and without the page cache.
+
+    python bench/bench_home.py --sizes 1000,10000,100000 --requests 2000
+
+Visitors browse the first few pages and run a handful of searches (the LIKE
+fallback when FTS5 is off scans the whole table). Every 50th request signs
+someone up, which moves the catalog rev and forces fresh pages.
+"""
+import argparse, os, pathlib, random, sys, tempfile, time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+
+WORDS = ["Pantry", "Garden", "Kitchen", "Library", "Shelter", "Clinic", "Warehouse", "Park"]
+
+def populate(db, n):
+    start = datetime(2031, 1, 1, 8, 0)
+    db.executemany(
+        "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+        ((f"{WORDS[i % len(WORDS)]} shift {i}", f"Site {i % 40}",
+          (start + timedelta(minutes=30 * i)).isoformat(), (start + timedelta(minutes=30 * i + 120)).isoformat(),
+          10_000) for i in range(n)),
+    )
+    users = [db.execute("INSERT INTO app_user(email,password_hash,role) VALUES (?,?,'VOLUNTEER')",
+                        (f"u{i}@bench", "x")).lastrowid for i in range(50)]
+    db.commit()
+    return users
+
+def run(app, n_requests, users, seed=1):
+    rnd = random.Random(seed)
+    client = app.test_client()
+    volunteer = app.test_client()
+    # cursors for the first pages, so visitors browse past page one
+    cursors = [None]
+    for _ in range(4):
+        nxt = client.get("/shifts.json" + (f"?after={cursors[-1]}" if cursors[-1] else "")).json["next"]
+        if not nxt:
+            break
+        cursors.append(nxt)
+    samples = []
+    for i in range(n_requests):
+        if i % 50 == 49:
+            with volunteer.session_transaction() as s:
+                s["uid"], s["role"] = rnd.choice(users), "VOLUNTEER"
+            volunteer.post(f"/shifts/{rnd.randint(1, 20)}/signups")
+            continue
+        roll = rnd.random()
+        if roll < 0.2:
+            url = "/?q=" + rnd.choice(WORDS).lower()
+        else:
+            after = rnd.choice(cursors)
+            url = "/" + (f"?after={after}" if after else "")
+        t0 = time.perf_counter()
+        client.get(url)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--requests", type=int, default=2000)
+    args = ap.parse_args()
+
+    print(f"{'shifts':>8} {'cache':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = appmod.create_app(dict(
+                TESTING=True, WTF_CSRF_ENABLED=False, SIGNUP_CONFLICTS="allow", DB_PATH=os.path.join(tmp, "bench.db"),
+                DATABASE_URL=None, OUTBOX_FILE=os.path.join(tmp, "outbox.jsonl"),
+            ), init=True)
+            with app.app_context():
+                users = populate(appmod.get_db(), n)
+            for size in (0, 512):
+                app.config["HOME_CACHE_SIZE"] = size
+                appmod.home_cache.clear()
+                p50, p99 = run(app, args.requests, users)
+                print(f"{n:>8} {'on' if size else 'off':>6} {p50:8.2f} {p99:8.2f}")
+            appmod.close_pools()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Thousands of idle live seat-count streams, and how fast a change reaches all of them.
+
+    python bench/bench_live.py --subscribers 5000 --signups 20
+
+Serves the app with live.RequestHandler on a local port, opens `--subscribers`
+EventSource-style connections for one page of shifts, then signs volunteers up
+one at a time. It prints the threads and memory the idle streams cost, and for
+each change the time from the signup's response until every subscriber had the
+event (p50/max over the signups). The clients run in this process too, so the
+fan-out numbers include their reading.
+"""
+import argparse, logging, os, pathlib, selectors, socket, sys, tempfile, threading, time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+import live  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmRSS")) / 1024
+    except (OSError, StopIteration):
+        return float("nan")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--subscribers", type=int, default=5000)
+    ap.add_argument("--signups", type=int, default=20)
+    ap.add_argument("--coalesce-ms", type=int, default=0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = appmod.create_app(dict(
+            TESTING=True, WTF_CSRF_ENABLED=False, PASSWORD_HASH_WORKERS=0, LIVE_COALESCE_MS=args.coalesce_ms,
+            LIVE_MAX_SUBSCRIBERS=args.subscribers, DB_PATH=os.path.join(tmp, "bench.db"), DATABASE_URL=None,
+        ), init=True)
+        with app.app_context():
+            db = appmod.get_db()
+            users = [db.execute("INSERT INTO app_user(email,password_hash,role) VALUES (?,'x','VOLUNTEER')",
+                                (f"v{i}@example.org",)).lastrowid for i in range(args.signups)]
+            shifts = [db.execute("INSERT INTO shift(title,starts_at,ends_at,capacity) VALUES (?,?,?,?)",
+                                 (f"Shift {i}", "2031-01-01T09:00", "2031-01-01T12:00", args.signups)).lastrowid
+                      for i in range(20)]
+            db.commit()
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)  # one access log line per stream
+        server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=live.RequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        live._raise_fd_limit()  # the clients need descriptors too
+
+        threads, rss = threading.active_count(), rss_mb()
+        request = f"GET /shifts/live?ids={','.join(map(str, shifts))} HTTP/1.1\r\nHost: bench\r\n\r\n".encode()
+        sel = selectors.DefaultSelector()
+        t0 = time.perf_counter()
+        for _ in range(args.subscribers):
+            s = socket.create_connection(("127.0.0.1", server.port))
+            s.sendall(request)
+            s.setblocking(False)
+            sel.register(s, selectors.EVENT_READ, [0])  # events seen on this stream
+        # wait for every snapshot
+        def pump(until_events, deadline):
+            waiting = sum(1 for k in sel.get_map().values() if k.data[0] < until_events)
+            while waiting and time.perf_counter() < deadline:
+                for key, _ in sel.select(0.5):
+                    data = key.fileobj.recv(65536)
+                    before = key.data[0]
+                    key.data[0] += data.count(b"event: seats")
+                    if before < until_events <= key.data[0]:
+                        waiting -= 1
+            return waiting
+        missing = pump(1, time.perf_counter() + 120)
+        connected = time.perf_counter() - t0
+        while appmod.live_hub.stats()["subscribers"] < args.subscribers - missing and time.perf_counter() - t0 < 120:
+            time.sleep(0.05)
+        time.sleep(0.5)  # let the handoff threads exit
+        print(f"{args.subscribers} streams open in {connected:.1f} s ({missing} missing), "
+              f"{threading.active_count() - threads} extra thread(s), +{rss_mb() - rss:.0f} MB RSS")
+
+        client = app.test_client()
+        fanout = []
+        for i, uid in enumerate(users):
+            with client.session_transaction() as s:
+                s["uid"], s["role"] = uid, "VOLUNTEER"
+            client.post(f"/shifts/{shifts[i % len(shifts)]}/signups")
+            t = time.perf_counter()
+            if pump(i + 2, t + 30):
+                print("  some streams missed an event")
+            fanout.append(time.perf_counter() - t)
+        fanout.sort()
+        print(f"fan-out to all {args.subscribers}: p50 {fanout[len(fanout) // 2] * 1000:.1f} ms, "
+              f"max {fanout[-1] * 1000:.1f} ms (coalesce window {args.coalesce_ms} ms)")
+        print(appmod.live_hub.stats())
+        for key in list(sel.get_map().values()):
+            key.fileobj.close()
+        server.shutdown()
+        appmod.live_hub.stop()
+        appmod.close_pools()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""What the request and SQL metrics cost: the same requests with METRICS_ENABLED on and off.
+
+    python bench/bench_metrics.py --shifts 5000 --requests 2000
+
+Times a mix of Home (cached and searched), My Shifts and a batch API signup,
+and separately the per-statement overhead of the profiling connection wrapper.
+"""
+import argparse, os, pathlib, sys, tempfile, time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+import metrics  # noqa: E402
+
+def populate(db, n):
+    start = datetime(2031, 1, 1, 8, 0)
+    db.executemany(
+        "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+        ((f"Shift {i}", f"Site {i % 40}", (start + timedelta(hours=3 * i)).isoformat(),
+          (start + timedelta(hours=3 * i + 2)).isoformat(), 1_000_000) for i in range(n)),
+    )
+    uid = db.execute("INSERT INTO app_user(email,password_hash,role) VALUES ('b@bench','x','VOLUNTEER')").lastrowid
+    db.commit()
+    return uid
+
+def run(app, n, headers, uid):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["uid"], s["role"] = uid, "VOLUNTEER"
+    urls = ["/", "/?q=site", "/my", "/shifts.json"]
+    samples = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        if i % 20 == 19:
+            client.post("/api/v1/signups", json={"shift_ids": [i % 500 + 1]}, headers=headers)
+        else:
+            client.get(urls[i % len(urls)])
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+def statement_overhead(db, n=20000):
+    def loop(conn):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            conn.execute("SELECT 1").fetchone()
+        return (time.perf_counter() - t0) / n * 1e6
+    raw = loop(db)
+    wrapped = loop(metrics.ProfiledConnection(db, metrics.QueryProfile(), 0.1, None))
+    return raw, wrapped
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--shifts", type=int, default=5000)
+    ap.add_argument("--requests", type=int, default=2000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = appmod.create_app(dict(
+            TESTING=True, WTF_CSRF_ENABLED=False, SIGNUP_CONFLICTS="allow", DB_PATH=os.path.join(tmp, "bench.db"),
+            DATABASE_URL=None, OUTBOX_FILE=os.path.join(tmp, "outbox.jsonl"),
+        ), init=True)
+        with app.app_context():
+            db = appmod.get_db()
+            uid = populate(db, args.shifts)
+            headers = {"Authorization": "Bearer " + appmod.issue_api_token(db, uid)}
+            raw, wrapped = statement_overhead(db)
+        print(f"{'metrics':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for enabled in (False, True, False, True):  # interleaved, so warm-up doesn't favour one side
+            app.config["METRICS_ENABLED"] = enabled
+            p50, p99 = run(app, args.requests, headers, uid)
+            print(f"{'on' if enabled else 'off':>8} {p50:8.3f} {p99:8.3f}")
+        print(f"SELECT 1: {raw:.2f} us raw, {wrapped:.2f} us profiled (+{wrapped - raw:.2f} us per statement)")
+        appmod.close_pools()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Login throughput per core, hashing inline vs in the process pool, and what a login burst does to other pages.
+
+    python bench/bench_passwords.py --logins 64 --threads 16 --iterations 600000
+
+`--threads` clients log in at once (a burst at event launch) while one more
+keeps loading /shifts.json. For each PASSWORD_HASH_WORKERS setting it prints
+logins per second, the same per core used, how many were turned away with 503,
+and the page's p50/p99 during the burst.
+"""
+import argparse, os, pathlib, sys, tempfile, threading, time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+import passwords  # noqa: E402
+
+def burst(app, logins, threads):
+    done, rejected, page = [], [0], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def login(count):
+        client = app.test_client()
+        for _ in range(count):
+            status = client.post("/login", data={"email": "bench@example.org", "password": "pw"}).status_code
+            with lock:
+                if status == 503:
+                    rejected[0] += 1
+                else:
+                    done.append(status)
+
+    def browse():
+        client = app.test_client()
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            client.get("/shifts.json")
+            page.append(time.perf_counter() - t0)
+
+    watcher = threading.Thread(target=browse)
+    watcher.start()
+    clients = [threading.Thread(target=login, args=(logins // threads + (k < logins % threads),)) for k in range(threads)]
+    t0 = time.perf_counter()
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    watcher.join()
+    page.sort()
+    return len(done) / elapsed, rejected[0], page[len(page) // 2] * 1000, page[int(len(page) * 0.99)] * 1000
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--logins", type=int, default=64)
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--iterations", type=int, default=600_000)
+    ap.add_argument("--queue", type=int, default=32)
+    args = ap.parse_args()
+
+    cpus = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        app = appmod.create_app(dict(
+            TESTING=True, WTF_CSRF_ENABLED=False, PASSWORD_HASH_ITERATIONS=args.iterations,
+            PASSWORD_HASH_QUEUE=args.queue, DB_PATH=os.path.join(tmp, "bench.db"), DATABASE_URL=None,
+        ), init=True)
+        with app.app_context():
+            db = appmod.get_db()
+            db.execute("INSERT INTO app_user(email,password_hash,role) VALUES (?,?,'VOLUNTEER')",
+                       ("bench@example.org", passwords.Hasher(args.iterations, workers=0).hash("pw")))
+            db.commit()
+        print(f"{cpus} CPU(s), {args.iterations} iterations, {args.threads} clients, {args.logins} logins")
+        print(f"{'workers':>8} {'logins/s':>9} {'per core':>9} {'503s':>5} {'page p50':>9} {'page p99':>9}")
+        for workers in sorted({0, 1, cpus}):
+            app.config["PASSWORD_HASH_WORKERS"] = workers
+            appmod.get_hasher().hash("warm-up")  # start the pool outside the timing
+            rate, rejected, p50, p99 = burst(app, args.logins, args.threads)
+            cores = min(workers, cpus) or cpus  # inline hashing can use every core the threads reach
+            print(f"{workers or 'inline':>8} {rate:9.1f} {rate / cores:9.1f} {rejected:5} {p50:8.1f}ms {p99:8.1f}ms")
+            appmod.get_hasher().shutdown()
+        appmod.close_pools()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Time the roster optimizer on a synthetic season.
+
+    python bench/bench_roster.py --shifts 10000 --volunteers 5000
+
+Shifts of 2-4 hours are spread over 90 days; each volunteer gives a few
+availability windows of a day or two. Reports run time, coverage and how evenly
+the hours were shared.
+"""
+import argparse, pathlib, random, statistics, sys, time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import roster  # noqa: E402
+
+DAY = 24 * 60
+
+def season(n_shifts, n_volunteers, seed=42):
+    rnd = random.Random(seed)
+    shifts = []
+    for i in range(n_shifts):
+        start = rnd.randrange(90 * DAY // 30) * 30
+        shifts.append(roster.Shift(i, start, start + rnd.choice([120, 180, 240]), rnd.randint(1, 4)))
+    availability = {}
+    for v in range(n_volunteers):
+        windows = []
+        for _ in range(rnd.randint(1, 4)):
+            start = rnd.randrange(90) * DAY + rnd.choice([0, 8 * 60])
+            windows.append(roster.Window(start, start + rnd.choice([DAY // 2, DAY, 2 * DAY]), rnd.randint(0, 1)))
+        availability[v] = windows
+    return shifts, availability
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--shifts", type=int, default=10_000)
+    ap.add_argument("--volunteers", type=int, default=5_000)
+    ap.add_argument("--max-hours", type=float, default=20)
+    args = ap.parse_args()
+
+    shifts, availability = season(args.shifts, args.volunteers)
+    t0 = time.perf_counter()
+    plan = roster.plan(shifts, availability, max_time=args.max_hours * 60)
+    elapsed = time.perf_counter() - t0
+
+    length = {s.id: s.end - s.start for s in shifts}
+    hours = {}
+    for v, sid in plan:
+        hours[v] = hours.get(v, 0) + length[sid] / 60
+    seats = sum(s.seats for s in shifts)
+    print(f"{args.shifts} shifts ({seats} seats) x {args.volunteers} volunteers: {elapsed:.2f} s")
+    print(f"  filled {len(plan)} seats ({len(plan) / seats:.0%}), {len(hours)} volunteers rostered")
+    if hours:
+        print(f"  hours per rostered volunteer: mean {statistics.mean(hours.values()):.1f}, "
+              f"max {max(hours.values()):.1f}, stdev {statistics.pstdev(hours.values()):.1f}")
+
+if __name__ == "__main__":
+    main()
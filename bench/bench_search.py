@@ -0,0 +1,67 @@
+"""Compare shift search through FTS5 against the LIKE fallback.
+
+    python bench/bench_search.py --shifts 100000
+"""
+import argparse, os, pathlib, random, sys, tempfile, time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+
+WORDS = ["food", "bank", "park", "cleanup", "garden", "library", "shelter", "kitchen",
+         "drive", "sorting", "reading", "tutoring", "market", "clinic", "river", "school"]
+PLACES = ["Community Center", "Riverside Park", "Warehouse", "Main Library",
+          "Town Hall", "North Clinic", "Harbor Market", "West School"]
+# common words, a rare one (every 5000th shift) and a miss
+QUERIES = ["food", "gard", "river park", "kitchen shelter", "orch", "zzz"]
+
+def seed(db, n):
+    rnd = random.Random(42)
+    start = datetime.utcnow() + timedelta(days=1)
+    rows = []
+    for i in range(n):
+        s = start + timedelta(minutes=30 * i)
+        title = " ".join(rnd.sample(WORDS, 3)).title() if i % 5000 else "Orchard Harvest"
+        rows.append((title, rnd.choice(PLACES), appmod.iso_no_seconds(s),
+                     appmod.iso_no_seconds(s + timedelta(hours=2)), rnd.randint(1, 10)))
+    db.executemany(
+        "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)", rows
+    )
+    db.execute("ANALYZE")
+    db.commit()
+
+def time_queries(app, fts, repeat):
+    app.config["SEARCH_FTS"] = fts
+    results = {}
+    for q in QUERIES:
+        with app.test_request_context("/", query_string={"q": q}):
+            appmod.upcoming_shifts_page(q)  # warm up
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                appmod.upcoming_shifts_page(q)
+            results[q] = (time.perf_counter() - t0) / repeat * 1000
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--shifts", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    if not appmod._fts5_available():
+        sys.exit("this SQLite build has no FTS5")
+    with tempfile.TemporaryDirectory() as tmp:
+        app = appmod.create_app(dict(SEARCH_FTS=True, DB_PATH=os.path.join(tmp, "bench.db"), DATABASE_URL=None),
+                                init=True)
+        with app.app_context():
+            seed(appmod.get_db(), args.shifts)
+        like = time_queries(app, False, args.repeat)
+        fts = time_queries(app, True, args.repeat)
+
+    print(f"{args.shifts} shifts, first page, mean of {args.repeat} runs")
+    print(f"{'query':<18}{'LIKE ms':>10}{'FTS5 ms':>10}{'speedup':>10}")
+    for q in QUERIES:
+        print(f"{q!r:<18}{like[q]:>10.2f}{fts[q]:>10.2f}{like[q] / fts[q]:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
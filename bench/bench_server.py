@@ -0,0 +1,112 @@
+"""Requests per second: the debug dev server (app.run) against gunicorn (`flask serve`) at a few sizes.
+
+    python bench/bench_server.py --clients 16 --seconds 10 --sizes 1x8 2x8 4x8
+
+Needs gunicorn (requirements-production.txt). Seeds a database with --shifts
+upcoming shifts, then for each server starts it in a subprocess on a free port
+and has --clients client processes hammer the home page and /shifts.json
+(alternately, keep-alive off, like a browser without a cache) for --seconds.
+Prints requests/s and p50/p99 latency for each. The clients share the machine
+with the server, so compare the rows with each other rather than with a real
+deployment.
+"""
+import argparse, http.client, multiprocessing, os, pathlib, socket, subprocess, sys, tempfile, time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+DEV = """
+import sys, app, live
+app.create_app().run(debug=True, use_reloader=False, port=int(sys.argv[1]), request_handler=live.RequestHandler)
+"""
+
+def seed(env, shifts):
+    os.environ.update(env)
+    import app as appmod
+    with appmod.create_app(init=True).app_context():
+        db = appmod.get_db()
+        db.executemany("INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+                       [(f"Shift {i}", f"Site {i % 7}", f"2031-{1 + i % 12:02d}-{1 + i % 28:02d}T09:00:00",
+                         f"2031-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00", 5) for i in range(shifts)])
+        db.commit()
+    appmod.close_pools()
+
+def client(port, seconds, out):
+    paths = ["/", "/shifts.json"]
+    times, errors = [], 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            conn.request("GET", paths[len(times) % 2])
+            resp = conn.getresponse()
+            resp.read()
+            conn.close()
+            if resp.status != 200:
+                errors += 1
+        except OSError:
+            errors += 1
+        times.append(time.perf_counter() - t)
+    out.put((times, errors))
+
+def start(cmd, env, port):
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit(f"{' '.join(cmd)} didn't start listening")
+
+def measure(label, proc, port, args):
+    out = multiprocessing.Queue()
+    clients = [multiprocessing.Process(target=client, args=(port, args.seconds, out)) for _ in range(args.clients)]
+    for c in clients:
+        c.start()
+    times, errors = [], 0
+    for _ in clients:
+        t, e = out.get()
+        times += t
+        errors += e
+    for c in clients:
+        c.join()
+    proc.terminate()
+    proc.wait(60)
+    times.sort()
+    print(f"{label:<22} {len(times) / args.seconds:8.0f} req/s   p50 {times[len(times) // 2] * 1000:6.1f} ms"
+          f"   p99 {times[int(len(times) * 0.99)] * 1000:7.1f} ms   {errors} error(s)")
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--shifts", type=int, default=200)
+    ap.add_argument("--sizes", nargs="+", default=["1x8", "2x8", "4x8"], help="workers x threads")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DB_PATH=os.path.join(tmp, "bench.db"), OUTBOX_FILE=os.path.join(tmp, "outbox.log"),
+                   PASSWORD_HASH_WORKERS="0")
+        env.pop("DATABASE_URL", None)
+        seed(env, args.shifts)
+        print(f"{args.clients} client process(es), {args.seconds:g} s each, {os.cpu_count()} CPU(s)")
+        port = free_port()
+        measure("app.run (debug)", start([sys.executable, "-c", DEV, str(port)], env, port), port, args)
+        for size in args.sizes:
+            workers, threads = size.split("x")
+            port = free_port()
+            cmd = [sys.executable, "-m", "flask", "--app", "app", "serve", "--port", str(port),
+                   "--workers", workers, "--threads", threads]
+            measure(f"gunicorn {workers} x {threads}", start(cmd, env, port), port, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Fill a database with a realistic volume of shifts, volunteers, signups and waitlists.
+
+    python bench/datagen.py --out /tmp/full.db --shifts 100000 --users 50000 --signups 1000000
+
+Shifts are spread over two years, three quarters of them already over. A few
+volunteers do most of the work (activity follows a long-tailed distribution),
+popular shifts fill up and grow a waitlist, and signups are made days before
+the shift starts. Rows go in through the normal schema, so the triggers keep
+the counters, search index and calendar revs as the app would. Every volunteer's
+password is "password". The same seed gives the same data.
+
+bench/loadtest.py generates its data with this (or reuses a file made by it).
+"""
+import argparse, os, pathlib, random, sys, time
+from datetime import datetime, timedelta
+from itertools import islice
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import app as appmod  # noqa: E402
+
+TITLES = ["Food Bank", "Community Garden", "Soup Kitchen", "Library", "Shelter", "Clinic",
+          "Warehouse", "Park Cleanup", "Tutoring", "Animal Rescue", "Thrift Store", "Meal Delivery"]
+ROLES = ["Morning", "Afternoon", "Evening", "Setup", "Sorting", "Front Desk", "Driver"]
+CAPACITY_SCALE = (0.3, 0.5, 0.8, 1, 1, 1.2, 1.5, 2, 3)  # times the mean signups per shift
+BATCH = 10_000
+
+def _batched(rows, n=BATCH):
+    it = iter(rows)
+    while batch := list(islice(it, n)):
+        yield batch
+
+def _insert(db, sql, rows):
+    for batch in _batched(rows):
+        db.executemany(sql, batch)
+        db.commit()
+
+def generate(db, shifts=100_000, users=50_000, signups=1_000_000, waitlists=None, seed=42, now=None, report=print):
+    """Add the rows to `db` (any backend) and return how many of each went in.
+
+    `waitlists` defaults to a tenth of `signups`. Signups and waitlist entries
+    are capped by shift capacity and by there being volunteers left to add,
+    so the counts come out close to, not exactly, what was asked for.
+    """
+    rnd = random.Random(seed)
+    now = (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    waitlists = signups // 10 if waitlists is None else waitlists
+    per_shift = max(signups / max(shifts, 1), 1)
+    t0 = time.perf_counter()
+
+    # ---------- volunteers ----------
+    last = db.execute("SELECT COALESCE(MAX(id), 0) FROM app_user").fetchone()[0]
+    pw = appmod.get_hasher().hash("password")
+    _insert(db, "INSERT INTO app_user(email,password_hash,role) VALUES (?,?,'VOLUNTEER')",
+            ((f"volunteer{i}@example.org", pw) for i in range(users)))
+    user_ids = [r[0] for r in db.execute("SELECT id FROM app_user WHERE id > ? ORDER BY id", (last,))]
+    # long tail: the busiest volunteer is picked a few hundred times as often as the quietest
+    cum, total = [], 0.0
+    for i in range(users):
+        total += 1 / (i + 50) ** 0.8
+        cum.append(total)
+    report(f"{users} volunteers in {time.perf_counter() - t0:.1f} s")
+
+    # ---------- shifts ----------
+    last = db.execute("SELECT COALESCE(MAX(id), 0) FROM shift").fetchone()[0]
+    start = now - timedelta(days=548)
+    step = timedelta(days=730) / max(shifts, 1)
+    rows = []
+    for i in range(shifts):
+        day = start + i * step
+        starts = day.replace(hour=rnd.randint(7, 18), minute=rnd.choice((0, 30)))
+        ends = starts + timedelta(hours=rnd.choice((2, 3, 3, 4)))
+        capacity = max(1, round(per_shift * rnd.choice(CAPACITY_SCALE)))
+        rows.append((f"{rnd.choice(TITLES)} {rnd.choice(ROLES)}", f"Site {rnd.randrange(200)}",
+                     appmod.iso_no_seconds(starts), appmod.iso_no_seconds(ends), capacity))
+    _insert(db, "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)", rows)
+    shift_ids = [r[0] for r in db.execute("SELECT id FROM shift WHERE id > ? ORDER BY id", (last,))]
+    report(f"{shifts} shifts in {time.perf_counter() - t0:.1f} s")
+
+    # ---------- who signed up where ----------
+    # how full each shift gets: some fill up, the rest land anywhere from a third to nearly full
+    fill = [min(cap, max(0, round(cap * (1 if rnd.random() < 0.4 else rnd.uniform(0.3, 1)))))
+            for *_, cap in rows]
+    scale = signups / max(sum(fill), 1)
+    taken = [min(cap, round(f * scale)) for f, (*_, cap) in zip(fill, rows)]
+    full = [i for i, (t, (*_, cap)) in enumerate(zip(taken, rows)) if t and t == cap]
+    waiting = [0] * shifts
+    for i in rnd.choices(full, k=waitlists) if full else ():
+        waiting[i] += 1
+
+    def people(shift_idx):
+        want = taken[shift_idx] + waiting[shift_idx]
+        picked = set()
+        for _ in range(4):  # the busy head of the tail comes up twice now and then: draw again to top up
+            picked.update(rnd.choices(user_ids, cum_weights=cum, k=want - len(picked)))
+            if len(picked) >= want:
+                break
+        picked = list(picked)[:want]
+        rnd.shuffle(picked)
+        return picked[:taken[shift_idx]], picked[taken[shift_idx]:]
+
+    def made_before(starts_at, days):
+        # CURRENT_TIMESTAMP's format, so these sort right against rows the app adds later
+        made = datetime.fromisoformat(starts_at) - timedelta(days=rnd.uniform(0.5, days))
+        return made.strftime("%Y-%m-%d %H:%M:%S")
+
+    signup_rows, wait_rows = [], []
+    for i, (sid, (_, _, starts_at, _, _)) in enumerate(zip(shift_ids, rows)):
+        booked, queued = people(i)
+        signup_rows += [(sid, uid, made_before(starts_at, 30)) for uid in booked]
+        wait_rows += [(sid, uid, made_before(starts_at, 7)) for uid in queued]
+    _insert(db, "INSERT INTO signup(shift_id,user_id,created_at) VALUES (?,?,?)", signup_rows)
+    report(f"{len(signup_rows)} signups in {time.perf_counter() - t0:.1f} s")
+    _insert(db, "INSERT INTO waitlist(shift_id,user_id,created_at) VALUES (?,?,?)", wait_rows)
+    report(f"{len(wait_rows)} waitlist entries in {time.perf_counter() - t0:.1f} s")
+
+    db.execute("ANALYZE")
+    db.commit()
+    return {"shifts": shifts, "users": users, "signups": len(signup_rows), "waitlists": len(wait_rows)}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--out", required=True, help="SQLite file to create (DATABASE_URL, if set, wins)")
+    ap.add_argument("--shifts", type=int, default=100_000)
+    ap.add_argument("--users", type=int, default=50_000)
+    ap.add_argument("--signups", type=int, default=1_000_000)
+    ap.add_argument("--waitlists", type=int, help="default: a tenth of --signups")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    app = appmod.create_app({"DB_PATH": args.out}, init=False)
+    if not app.config["DATABASE_URL"] and os.path.exists(args.out):
+        sys.exit(f"{args.out} already exists")
+    with app.app_context():
+        appmod.init_db()
+        generate(appmod.get_db(), args.shifts, args.users, args.signups, args.waitlists, args.seed)
+    appmod.close_pools()
+
+if __name__ == "__main__":
+    main()
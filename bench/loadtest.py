@@ -0,0 +1,263 @@
+"""Load-test the hot paths on realistic data and compare the numbers against a saved baseline.
+
+    python bench/loadtest.py --scale full --data /tmp/full.db --save bench/baselines/full.json
+    python bench/loadtest.py --scale full --data /tmp/full.db --compare bench/baselines/full.json
+
+Each scenario sends requests through the Flask test client and records their
+latencies: Home with and without a search, My Shifts, a crowd of volunteers
+signing up for the same few shifts from several threads at once, cancelling a
+signup on a full shift (which promotes someone from the waitlist), the signups
+CSV export for one month, and calendar feeds.
+
+Data comes from bench/datagen.py. --data keeps the generated SQLite file and
+reuses it on later runs (made on the first); each run works on a copy, so runs
+start from the same state. --save writes the results as JSON. --compare reads a
+saved run and exits with status 1 when a scenario's --metric latency grew by
+more than --threshold (and by at least --min-delta-ms, so sub-millisecond
+jitter doesn't fail a run). Compare runs from the same machine and --scale.
+"""
+import argparse, itertools, json, os, pathlib, platform, sqlite3, sys, tempfile, threading, time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+import app as appmod  # noqa: E402
+import datagen  # noqa: E402
+
+SCALES = {  # shifts, users, signups
+    "small": (2_000, 1_000, 20_000),
+    "medium": (20_000, 10_000, 200_000),
+    "full": (100_000, 50_000, 1_000_000),
+}
+SEARCHES = ["food", "garden", "kitchen", "library", "shelter", "clinic", "site 12", "driver"]
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+
+def summarize(samples, errors=0):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(int(len(samples) * q), len(samples) - 1)] * 1000
+    return {"n": len(samples), "errors": errors, "p50_ms": round(pick(0.5), 3), "p95_ms": round(pick(0.95), 3),
+            "p99_ms": round(pick(0.99), 3), "mean_ms": round(sum(samples) / len(samples) * 1000, 3)}
+
+def _login(client, uid, role="VOLUNTEER"):
+    with client.session_transaction() as s:
+        s["uid"], s["role"] = uid, role
+
+def _timed(client, method, url, ok=(200, 302, 304)):
+    t0 = time.perf_counter()
+    resp = client.open(url, method=method)
+    resp.get_data()  # streamed bodies (the CSV) are produced here
+    return time.perf_counter() - t0, resp.status_code in ok
+
+# ---------- scenarios ----------
+# each takes (app, ctx, n) and returns (latencies in seconds, number of failed requests)
+
+def home(app, ctx, n):
+    client = app.test_client()
+    return _run(n, lambda i: _timed(client, "GET", "/"))
+
+def home_search(app, ctx, n):
+    client = app.test_client()
+    return _run(n, lambda i: _timed(client, "GET", "/?q=" + SEARCHES[i % len(SEARCHES)]))
+
+def my_shifts(app, ctx, n):
+    client = app.test_client()
+
+    def one(i):
+        _login(client, ctx.busy[i % len(ctx.busy)])
+        return _timed(client, "GET", "/my")
+    return _run(n, one)
+
+def sign_up_contention(app, ctx, n, threads=8, hot=5):
+    """`threads` volunteers at a time race for the same `hot` upcoming shifts."""
+    shifts = ctx.open_shifts[:hot]
+    users = itertools.cycle(ctx.quiet)
+    lock = threading.Lock()
+    samples, errors = [], [0]
+
+    def worker(count):
+        client = app.test_client()
+        for i in range(count):
+            with lock:
+                uid = next(users)
+            _login(client, uid)
+            took, ok = _timed(client, "POST", f"/shifts/{shifts[i % len(shifts)]}/signups")
+            with lock:
+                samples.append(took)
+                errors[0] += not ok
+
+    pool = [threading.Thread(target=worker, args=(n // threads + (k < n % threads),)) for k in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return samples, errors[0]
+
+def cancel_promotion(app, ctx, n):
+    client = app.test_client()
+    picks = ctx.promotable[:n]
+
+    def one(i):
+        signup_id, uid = picks[i]
+        _login(client, uid)
+        return _timed(client, "POST", f"/signups/{signup_id}/cancel")
+    return _run(len(picks), one)
+
+def csv_export(app, ctx, n):
+    client = app.test_client()
+    _login(client, ctx.admin, "ADMIN")
+    months = ctx.months
+
+    def one(i):
+        first = months[i % len(months)]
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return _timed(client, "GET", f"/admin/signups.csv?from={first:%Y-%m-%d}&to={last:%Y-%m-%d}")
+    return _run(n, one)
+
+def ics(app, ctx, n):
+    # one fetch per volunteer, busiest first, so each is rendered rather than served from ics_cache
+    client = app.test_client()
+
+    def one(i):
+        _login(client, ctx.busy[i % len(ctx.busy)])
+        return _timed(client, "GET", "/my.ics")
+    return _run(min(n, len(ctx.busy)), one)
+
+# order matters: the writers go last so the readers see the data as generated
+SCENARIOS = {
+    "home": home,
+    "home_search": home_search,
+    "my_shifts": my_shifts,
+    "csv_export_month": csv_export,
+    "ics": ics,
+    "sign_up_contention": sign_up_contention,
+    "cancel_promotion": cancel_promotion,
+}
+# whole-result requests are heavier; these run this fraction of --requests
+HEAVY = {"csv_export_month": 0.05, "ics": 0.5}
+
+def _run(n, fn):
+    samples, errors = [], 0
+    for i in range(n):
+        took, ok = fn(i)
+        samples.append(took)
+        errors += not ok
+    return samples, errors
+
+class Context:
+    """Ids the scenarios need, looked up once from the data."""
+
+    def __init__(self, db, n):
+        now = appmod.utc_now_iso()
+        self.admin = db.execute("SELECT id FROM app_user WHERE role='ADMIN' ORDER BY id LIMIT 1").fetchone()[0]
+        self.busy = [r[0] for r in db.execute(
+            "SELECT user_id FROM signup GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT ?", (n,))]
+        self.quiet = [r[0] for r in db.execute(
+            "SELECT id FROM app_user u WHERE role='VOLUNTEER' AND NOT EXISTS "
+            "(SELECT 1 FROM signup WHERE user_id=u.id) ORDER BY id")]
+        self.quiet += [r[0] for r in db.execute(
+            "SELECT user_id FROM signup GROUP BY user_id ORDER BY COUNT(*) LIMIT ?", (n * 2,))]
+        self.open_shifts = [r[0] for r in db.execute(
+            "SELECT id FROM shift WHERE starts_at > ? AND taken < capacity ORDER BY starts_at LIMIT 20", (now,))]
+        self.promotable = [tuple(r) for r in db.execute(
+            "SELECT su.id, su.user_id FROM shift s JOIN signup su ON su.shift_id = s.id "
+            "WHERE s.starts_at > ? AND s.wait_ct > 0 AND su.id = (SELECT MIN(id) FROM signup WHERE shift_id = s.id) "
+            "ORDER BY s.starts_at LIMIT ?", (now, n))]
+        first = db.execute("SELECT MIN(starts_at) FROM shift").fetchone()[0]
+        start = datetime.fromisoformat(first).replace(day=1, hour=0, minute=0) if first else datetime.now()
+        self.months = [(start + timedelta(days=31 * i)).replace(day=1) for i in range(24)]
+
+def run(app, requests=500, only=None, warmup=20, report=print):
+    """Run the scenarios against the app's current database; {name: summary} in order."""
+    with app.app_context():
+        ctx = Context(appmod.get_db(), requests)
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        if only and name not in only:
+            continue
+        n = max(int(requests * HEAVY.get(name, 1)), 1)
+        if scenario not in (sign_up_contention, cancel_promotion):  # writes aren't repeatable
+            scenario(app, ctx, min(warmup, n))
+        samples, errors = scenario(app, ctx, n)
+        if not samples:
+            report(f"{name:>20}  skipped: nothing to run it on")
+            continue
+        results[name] = summarize(samples, errors)
+        r = results[name]
+        report(f"{name:>20}  n={r['n']:<5} p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  "
+               f"p99 {r['p99_ms']:8.2f} ms" + (f"  ({errors} failed)" if errors else ""))
+    return results
+
+def compare(baseline, current, threshold=0.25, metric="p95_ms", min_delta_ms=1.0):
+    """[(scenario, before, after, ratio, regressed)] for scenarios in both runs."""
+    rows = []
+    for name, before in baseline["scenarios"].items():
+        after = current["scenarios"].get(name)
+        if after is None:
+            continue
+        b, a = before[metric], after[metric]
+        ratio = a / b if b else float("inf")
+        rows.append((name, b, a, ratio, ratio > 1 + threshold and a - b >= min_delta_ms))
+    return rows
+
+def data_counts(db):
+    return {t: db.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+            for t in ("shift", "app_user", "signup", "waitlist")}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", choices=SCALES, default="small")
+    ap.add_argument("--data", help="generated SQLite file to reuse (created on first use)")
+    ap.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    ap.add_argument("--only", help="comma-separated scenarios: " + ", ".join(SCENARIOS))
+    ap.add_argument("--save", help="write results to this JSON file")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--metric", choices=METRICS, default="p95_ms")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed growth, 0.25 = 25%%")
+    ap.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = ap.parse_args()
+
+    settings = dict(TESTING=True, WTF_CSRF_ENABLED=False, DATABASE_URL=None)
+    shifts, users, signups = SCALES[args.scale]
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.data or os.path.join(tmp, "source.db")
+        if not os.path.exists(source):
+            with appmod.create_app(dict(settings, DB_PATH=source), init=True).app_context():
+                datagen.generate(appmod.get_db(), shifts, users, signups)
+            appmod.close_pools()
+        # a consistent copy of the file, WAL included
+        run_db = os.path.join(tmp, "run.db")
+        with sqlite3.connect(source) as src, sqlite3.connect(run_db) as dst:
+            src.backup(dst)
+        app = appmod.create_app(dict(settings, DB_PATH=run_db, OUTBOX_FILE=os.path.join(tmp, "outbox.jsonl")), init=True)
+        appmod.home_cache.clear()
+        with app.app_context():
+            counts = data_counts(appmod.get_db())
+        print(", ".join(f"{n} {t}" for t, n in counts.items()))
+
+        results = run(app, args.requests, args.only.split(",") if args.only else None)
+        appmod.close_pools()
+
+    current = {
+        "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "sqlite": sqlite3.sqlite_version, "cpus": os.cpu_count()},
+        "scale": args.scale, "data": counts, "requests": args.requests,
+        "scenarios": results,
+    }
+    if args.save:
+        pathlib.Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        pathlib.Path(args.save).write_text(json.dumps(current, indent=2) + "\n")
+        print(f"saved {args.save}")
+    if args.compare:
+        baseline = json.loads(pathlib.Path(args.compare).read_text())
+        if baseline["data"] != counts:
+            sys.exit(f"{args.compare} was run on different data ({baseline['data']}); not comparable")
+        rows = compare(baseline, current, args.threshold, args.metric, args.min_delta_ms)
+        print(f"\n{'scenario':>20} {'before':>9} {'after':>9}  ({args.metric})")
+        for name, b, a, ratio, regressed in rows:
+            print(f"{name:>20} {b:9.2f} {a:9.2f}  {ratio - 1:+6.0%}" + ("  REGRESSED" if regressed else ""))
+        if any(r[4] for r in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""gunicorn settings and hooks for the app.
+
+    flask --app app serve --workers 4 --threads 8 --host 0.0.0.0 --port 8000
+    gunicorn -c gunicorn_conf.py "app:create_app()"     # the same, from gunicorn's command line
+
+Needs gunicorn (requirements-production.txt). Sizes come from the SERVER_*
+settings; `flask serve`'s options and gunicorn's command line go over them.
+Each worker serves requests on a fixed pool of `threads` threads (gthread), so
+under load requests wait in the kernel's queue rather than starting more
+threads. The app is loaded, and migrated, once in the master before it forks.
+
+The hooks give every worker a fixed slot, reused by its replacement, because
+live.Bus has one inbox per slot. post_fork runs app.start_worker() in the new
+worker: slot 0 also runs the background jobs, and live seat-count streams are
+handed to the Hub (live.GunicornHandoff) so they hold no request thread.
+worker_exit runs what start_worker returned. On SIGTERM a worker stops
+accepting, finishes the requests it has for up to graceful_timeout, closes its
+live streams (browsers reconnect to a worker that's still up) and exits.
+"""
+import os, time
+from gunicorn.app.base import Application
+import app as appmod
+import live
+
+_started = time.perf_counter()
+_cfg = appmod.default_config()
+
+bind = ["127.0.0.1:8000"]
+worker_class = "gthread"
+workers = _cfg["SERVER_WORKERS"]
+threads = _cfg["SERVER_THREADS"]
+timeout = _cfg["SERVER_TIMEOUT"]
+graceful_timeout = _cfg["SERVER_GRACEFUL_TIMEOUT"]
+preload_app = True
+wsgi_app = "app:create_app()"
+
+
+def on_starting(server):
+    # nothing pooled may cross the fork: each worker opens its own
+    appmod.close_hashers()
+    appmod.close_pools()
+    appmod.live_bus.open(server.num_workers)
+
+
+def when_ready(server):
+    host, port = server.LISTENERS[0].sock.getsockname()[:2]
+    print(f"serving on http://{host}:{port} with {server.num_workers} worker(s) x {server.cfg.threads} thread(s),"
+          f" ready in {(time.perf_counter() - _started) * 1000:.0f} ms", flush=True)
+
+
+def pre_fork(server, worker):
+    taken = {w.slot for w in server.WORKERS.values()}
+    worker.slot = min(set(range(len(taken) + 1)) - taken)
+
+
+def post_fork(server, worker):
+    app = server.app.wsgi()
+    if "PASSWORD_HASH_WORKERS" not in os.environ:
+        # each worker has its own hashing processes: share the cores out rather than multiply them
+        app.config["PASSWORD_HASH_WORKERS"] = max(1, (os.cpu_count() or 1) // server.num_workers)
+    app.wsgi_app = live.GunicornHandoff(app.wsgi_app)
+    worker.shutdown = appmod.start_worker(app, worker.slot)
+
+
+def worker_exit(server, worker):
+    shutdown = getattr(worker, "shutdown", None)
+    if shutdown:
+        shutdown()
+
+
+class Server(Application):
+    """gunicorn with this module's settings and `options` over them, serving `app`."""
+
+    def __init__(self, app, options):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        self.load_config_from_module_name_or_filename("python:gunicorn_conf")
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
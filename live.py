@@ -0,0 +1,442 @@
+"""Live seat counts pushed to browsers as server-sent events.
+
+The home page opens an EventSource for the shifts it shows. Writes that change
+a shift's seats (signups, cancels, the waitlist, admin edits) publish the new
+counts to the Hub once they have committed. The Hub holds them for a short
+window so a burst on one popular shift goes out as one event with the latest
+numbers, then fans each event out to every subscriber watching those shifts.
+Subscribers watching the same page share one encoded event.
+
+Idle streams cost no threads. With RequestHandler (werkzeug's dev server
+handler, extended) or GunicornHandoff (middleware for gunicorn's workers) the
+request thread writes the response headers and then hands the socket over to
+the Hub, which owns all of them from one selector thread: it writes events and
+heartbeats with non-blocking sends and drops a client whose buffer backs up or
+whose socket closes (EventSource reconnects and gets a fresh snapshot). Under
+any other WSGI server the same endpoint falls back to a streaming response,
+which keeps its worker thread for as long as the client stays. With several
+server processes a Bus passes changed keys between them, so each process's Hub
+hears every write.
+
+Counts are read from the database under the Hub's lock, both when publishing
+and for a new subscriber's snapshot, so a subscriber never gets counts older
+than ones it has already seen.
+"""
+import json, logging, os, selectors, socket, ssl, threading, time
+from collections import deque
+from werkzeug.serving import WSGIRequestHandler
+
+log = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+
+class Full(Exception):
+    """The Hub has max_subscribers streams open; the caller should answer 503."""
+
+
+class Subscriber:
+    __slots__ = ("keys", "since", "out", "sock", "cond", "closed")
+
+    def __init__(self, keys, since, streamed):
+        self.keys = keys  # frozenset of keys to hear about, or None for all
+        self.since = since  # changes read at or before this seq are already in the snapshot
+        self.out = bytearray()
+        self.sock = None
+        self.cond = threading.Condition() if streamed else None
+        self.closed = False
+
+
+def encode(event, data, retry=None):
+    head = f"retry: {retry}\n" if retry else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Hub:
+    def __init__(self, event="seats", coalesce=0.25, heartbeat=15.0, max_subscribers=10000,
+                 max_buffer=64 * 1024, retry_ms=3000):
+        self.event = event
+        self.coalesce = coalesce
+        self.heartbeat = heartbeat
+        self.max_subscribers = max_subscribers
+        self.max_buffer = max_buffer
+        self.retry_ms = retry_ms
+        self.lock = threading.Lock()
+        self._subs = set()
+        self._pending = {}  # key -> (seq, value) waiting for the next flush
+        self._seq = 0
+        self._attach = deque()
+        self._thread = None
+        self._stop = threading.Event()
+        self._selector = self._wake_r = self._wake_w = None
+        self.events = self.sent = self.dropped = 0
+
+    # ---- publishing (any thread) ----
+    def publish(self, read):
+        """Queue read()'s {key: value} for the next flush.
+
+        read() runs under the Hub's lock, and not at all while nobody is
+        subscribed: a later subscriber reads its own snapshot.
+        """
+        with self.lock:
+            if not self._subs:
+                return
+            changes = read()
+            if not changes:
+                return
+            self._seq += 1
+            first = not self._pending
+            for key, value in changes.items():
+                self._pending[key] = (self._seq, value)
+        if first:
+            self._wake()
+
+    def subscribe(self, keys, read, streamed=False):
+        """A Subscriber to `keys` (None = all) whose first event is read()'s {key: value}.
+
+        streamed=True is for stream(); otherwise hand the connection over with
+        attach() once the response headers are out. Raises Full.
+        """
+        self.start()
+        with self.lock:
+            if len(self._subs) >= self.max_subscribers:
+                raise Full(f"{self.max_subscribers} live streams already open")
+            sub = Subscriber(frozenset(keys) if keys is not None else None, self._seq, streamed)
+            sub.out += encode(self.event, read() if keys else {}, self.retry_ms)
+            self._subs.add(sub)
+        return sub
+
+    def attach(self, sub, sock):
+        """Give the Hub a subscriber's connection; it writes everything from here on."""
+        self._attach.append((sub, sock))
+        self._wake()
+
+    def stream(self, sub):
+        """The subscriber's events as a WSGI body, for servers that can't hand sockets over."""
+        try:
+            while True:
+                with sub.cond:
+                    while not sub.out and not sub.closed:
+                        sub.cond.wait()
+                    if sub.closed:
+                        return
+                    data, sub.out = bytes(sub.out), bytearray()
+                yield data
+        finally:
+            self.leave(sub)
+
+    def leave(self, sub):
+        with self.lock:
+            self._subs.discard(sub)
+        if sub.cond is not None:
+            with sub.cond:
+                sub.closed = True
+                sub.cond.notify()
+
+    def stats(self):
+        return {"subscribers": len(self._subs), "events": self.events, "sent": self.sent, "dropped": self.dropped}
+
+    # ---- the selector thread ----
+    def start(self):
+        if self._thread is not None:
+            return
+        with self.lock:
+            if self._thread is not None:
+                return
+            _raise_fd_limit()
+            self._stop.clear()
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ)
+            self._thread = threading.Thread(target=self._run, name="live-hub", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Close every stream and stop the selector thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake()
+        thread.join(timeout)
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (AttributeError, BlockingIOError, OSError):
+            pass  # not started, or a wake-up is already pending
+
+    def _run(self):
+        flush_at = None
+        beat_at = time.monotonic() + self.heartbeat
+        while not self._stop.is_set():
+            now = time.monotonic()
+            deadline = min(beat_at, flush_at) if flush_at else beat_at
+            for key, mask in self._selector.select(max(0.0, deadline - now)):
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                sub = key.data
+                if mask & selectors.EVENT_READ:
+                    self._read(sub)
+                if mask & selectors.EVENT_WRITE and not sub.closed:
+                    self._write(sub)
+            while self._attach:
+                self._adopt(*self._attach.popleft())
+            now = time.monotonic()
+            if self._pending and flush_at is None:
+                flush_at = now + self.coalesce
+            if flush_at and now >= flush_at:
+                flush_at = None
+                self._flush()
+            if now >= beat_at:
+                beat_at = now + self.heartbeat
+                for sub in self._snapshot():
+                    self._send(sub, b": ping\n\n")
+        for sub in self._snapshot():
+            self._drop(sub)
+        while self._attach:
+            self._attach.popleft()[1].close()
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+        self._thread = None
+
+    def _snapshot(self):
+        with self.lock:
+            return list(self._subs)
+
+    def _flush(self):
+        with self.lock:
+            pending, self._pending = self._pending, {}
+            subs = list(self._subs)
+        if not pending:
+            return
+        self.events += 1
+        oldest = min(seq for seq, _ in pending.values())
+        shared = {}
+        for sub in subs:
+            if sub.since >= oldest:
+                # joined mid-window: skip what its snapshot already has (or newer)
+                data = self._encode({k: v for k, (seq, v) in pending.items()
+                                     if seq > sub.since and (sub.keys is None or k in sub.keys)})
+            elif sub.keys in shared:
+                data = shared[sub.keys]
+            else:
+                keys = pending.keys() if sub.keys is None else sub.keys & pending.keys()
+                data = shared[sub.keys] = self._encode({k: pending[k][1] for k in keys})
+            if data:
+                self._send(sub, data)
+
+    def _encode(self, changes):
+        return encode(self.event, changes) if changes else None
+
+    def _send(self, sub, data):
+        if sub.cond is not None:
+            with sub.cond:
+                sub.out += data
+                sub.cond.notify()
+            self.sent += 1
+            return
+        sub.out += data
+        self.sent += 1
+        if sub.sock is not None:
+            self._write(sub)
+
+    def _adopt(self, sub, sock):
+        if sub.closed or sub not in self._subs:
+            sock.close()
+            return
+        sock.setblocking(False)
+        sub.sock = sock
+        self._selector.register(sock, selectors.EVENT_READ, sub)
+        self._write(sub)
+
+    def _write(self, sub):
+        try:
+            n = sub.sock.send(sub.out)
+        except (BlockingIOError, InterruptedError):
+            n = 0
+        except OSError:
+            self._drop(sub)
+            return
+        del sub.out[:n]
+        if len(sub.out) > self.max_buffer:
+            self._drop(sub)  # a stalled client; it reconnects and starts from a snapshot
+            return
+        self._selector.modify(sub.sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if sub.out else 0), sub)
+
+    def _read(self, sub):
+        try:
+            if sub.sock.recv(4096):
+                return  # clients don't send anything after the request; ignore it
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            pass
+        self._drop(sub)
+
+    def _drop(self, sub):
+        if sub.closed:
+            return
+        self.leave(sub)
+        sub.closed = True
+        self.dropped += 1
+        if sub.sock is not None:
+            try:
+                self._selector.unregister(sub.sock)
+            except (KeyError, ValueError):
+                pass
+            sub.sock.close()
+
+
+class Bus:
+    """Tells sibling server processes which keys changed, so their Hubs can publish them too.
+
+    open(n) makes one datagram socketpair per worker before they fork, so every
+    worker inherits every inbox (a restarted worker gets its old one). Only keys
+    travel; each worker reads the current values itself, under its Hub's lock.
+    Until join() (a single process) send() does nothing.
+    """
+
+    def __init__(self):
+        self._pairs = []
+        self.index = None
+
+    def open(self, workers):
+        if workers > 1:
+            self._pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM) for _ in range(workers)]
+            for w, _ in self._pairs:
+                w.setblocking(False)
+
+    def join(self, index, on_keys):
+        """Start listening as worker `index`; on_keys(keys) runs on the Bus thread."""
+        if index >= len(self._pairs):
+            return
+        self.index = index
+        inbox = self._pairs[index][1]
+
+        def listen():
+            while True:
+                try:
+                    keys = json.loads(inbox.recv(65536))
+                    on_keys(keys)
+                except Exception:
+                    log.exception("live bus message failed")
+
+        threading.Thread(target=listen, name="live-bus", daemon=True).start()
+
+    def send(self, keys):
+        if self.index is None:
+            return
+        data = json.dumps(sorted(keys)).encode()
+        for i, (w, _) in enumerate(self._pairs):
+            if i != self.index:
+                try:
+                    w.send(data)
+                except OSError:
+                    pass  # that worker is behind or gone; its streams resync on reconnect
+
+
+def _raise_fd_limit():
+    # every idle stream is an open socket; the default soft limit (often 1024) is the first wall
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and (hard == resource.RLIM_INFINITY or soft < hard):
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+        except (ValueError, OSError) as e:
+            log.warning("could not raise the open file limit: %s", e)
+
+
+class RequestHandler(WSGIRequestHandler):
+    """werkzeug's request handler, able to hand an event stream's socket to a Hub.
+
+    A view calls environ["live.handoff"](hub, sub) and returns a response with
+    the stream's headers and an empty body. Once werkzeug has written it, the
+    socket is detached from the handler (so the server's close is a no-op) and
+    attached to the Hub, and the request thread is free again.
+    """
+
+    def make_environ(self):
+        environ = super().make_environ()
+        environ["live.handoff"] = self._handoff
+        return environ
+
+    def _handoff(self, hub, sub):
+        self._live = (hub, sub)
+        # HTTP/1.0 framing: the Hub writes raw event bytes, not chunks
+        self.protocol_version = "HTTP/1.0"
+
+    def run_wsgi(self):
+        self._live = None
+        super().run_wsgi()
+        if self._live is None:
+            return
+        hub, sub = self._live
+        self.close_connection = True
+        try:
+            self.wfile.flush()
+            sock = socket.socket(fileno=self.connection.detach())
+        except OSError:
+            hub.leave(sub)
+            return
+        hub.attach(sub, sock)
+
+
+class GunicornHandoff:
+    """WSGI middleware giving gunicorn's workers the handoff RequestHandler gives the dev server.
+
+    A view calls environ["live.handoff"](hub, sub) and returns the stream's
+    headers with an empty body, as under RequestHandler. The middleware has
+    gunicorn write the headers for a response that ends when the connection
+    closes (no chunked framing: the Hub writes raw event bytes), then moves the
+    connection to a new descriptor for the Hub, and the request thread is free
+    again. TLS and HTTP/2 connections keep the streaming fallback.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        sock = environ.get("gunicorn.socket")
+        if sock is None or isinstance(sock, ssl.SSLSocket) or environ.get("SERVER_PROTOCOL") not in ("HTTP/1.0", "HTTP/1.1"):
+            return self.wsgi_app(environ, start_response)
+        live, writers = [], []
+        environ["live.handoff"] = lambda hub, sub: live.append((hub, sub))
+
+        def capture(status, headers, exc_info=None):
+            writers.append(start_response(status, headers, exc_info))
+            return writers[-1]
+
+        body = self.wsgi_app(environ, capture)
+        if not live:
+            return body
+        hub, sub = live[0]
+        if hasattr(body, "close"):
+            body.close()
+        resp = writers[-1].__self__  # start_response hands back gunicorn's Response.write
+        resp.chunked = False
+        resp.force_close()
+        try:
+            resp.send_headers()
+            conn = socket.socket(fileno=os.dup(sock.fileno()))
+            # gunicorn half-closes its socket when the request is done, which would end the
+            # stream for the Hub's copy too: leave it an unconnected one to close instead
+            with socket.socket(sock.family, socket.SOCK_STREAM) as spare:
+                os.dup2(spare.fileno(), sock.fileno())
+        except OSError:
+            hub.leave(sub)
+            return []
+        hub.attach(sub, conn)
+        return []
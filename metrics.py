@@ -0,0 +1,204 @@
+"""In-process request and SQL metrics, rendered in the Prometheus text format.
+
+Cheap enough to leave on: a request costs two clock reads and a few dict
+updates, a statement one more pair of clock reads. Each process keeps its own
+numbers (Prometheus adds them up across workers).
+
+ProfiledConnection wraps a database connection for one request and times every
+statement into a QueryProfile, so the request hooks in app.py can report how
+many statements a request ran, how long they took, and which one ran over and
+over (the N+1 pattern). A statement is timed until its first row is ready;
+rows fetched after that aren't counted.
+"""
+import threading, time
+from bisect import bisect_left
+
+# seconds; Prometheus convention, with finer steps where our requests live
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# statements per request
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, n=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + n
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, v in items:
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(v)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._le = [_number(b) for b in self.buckets] + ["+Inf"]
+        self._series = {}  # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def count(self, *labels):
+        s = self._series.get(labels)
+        return s[2] if s else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        names = self.labels + ("le",)
+        for labels, (counts, total, n) in items:
+            running = 0
+            for le, c in zip(self._le, counts):
+                running += c
+                yield f"{self.name}_bucket{_labels(names, (*labels, le))} {running}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {n}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS, labels=()):
+        return self._add(Histogram(name, help, buckets, labels))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """Register fn() -> [(name, help, {label tuple: value}, label names)], read at scrape time as gauges."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for m in self.metrics:
+            lines += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}", *m.samples()]
+        for fn in self._collectors:
+            for name, help, values, label_names in fn():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+                lines += [f"{name}{_labels(label_names, k)} {_number(v)}" for k, v in sorted(values.items())]
+        return "\n".join(lines) + "\n"
+
+
+# ---------- SQL profiling ----------
+class QueryProfile:
+    """The statements one request ran: how many, for how long, and how often each."""
+
+    __slots__ = ("count", "seconds", "by_sql")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.by_sql = {}
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.by_sql[sql] = self.by_sql.get(sql, 0) + 1
+
+    def repeated(self, threshold):
+        """{sql: times run} for statements run at least `threshold` times."""
+        return {sql: n for sql, n in self.by_sql.items() if n >= threshold}
+
+
+class ProfiledConnection:
+    """A connection whose execute / executemany (and its cursors') are timed into a QueryProfile.
+
+    on_slow(conn, sql, params, seconds) is called after any statement that took
+    at least slow_s, with the unwrapped connection. Everything else passes through.
+    """
+
+    def __init__(self, conn, profile, slow_s=None, on_slow=None):
+        self._conn = conn
+        self._profile = profile
+        self._slow_s = slow_s
+        self._on_slow = on_slow
+
+    def _timed(self, fn, sql, params):
+        t0 = time.perf_counter()
+        try:
+            return fn(sql, params)
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._profile.record(sql, elapsed)
+            if self._on_slow is not None and self._slow_s is not None and elapsed >= self._slow_s:
+                self._on_slow(self._conn, sql, params, elapsed)
+
+    def execute(self, sql, params=()):
+        return self._timed(self._conn.execute, sql, params)
+
+    def executemany(self, sql, seq):
+        return self._timed(self._conn.executemany, sql, seq)
+
+    def cursor(self):
+        return _ProfiledCursor(self._conn.cursor(), self)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _ProfiledCursor:
+    __slots__ = ("_cur", "_owner")
+
+    def __init__(self, cur, owner):
+        object.__setattr__(self, "_cur", cur)
+        object.__setattr__(self, "_owner", owner)
+
+    def execute(self, sql, params=()):
+        self._owner._timed(self._cur.execute, sql, params)
+        return self
+
+    def executemany(self, sql, seq):
+        self._owner._timed(self._cur.executemany, sql, seq)
+        return self
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cur, name, value)  # e.g. row_factory
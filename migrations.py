@@ -0,0 +1,186 @@
+"""Versioned schema migrations, recorded in a schema_version table.
+
+Each migration has a version number and runs once per database, in order; the
+row it leaves in schema_version says when it ran and how long it took. init_db()
+applies whatever is pending on start, and `flask migrate` does the same ahead of
+a deploy (or lists what has run).
+
+Most migrations run in one write transaction, recorded in the same commit. One
+declared with transactional=False manages its own commits instead, so it can
+change a large table without holding the write lock throughout: build indexes
+with create_index() and rewrite rows with backfill(), a batch per transaction.
+It must then be safe to re-run after being interrupted part way.
+
+To add one, append a function decorated with @migration(next_version, "what it
+does"). It gets (db, backend) and writes SQL both backends accept, or asks the
+backend for what differs.
+"""
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+Migration = namedtuple("Migration", "version name up transactional")
+# one applied migration, as listed by `flask migrate --list`
+Applied = namedtuple("Applied", "version name applied_at duration_ms")
+
+MIGRATIONS = []
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+  version INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  applied_at TEXT NOT NULL,
+  duration_ms INTEGER NOT NULL
+)
+"""
+
+
+def migration(version, name, transactional=True):
+    def register(fn):
+        assert not MIGRATIONS or version == MIGRATIONS[-1].version + 1, "migration versions must be consecutive"
+        MIGRATIONS.append(Migration(version, name, fn, transactional))
+        return fn
+    return register
+
+
+def applied(db):
+    """The migrations this database has run, oldest first."""
+    db.execute(SCHEMA_VERSION_TABLE)
+    db.commit()
+    return [Applied(*r) for r in db.execute(
+        "SELECT version, name, applied_at, duration_ms FROM schema_version ORDER BY version")]
+
+
+def pending(db, target=None):
+    done = {a.version for a in applied(db)}
+    return [m for m in MIGRATIONS if m.version not in done and (target is None or m.version <= target)]
+
+
+def migrate(db, backend, target=None, report=None):
+    """Run pending migrations up to `target` (default: all). Returns the Applied rows.
+
+    `report`, if given, is called with each Applied as it finishes. Hosts starting
+    together on a shared database wait on the backend's schema lock, and then
+    find nothing left to do.
+    """
+    done = []
+    with backend.schema_lock(db):
+        for m in pending(db, target):
+            t0 = time.perf_counter()
+            if m.transactional:
+                backend.begin_write(db)
+            try:
+                m.up(db, backend)
+                if not m.transactional:
+                    db.commit()
+                    backend.begin_write(db)
+                result = Applied(
+                    m.version, m.name,
+                    datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+                    round((time.perf_counter() - t0) * 1000),
+                )
+                db.execute(
+                    "INSERT INTO schema_version(version, name, applied_at, duration_ms) VALUES (?,?,?,?)", result
+                )
+            except BaseException:
+                db.rollback()
+                raise
+            db.commit()
+            done.append(result)
+            if report:
+                report(result)
+    return done
+
+
+# ---------- online helpers ----------
+def backfill(db, table, assignments, where="1=1", batch_size=1000):
+    """UPDATE table SET <assignments> WHERE <where>, batch_size rows per transaction.
+
+    Walks the table in id order, so each batch is a short write and other
+    writers get in between. Returns the number of rows updated.
+    """
+    last, total = 0, 0
+    while True:
+        ids = [r[0] for r in db.execute(
+            f"SELECT id FROM {table} WHERE id > ? AND ({where}) ORDER BY id LIMIT ?", (last, batch_size))]
+        if not ids:
+            return total
+        total += db.execute(
+            f"UPDATE {table} SET {assignments} WHERE id BETWEEN ? AND ? AND ({where})", (ids[0], ids[-1])
+        ).rowcount
+        db.commit()
+        last = ids[-1]
+
+
+# ---------- migrations ----------
+@migration(1, "baseline schema", transactional=False)
+def _baseline(db, backend):
+    """Everything init_db() created on every start before migrations existed.
+
+    Also brings a database from before then up to date: columns it lacks are
+    added, and they and any shift times in other ISO forms (no seconds, a space
+    separator) are filled in batches.
+    """
+    added = backend.baseline(db)
+    if "shift.times" in added:
+        # before the signup times below are copied from them
+        for col in ("starts_at", "ends_at"):
+            iso = backend.iso_time(col)
+            backfill(db, "shift", f"{col} = {iso}", where=f"{col} != {iso}")
+    if "shift.taken" in added:
+        backfill(db, "shift",
+                 "taken = (SELECT COUNT(*) FROM signup WHERE shift_id = shift.id),"
+                 " wait_ct = (SELECT COUNT(*) FROM waitlist WHERE shift_id = shift.id)")
+    if "signup.starts_at" in added:
+        backfill(db, "signup",
+                 "starts_at = (SELECT starts_at FROM shift WHERE id = signup.shift_id),"
+                 " ends_at = (SELECT ends_at FROM shift WHERE id = signup.shift_id)",
+                 where="starts_at IS NULL")
+
+
+@migration(2, "index shifts with waiters", transactional=False)
+def _shift_waiting_index(db, backend):
+    # the promote-waitlists sweep looks only at shifts with someone waiting,
+    # which this partial index lists without scanning the whole table
+    backend.create_index(db, "idx_shift_waiting", "shift", "id", where="wait_ct > 0")
+
+
+@migration(3, "analytics rollups", transactional=False)
+def _rollups(db, backend):
+    # triggers first, so nothing written while the rebuild runs is missed
+    backend.rollup_schema(db)
+    rebuild_rollups(db, backend, shifts="shift", signups="signup")  # no archive yet
+
+
+def rebuild_rollups(db, backend, shifts="shift_all", signups="signup_all"):
+    """Recompute shift_rollup and volunteer_rollup (archived shifts included) in one transaction.
+
+    The triggers keep them current; this is for the first fill and for
+    `flask rebuild-rollups` after counters were repaired by hand.
+    """
+    minutes = backend.minutes("starts_at", "ends_at")
+    backend.begin_write(db)
+    try:
+        db.execute("DELETE FROM shift_rollup")
+        db.execute(f"""
+            INSERT INTO shift_rollup(day, location, shifts, capacity, taken, wait_ct, full_shifts, minutes)
+            SELECT substr(starts_at, 1, 10), COALESCE(location, ''), COUNT(*), SUM(capacity), SUM(taken),
+                   SUM(wait_ct), SUM(CASE WHEN taken >= capacity THEN 1 ELSE 0 END), SUM(taken * {minutes})
+            FROM {shifts} GROUP BY substr(starts_at, 1, 10), COALESCE(location, '')
+        """)
+        db.execute("DELETE FROM volunteer_rollup")
+        db.execute(f"""
+            INSERT INTO volunteer_rollup(user_id, month, shifts, minutes)
+            SELECT user_id, substr(starts_at, 1, 7), COUNT(*), SUM({minutes})
+            FROM {signups} WHERE starts_at IS NOT NULL GROUP BY user_id, substr(starts_at, 1, 7)
+        """)
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+
+
+@migration(4, "shift archive", transactional=False)
+def _archive(db, backend):
+    # empty until the archive job runs, so the rollups need no rebuild
+    backend.archive_schema(db)
@@ -0,0 +1,168 @@
+"""Delivery side of the notification outbox: transports, a worker pool and stats.
+
+Messages are written to the outbox table in the same transaction as the change
+they describe; the workers here drain it in batches afterwards, so a request
+never waits on mail delivery.
+"""
+import json, logging, smtplib, threading, time
+from email.message import EmailMessage
+
+log = logging.getLogger(__name__)
+
+
+class Transport:
+    """Delivers messages (objects with recipient, subject and body)."""
+
+    def send(self, message):
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        """Send each message; returns one error string (or None) per message."""
+        errors = []
+        for m in messages:
+            try:
+                self.send(m)
+                errors.append(None)
+            except Exception as e:  # recorded on the row and retried later
+                errors.append(f"{type(e).__name__}: {e}")
+        return errors
+
+
+class FileTransport(Transport):
+    """Appends messages to a JSON-lines file: a mailbox for development and tests."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        self.send_batch([message])
+
+    def send_batch(self, messages):
+        lines = "".join(
+            json.dumps({"to": m.recipient, "subject": m.subject, "body": m.body}) + "\n" for m in messages
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return [None] * len(messages)
+
+
+class SMTPTransport(Transport):
+    """Sends through an SMTP server, one connection per batch.
+
+    For local debugging point it at a throwaway server, e.g.
+    ``python -m aiosmtpd -n -l localhost:8025``.
+    """
+
+    def __init__(self, host, port=25, sender="shifts@localhost", username=None, password=None,
+                 starttls=False, timeout=10):
+        self.host, self.port, self.sender = host, port, sender
+        self.username, self.password = username, password
+        self.starttls, self.timeout = starttls, timeout
+        self._smtp = None
+
+    def _message(self, m):
+        msg = EmailMessage()
+        msg["From"], msg["To"], msg["Subject"] = self.sender, m.recipient, m.subject
+        msg.set_content(m.body)
+        return msg
+
+    def send(self, message):
+        self._smtp.send_message(self._message(message))
+
+    def send_batch(self, messages):
+        try:
+            self._smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                self._smtp.starttls()
+            if self.username:
+                self._smtp.login(self.username, self.password)
+        except (OSError, smtplib.SMTPException) as e:
+            self._smtp = None
+            return [f"{type(e).__name__}: {e}"] * len(messages)
+        try:
+            return super().send_batch(messages)
+        finally:
+            try:
+                self._smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                pass
+            self._smtp = None
+
+
+class DeliveryStats:
+    """Counters for delivered / retried / failed messages and delivery latency."""
+
+    BUCKETS = (1, 5, 30, 60, 300, 900, 3600)  # seconds from enqueue to delivery
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = self.retried = self.failed = self.batches = 0
+        self.latency_sum = self.latency_max = 0.0
+        self.latency_buckets = [0] * (len(self.BUCKETS) + 1)
+
+    def record(self, sent_latencies, retried, failed):
+        with self._lock:
+            self.batches += 1
+            self.retried += retried
+            self.failed += failed
+            for s in sent_latencies:
+                self.sent += 1
+                self.latency_sum += s
+                self.latency_max = max(self.latency_max, s)
+                self.latency_buckets[next((i for i, b in enumerate(self.BUCKETS) if s <= b), len(self.BUCKETS))] += 1
+
+    def snapshot(self):
+        with self._lock:
+            buckets = dict(zip([f"le_{b}s" for b in self.BUCKETS] + ["inf"], self.latency_buckets))
+            return {
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "batches": self.batches,
+                "latency_avg_s": round(self.latency_sum / self.sent, 3) if self.sent else None,
+                "latency_max_s": round(self.latency_max, 3),
+                "latency_buckets": buckets,
+            }
+
+
+class WorkerPool:
+    """Threads that call drain() until it reports an empty queue, then poll.
+
+    drain() handles one batch and returns how many messages it took; exceptions
+    are logged and the worker backs off for a poll interval. Other periodic
+    batch jobs (the shift archive) run on it too, under their own `name`.
+    """
+
+    def __init__(self, drain, workers=2, poll_interval=2.0, name="outbox"):
+        self.drain = drain
+        self.name = name
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                taken = self.drain()
+            except Exception:
+                log.exception("%s drain failed", self.name)
+                taken = 0
+            if not taken:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout=10):
+        """Let in-flight batches finish, then stop."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0, deadline - time.monotonic()))
+        self._threads = [t for t in self._threads if t.is_alive()]
@@ -0,0 +1,75 @@
+"""Password hashing off the request threads, in a bounded process pool.
+
+PBKDF2 is meant to be slow: one hash pins a core for a good fraction of a
+second. Hashing on the request thread means a burst of logins (everyone signing
+in as an event opens) ties up every worker and nothing else gets served. The
+Hasher sends the work to a few processes instead, and refuses more than
+`max_pending` hashes at once by raising Busy straight away, which the app turns
+into a 503 with Retry-After rather than letting the queue grow without bound.
+
+Hashes are werkzeug's "pbkdf2:sha256:<iterations>$salt$hash", so each carries
+the work factor it was made with. needs_rehash() tells a login to store a fresh
+hash when the configured iterations (or the method) have changed since.
+"""
+import multiprocessing, threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class Busy(Exception):
+    """Too many hashes queued; the caller should answer 503 and have the client retry."""
+
+
+class Hasher:
+    def __init__(self, iterations, workers=1, max_pending=32, timeout=30):
+        """workers=0 hashes inline on the calling thread (CLI commands, tests)."""
+        self.method = f"pbkdf2:sha256:{iterations}"
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pending = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        return self._call(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        return self._call(check_password_hash, stored, password)
+
+    def needs_rehash(self, stored):
+        return stored.split("$", 1)[0] != self.method
+
+    def pending(self):
+        """Hashes queued or running right now."""
+        return self._pending
+
+    def _call(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise Busy(f"{self.max_pending} password hashes already pending")
+            self._pending += 1
+        try:
+            if not self.workers:
+                return fn(*args)
+            try:
+                return self._executor().submit(fn, *args).result(timeout=self.timeout)
+            except TimeoutError:
+                raise Busy(f"password hash took over {self.timeout} s") from None
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _executor(self):
+        # started on first use, so each forked server worker gets its own pool
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs request threads can copy a held lock
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,106 @@
+"""Thread-safe pool of SQLite connections, configured once when opened."""
+import queue, sqlite3, threading
+
+
+class PoolTimeout(RuntimeError):
+    """No connection became free within the pool's wait timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, path, size=8, timeout=10.0, busy_timeout_ms=5000,
+                 cache_size=-16000, mmap_size=256 * 1024 * 1024):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": busy_timeout_ms,
+            "cache_size": cache_size,  # negative = KiB
+            "mmap_size": mmap_size,
+            "foreign_keys": "ON",
+        }
+        self._idle = queue.LifoQueue()  # LIFO keeps the warmest connections in use
+        self._lock = threading.Lock()
+        self._open = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.pragmas["busy_timeout"] / 1000,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def acquire(self):
+        """Check out a connection, opening one if the pool is below size, else waiting."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is None:
+            with self._lock:
+                grow = self._open < self.size
+                if grow:
+                    self._open += 1
+                else:
+                    self._waits += 1
+            if grow:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout(f"no free connection to {self.path} after {self.timeout}s")
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection; anything left uncommitted is rolled back."""
+        with self._lock:
+            self._in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # unusable (e.g. closed by the caller) -- drop it and let the pool reopen
+            with self._lock:
+                self._open -= 1
+            return
+        self._idle.put(conn)
+
+    def close(self):
+        """Close idle connections. Checked-out ones are closed when released elsewhere."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._open -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": self._open - self._in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+            }
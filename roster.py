@@ -0,0 +1,146 @@
+"""Fill open shift seats from volunteer availability, spreading the work fairly.
+
+The roster is built in rounds. In round k every volunteer can gain at most one
+more shift, and a maximum bipartite b-matching (volunteers on one side, shifts
+with their free seats on the other) decides who gets what. So the number of
+volunteers reaching k shifts is maximised before anyone is given a (k+1)-th:
+coverage is as high as the rounds allow while the load stays level. Within a
+round, volunteers with the least booked time go first, and each volunteer's
+candidates are tried most-preferred first.
+
+Times are plain numbers (e.g. epoch minutes); intervals are half-open, so
+back-to-back shifts don't overlap.
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+
+Shift = namedtuple("Shift", "id start end seats")
+Window = namedtuple("Window", "start end preference")
+
+
+class _Volunteer:
+    __slots__ = ("id", "busy", "used", "candidates")
+
+    def __init__(self, vid, booked):
+        self.id = vid
+        self.used = sum(e - s for s, e in booked)
+        self.candidates = []
+        # merged, so the busy intervals are disjoint and sorted (fits() relies on it)
+        self.busy = []
+        for s, e in sorted(booked):
+            if self.busy and s < self.busy[-1][1]:
+                self.busy[-1] = (self.busy[-1][0], max(e, self.busy[-1][1]))
+            else:
+                self.busy.append((s, e))
+
+    def fits(self, shift, limit):
+        if self.used + shift.end - shift.start > limit:
+            return False
+        i = bisect_left(self.busy, (shift.end,))
+        # only the interval starting just before shift.end can reach into it
+        return i == 0 or self.busy[i - 1][1] <= shift.start
+
+    def take(self, shift):
+        insort(self.busy, (shift.start, shift.end))
+        self.used += shift.end - shift.start
+
+
+def plan(shifts, availability, booked=None, max_time=None):
+    """Assign volunteers to free seats; returns a list of (volunteer id, shift id).
+
+    `shifts` is a sequence of Shift, `availability` maps a volunteer id to their
+    Windows and `booked` maps a volunteer id to (start, end) intervals they're
+    already signed up for, which count towards `max_time` and can't be
+    overlapped. A volunteer is only offered shifts that fit inside one window.
+    """
+    booked = booked or {}
+    limit = float("inf") if max_time is None else max_time
+    by_start = sorted((s for s in shifts if s.seats > 0), key=lambda s: (s.start, s.id))
+    starts = [s.start for s in by_start]
+    seats = {s.id: s.seats for s in by_start}
+
+    volunteers = []
+    for vid, windows in availability.items():
+        v = _Volunteer(vid, booked.get(vid, ()))
+        best = {}
+        for w in windows:
+            for i in range(bisect_left(starts, w.start), bisect_right(starts, w.end)):
+                s = by_start[i]
+                if s.end <= w.end and best.get(s.id, (None, -float("inf")))[1] < w.preference:
+                    best[s.id] = (s, w.preference)
+        v.candidates = [s for s, _ in sorted(best.values(), key=lambda c: (-c[1], c[0].start, c[0].id))]
+        if v.candidates:
+            volunteers.append(v)
+
+    shift_of = {s.id: s for s in by_start}
+    assignments = []
+    while volunteers:
+        options = {}
+        for v in volunteers:
+            v.candidates = [s for s in v.candidates if seats[s.id] > 0 and v.fits(s, limit)]
+            if v.candidates:
+                options[v.id] = [s.id for s in v.candidates]
+        volunteers = [v for v in volunteers if v.candidates]
+        volunteers.sort(key=lambda v: (v.used, len(v.candidates)))
+        matched = _match([v.id for v in volunteers], options, seats)
+        if not matched:
+            break
+        for v in volunteers:
+            sid = matched.get(v.id)
+            if sid is not None:
+                v.take(shift_of[sid])
+                seats[sid] -= 1
+                assignments.append((v.id, sid))
+    return assignments
+
+
+def _match(order, options, seats):
+    """Maximum b-matching: each volunteer gets at most one shift, a shift up to its seats.
+
+    Kuhn-style augmenting paths run in phases: within a phase every shift is
+    explored at most once, and phases repeat until one finds no augmenting path.
+    Returns {volunteer id: shift id}.
+    """
+    assigned = {}
+    holders = {}
+    progress = True
+    while progress:
+        progress = False
+        seen = set()
+        for v in order:
+            if v not in assigned and _augment(v, options, seats, assigned, holders, seen):
+                progress = True
+    return assigned
+
+
+def _augment(root, options, seats, assigned, holders, seen):
+    # frame: [volunteer, iterator over their shifts, full shift being re-routed, its holders]
+    stack = [[root, iter(options[root]), None, None]]
+    while stack:
+        frame = stack[-1]
+        if frame[3] is not None:
+            nxt = next(frame[3], None)
+            if nxt is not None:
+                stack.append([nxt, iter(options[nxt]), None, None])
+                continue
+            frame[2] = frame[3] = None
+        sid = next((s for s in frame[1] if s not in seen), None)
+        if sid is None:
+            stack.pop()
+            continue
+        seen.add(sid)
+        taking = holders.setdefault(sid, [])
+        if len(taking) < seats[sid]:
+            # a free seat: everyone on the path moves one step along it
+            new = sid
+            for v, *_ in reversed(stack):
+                old = assigned.get(v)
+                if old is not None:
+                    holders[old].remove(v)
+                holders[new].append(v)
+                assigned[v] = new
+                new = old
+            return True
+        # full: see whether one of its current holders can move elsewhere
+        frame[2], frame[3] = sid, iter(list(taking))
+    return False
@@ -1,26 +1,342 @@
--- users
-CREATE TABLE IF NOT EXISTS app_user (
+-- Generated from a migrated SQLite database; do not edit. To change the schema,
+-- add a migration to migrations.py, then replace everything below these comments
+-- with the output of:
+--   DB_PATH=/tmp/s.db flask --app app migrate && DB_PATH=/tmp/s.db flask --app app schema-dump
+
+CREATE TABLE api_token (
+  token_hash TEXT PRIMARY KEY,
+  user_id INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  name TEXT,
+  created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+CREATE TABLE app_user (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   email TEXT UNIQUE NOT NULL,
   password_hash TEXT NOT NULL,
   role TEXT NOT NULL CHECK (role IN ('ADMIN','VOLUNTEER'))
 );
 
--- shifts
-CREATE TABLE IF NOT EXISTS shift (
+CREATE TABLE availability (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  preference INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE calendar_feed (
+  user_id INTEGER PRIMARY KEY REFERENCES app_user(id) ON DELETE CASCADE,
+  token TEXT UNIQUE,
+  rev INTEGER NOT NULL DEFAULT 0,
+  changed_at TEXT
+);
+
+CREATE TABLE catalog_version (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  rev INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE outbox (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,
+  recipient TEXT NOT NULL,
+  subject TEXT NOT NULL,
+  body TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','sent','failed')),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
+  next_attempt_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
+  sent_at TEXT,
+  last_error TEXT
+);
+
+CREATE TABLE schema_version (
+  version INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  applied_at TEXT NOT NULL,
+  duration_ms INTEGER NOT NULL
+);
+
+CREATE TABLE shift (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   title TEXT NOT NULL,
   location TEXT,
-  starts_at TEXT NOT NULL,   -- ISO datetime string
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  capacity  INTEGER NOT NULL DEFAULT 1,
+  taken     INTEGER NOT NULL DEFAULT 0,
+  wait_ct   INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE shift_archive (
+  id INTEGER PRIMARY KEY,
+  title TEXT NOT NULL,
+  location TEXT,
+  starts_at TEXT NOT NULL,
   ends_at   TEXT NOT NULL,
-  capacity  INTEGER NOT NULL DEFAULT 1
+  capacity  INTEGER NOT NULL,
+  taken     INTEGER NOT NULL,
+  wait_ct   INTEGER NOT NULL,
+  archived_at TEXT NOT NULL
+);
+
+CREATE VIRTUAL TABLE shift_fts USING fts5(
+  title, location, content='shift', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TABLE shift_rollup (
+  day TEXT NOT NULL,
+  location TEXT NOT NULL,
+  shifts INTEGER NOT NULL DEFAULT 0,
+  capacity INTEGER NOT NULL DEFAULT 0,
+  taken INTEGER NOT NULL DEFAULT 0,
+  wait_ct INTEGER NOT NULL DEFAULT 0,
+  full_shifts INTEGER NOT NULL DEFAULT 0,
+  minutes INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, location)
+) WITHOUT ROWID;
+
+CREATE TABLE signup (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  shift_id INTEGER NOT NULL REFERENCES shift(id) ON DELETE CASCADE,
+  user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  starts_at TEXT,
+  ends_at   TEXT,
+  UNIQUE (shift_id, user_id)
+);
+
+CREATE TABLE signup_archive (
+  id INTEGER PRIMARY KEY,
+  shift_id INTEGER NOT NULL REFERENCES shift_archive(id) ON DELETE CASCADE,
+  user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT,
+  starts_at TEXT,
+  ends_at   TEXT,
+  UNIQUE (shift_id, user_id)
 );
 
--- signups (unique per user per shift) -- used in next step
-CREATE TABLE IF NOT EXISTS signup (
+CREATE TABLE volunteer_rollup (
+  user_id INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  month TEXT NOT NULL,
+  shifts INTEGER NOT NULL DEFAULT 0,
+  minutes INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE waitlist (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   shift_id INTEGER NOT NULL REFERENCES shift(id) ON DELETE CASCADE,
   user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
   created_at TEXT DEFAULT CURRENT_TIMESTAMP,
   UNIQUE (shift_id, user_id)
 );
+
+CREATE INDEX idx_api_token_user ON api_token(user_id);
+
+CREATE INDEX idx_availability_user_starts ON availability(user_id, starts_at);
+
+CREATE INDEX idx_outbox_due ON outbox(next_attempt_at) WHERE status = 'pending';
+
+CREATE INDEX idx_shift_ends_starts ON shift(ends_at, starts_at);
+
+CREATE INDEX idx_shift_starts ON shift(starts_at);
+
+CREATE INDEX idx_shift_waiting ON shift(id) WHERE wait_ct > 0;
+
+CREATE INDEX idx_shift_archive_starts ON shift_archive(starts_at);
+
+CREATE INDEX idx_signup_user_time ON signup(user_id, starts_at, ends_at);
+
+CREATE INDEX idx_signup_archive_user_time ON signup_archive(user_id, starts_at);
+
+CREATE INDEX idx_waitlist_shift_created ON waitlist(shift_id, created_at);
+
+CREATE TRIGGER calendar_shift_upd AFTER UPDATE OF title, location, starts_at, ends_at ON shift BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  SELECT user_id, 1, strftime('%Y-%m-%dT%H:%M:%S','now') FROM signup WHERE shift_id = NEW.id
+  ON CONFLICT(user_id) DO UPDATE SET rev = rev + 1, changed_at = excluded.changed_at;
+END;
+
+CREATE TRIGGER catalog_shift_del AFTER DELETE ON shift BEGIN
+  UPDATE catalog_version SET rev = rev + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER catalog_shift_ins AFTER INSERT ON shift BEGIN
+  UPDATE catalog_version SET rev = rev + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER catalog_shift_upd AFTER UPDATE ON shift BEGIN
+  UPDATE catalog_version SET rev = rev + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER rollup_shift_del AFTER DELETE ON shift BEGIN
+  UPDATE shift_rollup SET
+    shifts = shifts - 1, capacity = capacity - OLD.capacity, taken = taken - OLD.taken,
+    wait_ct = wait_ct - OLD.wait_ct, full_shifts = full_shifts - (OLD.taken >= OLD.capacity),
+    minutes = minutes - OLD.taken * CAST(round((julianday(OLD.ends_at) - julianday(OLD.starts_at)) * 1440) AS INTEGER)
+  WHERE day = substr(OLD.starts_at, 1, 10) AND location = COALESCE(OLD.location, '');
+END;
+
+CREATE TRIGGER rollup_shift_ins AFTER INSERT ON shift BEGIN
+  INSERT INTO shift_rollup(day, location, shifts, capacity, taken, wait_ct, full_shifts, minutes)
+  VALUES (substr(NEW.starts_at, 1, 10), COALESCE(NEW.location, ''), 1, NEW.capacity, NEW.taken, NEW.wait_ct,
+          NEW.taken >= NEW.capacity, NEW.taken * CAST(round((julianday(NEW.ends_at) - julianday(NEW.starts_at)) * 1440) AS INTEGER))
+  ON CONFLICT(day, location) DO UPDATE SET
+    shifts = shifts + 1, capacity = capacity + excluded.capacity, taken = taken + excluded.taken,
+    wait_ct = wait_ct + excluded.wait_ct, full_shifts = full_shifts + excluded.full_shifts,
+    minutes = minutes + excluded.minutes;
+END;
+
+CREATE TRIGGER rollup_shift_move AFTER UPDATE OF location, starts_at ON shift
+WHEN substr(OLD.starts_at, 1, 10) != substr(NEW.starts_at, 1, 10) OR COALESCE(OLD.location, '') != COALESCE(NEW.location, '')
+BEGIN
+  UPDATE shift_rollup SET
+    shifts = shifts - 1, capacity = capacity - OLD.capacity, taken = taken - OLD.taken,
+    wait_ct = wait_ct - OLD.wait_ct, full_shifts = full_shifts - (OLD.taken >= OLD.capacity),
+    minutes = minutes - OLD.taken * CAST(round((julianday(OLD.ends_at) - julianday(OLD.starts_at)) * 1440) AS INTEGER)
+  WHERE day = substr(OLD.starts_at, 1, 10) AND location = COALESCE(OLD.location, '');
+
+  INSERT INTO shift_rollup(day, location, shifts, capacity, taken, wait_ct, full_shifts, minutes)
+  VALUES (substr(NEW.starts_at, 1, 10), COALESCE(NEW.location, ''), 1, NEW.capacity, NEW.taken, NEW.wait_ct,
+          NEW.taken >= NEW.capacity, NEW.taken * CAST(round((julianday(NEW.ends_at) - julianday(NEW.starts_at)) * 1440) AS INTEGER))
+  ON CONFLICT(day, location) DO UPDATE SET
+    shifts = shifts + 1, capacity = capacity + excluded.capacity, taken = taken + excluded.taken,
+    wait_ct = wait_ct + excluded.wait_ct, full_shifts = full_shifts + excluded.full_shifts,
+    minutes = minutes + excluded.minutes;
+END;
+
+CREATE TRIGGER rollup_shift_upd AFTER UPDATE OF location, starts_at, ends_at, capacity, taken, wait_ct ON shift
+WHEN substr(OLD.starts_at, 1, 10) = substr(NEW.starts_at, 1, 10) AND COALESCE(OLD.location, '') = COALESCE(NEW.location, '')
+BEGIN
+  UPDATE shift_rollup SET
+    capacity = capacity + NEW.capacity - OLD.capacity, taken = taken + NEW.taken - OLD.taken,
+    wait_ct = wait_ct + NEW.wait_ct - OLD.wait_ct,
+    full_shifts = full_shifts + (NEW.taken >= NEW.capacity) - (OLD.taken >= OLD.capacity),
+    minutes = minutes + NEW.taken * CAST(round((julianday(NEW.ends_at) - julianday(NEW.starts_at)) * 1440) AS INTEGER) - OLD.taken * CAST(round((julianday(OLD.ends_at) - julianday(OLD.starts_at)) * 1440) AS INTEGER)
+  WHERE day = substr(NEW.starts_at, 1, 10) AND location = COALESCE(NEW.location, '');
+END;
+
+CREATE TRIGGER shift_fts_del AFTER DELETE ON shift BEGIN
+  INSERT INTO shift_fts(shift_fts, rowid, title, location) VALUES ('delete', OLD.id, OLD.title, OLD.location);
+END;
+
+CREATE TRIGGER shift_fts_ins AFTER INSERT ON shift BEGIN
+  INSERT INTO shift_fts(rowid, title, location) VALUES (NEW.id, NEW.title, NEW.location);
+END;
+
+CREATE TRIGGER shift_fts_upd AFTER UPDATE OF title, location ON shift BEGIN
+  INSERT INTO shift_fts(shift_fts, rowid, title, location) VALUES ('delete', OLD.id, OLD.title, OLD.location);
+  INSERT INTO shift_fts(rowid, title, location) VALUES (NEW.id, NEW.title, NEW.location);
+END;
+
+CREATE TRIGGER signup_times_shift_upd AFTER UPDATE OF starts_at, ends_at ON shift BEGIN
+  UPDATE signup SET starts_at = NEW.starts_at, ends_at = NEW.ends_at WHERE shift_id = NEW.id;
+END;
+
+CREATE VIEW shift_all AS
+  SELECT id, title, location, starts_at, ends_at, capacity, taken, wait_ct, 0 AS archived FROM shift
+  UNION ALL
+  SELECT id, title, location, starts_at, ends_at, capacity, taken, wait_ct, 1 AS archived FROM shift_archive;
+
+CREATE TRIGGER rollup_shift_archive_del AFTER DELETE ON shift_archive BEGIN
+  UPDATE shift_rollup SET
+    shifts = shifts - 1, capacity = capacity - OLD.capacity, taken = taken - OLD.taken,
+    wait_ct = wait_ct - OLD.wait_ct, full_shifts = full_shifts - (OLD.taken >= OLD.capacity),
+    minutes = minutes - OLD.taken * CAST(round((julianday(OLD.ends_at) - julianday(OLD.starts_at)) * 1440) AS INTEGER)
+  WHERE day = substr(OLD.starts_at, 1, 10) AND location = COALESCE(OLD.location, '');
+END;
+
+CREATE TRIGGER rollup_shift_archive_ins AFTER INSERT ON shift_archive BEGIN
+  INSERT INTO shift_rollup(day, location, shifts, capacity, taken, wait_ct, full_shifts, minutes)
+  VALUES (substr(NEW.starts_at, 1, 10), COALESCE(NEW.location, ''), 1, NEW.capacity, NEW.taken, NEW.wait_ct,
+          NEW.taken >= NEW.capacity, NEW.taken * CAST(round((julianday(NEW.ends_at) - julianday(NEW.starts_at)) * 1440) AS INTEGER))
+  ON CONFLICT(day, location) DO UPDATE SET
+    shifts = shifts + 1, capacity = capacity + excluded.capacity, taken = taken + excluded.taken,
+    wait_ct = wait_ct + excluded.wait_ct, full_shifts = full_shifts + excluded.full_shifts,
+    minutes = minutes + excluded.minutes;
+END;
+
+CREATE TRIGGER calendar_signup_del AFTER DELETE ON signup BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  VALUES (OLD.user_id, 1, strftime('%Y-%m-%dT%H:%M:%S','now'))
+  ON CONFLICT(user_id) DO UPDATE SET rev = rev + 1, changed_at = excluded.changed_at;
+END;
+
+CREATE TRIGGER calendar_signup_ins AFTER INSERT ON signup BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  VALUES (NEW.user_id, 1, strftime('%Y-%m-%dT%H:%M:%S','now'))
+  ON CONFLICT(user_id) DO UPDATE SET rev = rev + 1, changed_at = excluded.changed_at;
+END;
+
+CREATE TRIGGER rollup_signup_del AFTER DELETE ON signup BEGIN
+  UPDATE volunteer_rollup SET shifts = shifts - 1, minutes = minutes - CAST(round((julianday(OLD.ends_at) - julianday(OLD.starts_at)) * 1440) AS INTEGER)
+  WHERE OLD.starts_at IS NOT NULL AND user_id = OLD.user_id AND month = substr(OLD.starts_at, 1, 7);
+END;
+
+CREATE TRIGGER rollup_signup_ins AFTER INSERT ON signup BEGIN
+  INSERT INTO volunteer_rollup(user_id, month, shifts, minutes)
+  SELECT NEW.user_id, substr(NEW.starts_at, 1, 7), 1, CAST(round((julianday(NEW.ends_at) - julianday(NEW.starts_at)) * 1440) AS INTEGER) WHERE NEW.starts_at IS NOT NULL
+  ON CONFLICT(month, user_id) DO UPDATE SET shifts = shifts + 1, minutes = minutes + excluded.minutes;
+END;
+
+CREATE TRIGGER rollup_signup_upd AFTER UPDATE OF user_id, starts_at, ends_at ON signup
+BEGIN
+  UPDATE volunteer_rollup SET shifts = shifts - 1, minutes = minutes - CAST(round((julianday(OLD.ends_at) - julianday(OLD.starts_at)) * 1440) AS INTEGER)
+  WHERE OLD.starts_at IS NOT NULL AND user_id = OLD.user_id AND month = substr(OLD.starts_at, 1, 7);
+
+  INSERT INTO volunteer_rollup(user_id, month, shifts, minutes)
+  SELECT NEW.user_id, substr(NEW.starts_at, 1, 7), 1, CAST(round((julianday(NEW.ends_at) - julianday(NEW.starts_at)) * 1440) AS INTEGER) WHERE NEW.starts_at IS NOT NULL
+  ON CONFLICT(month, user_id) DO UPDATE SET shifts = shifts + 1, minutes = minutes + excluded.minutes;
+END;
+
+CREATE TRIGGER signup_count_del AFTER DELETE ON signup BEGIN
+  UPDATE shift SET taken = taken - 1 WHERE id = OLD.shift_id;
+END;
+
+CREATE TRIGGER signup_count_ins AFTER INSERT ON signup BEGIN
+  UPDATE shift SET taken = taken + 1 WHERE id = NEW.shift_id;
+END;
+
+CREATE TRIGGER signup_count_upd AFTER UPDATE OF shift_id ON signup BEGIN
+  UPDATE shift SET taken = taken - 1 WHERE id = OLD.shift_id;
+  UPDATE shift SET taken = taken + 1 WHERE id = NEW.shift_id;
+END;
+
+CREATE TRIGGER signup_times_ins AFTER INSERT ON signup BEGIN
+  UPDATE signup SET (starts_at, ends_at) = (SELECT starts_at, ends_at FROM shift WHERE id = NEW.shift_id)
+  WHERE id = NEW.id;
+END;
+
+CREATE VIEW signup_all AS
+  SELECT su.id, su.shift_id, su.user_id, s.title, s.location, s.starts_at, s.ends_at, 0 AS archived
+  FROM signup su JOIN shift s ON s.id = su.shift_id
+  UNION ALL
+  SELECT su.id, su.shift_id, su.user_id, s.title, s.location, s.starts_at, s.ends_at, 1 AS archived
+  FROM signup_archive su JOIN shift_archive s ON s.id = su.shift_id;
+
+CREATE TRIGGER rollup_signup_archive_del AFTER DELETE ON signup_archive BEGIN
+  UPDATE volunteer_rollup SET shifts = shifts - 1, minutes = minutes - CAST(round((julianday(OLD.ends_at) - julianday(OLD.starts_at)) * 1440) AS INTEGER)
+  WHERE OLD.starts_at IS NOT NULL AND user_id = OLD.user_id AND month = substr(OLD.starts_at, 1, 7);
+END;
+
+CREATE TRIGGER rollup_signup_archive_ins AFTER INSERT ON signup_archive BEGIN
+  INSERT INTO volunteer_rollup(user_id, month, shifts, minutes)
+  SELECT NEW.user_id, substr(NEW.starts_at, 1, 7), 1, CAST(round((julianday(NEW.ends_at) - julianday(NEW.starts_at)) * 1440) AS INTEGER) WHERE NEW.starts_at IS NOT NULL
+  ON CONFLICT(month, user_id) DO UPDATE SET shifts = shifts + 1, minutes = minutes + excluded.minutes;
+END;
+
+CREATE TRIGGER waitlist_count_del AFTER DELETE ON waitlist BEGIN
+  UPDATE shift SET wait_ct = wait_ct - 1 WHERE id = OLD.shift_id;
+END;
+
+CREATE TRIGGER waitlist_count_ins AFTER INSERT ON waitlist BEGIN
+  UPDATE shift SET wait_ct = wait_ct + 1 WHERE id = NEW.shift_id;
+END;
+
+CREATE TRIGGER waitlist_count_upd AFTER UPDATE OF shift_id ON waitlist BEGIN
+  UPDATE shift SET wait_ct = wait_ct - 1 WHERE id = OLD.shift_id;
+  UPDATE shift SET wait_ct = wait_ct + 1 WHERE id = NEW.shift_id;
+END;
+
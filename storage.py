@@ -0,0 +1,1031 @@
+"""Database backends: connections, transactions, schema, and the SQL that differs per engine.
+
+The queries are written in the SQL that SQLite and PostgreSQL share, with ?
+placeholders, and rows are read by position or column name; the ones the
+routes run for users, shifts, signups, the waitlist and the outbox are gathered
+in Repository, reports and batch jobs keep theirs in app.py. A backend hands out
+connections that accept that, creates the schema, and supplies the few things
+that can't be written portably: write transactions and row locks, full-text
+search, lists of ids passed as JSON, timestamps, and streaming reads.
+
+SQLite (the default) lives here; PostgreSQL, for running several app hosts
+against one database, is in storage_pg.py and needs psycopg. Changes to the
+schema go through migrations.py.
+"""
+import re, sqlite3
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per database file is assumed
+    fcntl = None
+
+import migrations
+from pool import ConnectionPool
+
+
+def open_backend(url, config):
+    """The backend for a DATABASE_URL (postgresql://...) or an SQLite file path."""
+    if url.startswith(("postgres://", "postgresql://")):
+        from storage_pg import PostgresBackend  # psycopg is only needed here
+        return PostgresBackend(url, size=config["DB_POOL_SIZE"], timeout=config["DB_POOL_TIMEOUT"])
+    return SQLiteBackend(
+        url,
+        size=config["DB_POOL_SIZE"],
+        timeout=config["DB_POOL_TIMEOUT"],
+        busy_timeout_ms=config["DB_BUSY_TIMEOUT_MS"],
+        cache_size=config["DB_CACHE_SIZE"],
+        mmap_size=config["DB_MMAP_SIZE"],
+    )
+
+
+class Backend:
+    """What app.py needs from a database engine.
+
+    `pool` hands out connections (acquire / release / stats / close). Rows from
+    them index like sqlite3.Row, INSERTs set cursor.lastrowid, and a data change
+    outside write_transaction() opens a transaction that db.commit() ends.
+    """
+
+    name = None
+    IntegrityError = Exception
+    # appended to the SELECT ... LIMIT that claims rows for one worker
+    skip_locked = ""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def close(self):
+        self.pool.close()
+
+    def init_schema(self, db, fts=True, target=None, report=None):
+        """migrations.migrate() on this backend; returns the Applied rows for those that ran."""
+        return migrations.migrate(db, self, target, report)
+
+    def baseline(self, db):
+        """Create the schema as of migration 1, or add what an older database lacks.
+
+        Returns the new columns (as "table.column") that existing rows need filled
+        in, plus "shift.times" if stored shift times may need normalizing.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def schema_lock(self, db):
+        """Held while migrating, so processes sharing a database take turns."""
+        yield
+
+    def explain(self, db, sql, params=()):
+        """The query plan for a statement, one line per step, without running it."""
+        raise NotImplementedError
+
+    def dump_schema(self, db):
+        """The schema as SQL text, for schema.sql."""
+        raise NotImplementedError
+
+    def create_index(self, db, name, table, columns, where=None):
+        """Build an index (partial with `where`) on a live table, committing first."""
+        db.commit()
+        db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})" + (f" WHERE {where}" if where else ""))
+        db.commit()
+
+    def rollup_schema(self, db):
+        """Create the analytics rollup tables and the triggers that keep them current (migration 3)."""
+        raise NotImplementedError
+
+    def archive_schema(self, db):
+        """Create the archive tables, the views over live and archived rows, and their triggers (migration 4)."""
+        raise NotImplementedError
+
+    def begin_write(self, db):
+        """Start the transaction write_transaction() commits."""
+        raise NotImplementedError
+
+    def lock(self, db, table, ids):
+        """Hold the rows `ids` of `table` until the write transaction ends.
+
+        Call it before a read-check-write on them (e.g. a capacity check), so a
+        concurrent writer waits rather than acting on the same stale read.
+        """
+
+    def now(self, offset=False):
+        """SQL for the current UTC time as 'YYYY-MM-DDTHH:MM:SS.sss' text.
+
+        With offset=True it takes one ? parameter such as '+30 seconds'.
+        """
+        raise NotImplementedError
+
+    def minutes(self, starts, ends):
+        """SQL for the whole minutes between two time columns (e.g. "s.starts_at", "s.ends_at")."""
+        raise NotImplementedError
+
+    def iso_time(self, col):
+        """SQL for a time column in the stored 'YYYY-MM-DDTHH:MM:SS' form (NULL if it isn't a time)."""
+        raise NotImplementedError
+
+    def id_table(self, *cols):
+        """A FROM-clause subquery over a JSON array bound to one ? parameter.
+
+        One column: an array of ids. Several: an array of [a, b, ...] arrays,
+        one column per position. Give it an alias, e.g. f"FROM {b.id_table('id')} c".
+        """
+        raise NotImplementedError
+
+    def search(self, q):
+        """(sql, params) matching shifts against free text, or None if q has no words.
+
+        The SQL selects s.* plus a rank column (lower is better) from shift s
+        aliased with the rank as f.rank, and ends in a WHERE clause.
+        """
+        raise NotImplementedError
+
+    def stream(self, db, sql, params, batch_size):
+        """Yield the rows of a query in lists of up to batch_size without loading them all."""
+        cur = db.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+
+# ---------- repository ----------
+# FROM-clause sources for the listings that include archived history on ?archived=1.
+# The live ones have the archive views' columns, so one query serves either way.
+SHIFT_SOURCES = {
+    False: "(SELECT s.*, 0 AS archived FROM shift s)",
+    True: "shift_all",
+}
+SIGNUP_SOURCES = {
+    False: "(SELECT su.id, su.shift_id, su.user_id, s.title, s.location, s.starts_at, s.ends_at, 0 AS archived"
+           " FROM signup su JOIN shift s ON s.id = su.shift_id)",
+    True: "signup_all",
+}
+
+
+class Repository:
+    """The queries behind the routes: users, shifts, signups, the waitlist and the outbox.
+
+    One per connection: Repository(db, backend). Writes run in the caller's
+    transaction and are never committed here, so a route decides what one unit
+    of work is (db.commit() or write_transaction()). Listings return (sql,
+    params) for keyset_page() to page through rather than rows.
+    """
+
+    def __init__(self, db, backend):
+        self.db = db
+        self.backend = backend
+
+    def _one(self, sql, params=()):
+        return self.db.execute(sql, params).fetchone()
+
+    def _ids(self, sql, params=()):
+        return {r[0] for r in self.db.execute(sql, params)}
+
+    @staticmethod
+    def _marks(ids):
+        return ",".join("?" * len(ids))
+
+    # users
+
+    def user(self, user_id):
+        return self._one("SELECT * FROM app_user WHERE id=?", (user_id,))
+
+    def user_by_email(self, email):
+        return self._one("SELECT * FROM app_user WHERE email=?", (email,))
+
+    def user_count(self):
+        return self._one("SELECT COUNT(*) c FROM app_user")["c"]
+
+    def add_user(self, email, password_hash, role="VOLUNTEER"):
+        """Insert a user and return the id; a taken email raises the backend's IntegrityError."""
+        return self.db.execute(
+            "INSERT INTO app_user(email,password_hash,role) VALUES (?,?,?)", (email, password_hash, role),
+        ).lastrowid
+
+    def set_password_hash(self, user_id, password_hash):
+        self.db.execute("UPDATE app_user SET password_hash=? WHERE id=?", (password_hash, user_id))
+
+    def set_role(self, user_id, role):
+        self.db.execute("UPDATE app_user SET role=? WHERE id=?", (role, user_id))
+
+    def users(self):
+        return "SELECT u.* FROM app_user u WHERE 1=1", ()
+
+    def add_token(self, token_hash, user_id, name=None):
+        self.db.execute("INSERT INTO api_token(token_hash, user_id, name) VALUES (?,?,?)", (token_hash, user_id, name))
+
+    def user_by_token(self, token_hash):
+        return self._one(
+            "SELECT u.* FROM api_token t JOIN app_user u ON u.id = t.user_id WHERE t.token_hash = ?", (token_hash,))
+
+    def revoke_token(self, token_hash):
+        self.db.execute("DELETE FROM api_token WHERE token_hash=?", (token_hash,))
+
+    def availability(self, user_id, after):
+        """A user's availability windows ending after `after`, earliest first."""
+        return self.db.execute(
+            "SELECT * FROM availability WHERE user_id=? AND ends_at > ? ORDER BY starts_at", (user_id, after),
+        ).fetchall()
+
+    def add_availability(self, user_id, starts_at, ends_at, preference=0):
+        self.db.execute(
+            "INSERT INTO availability(user_id,starts_at,ends_at,preference) VALUES (?,?,?,?)",
+            (user_id, starts_at, ends_at, preference),
+        )
+
+    def delete_availability(self, user_id, window_id):
+        self.db.execute("DELETE FROM availability WHERE id=? AND user_id=?", (window_id, user_id))
+
+    def calendar_feed(self, user_id):
+        """The user's calendar_feed row (token, rev, changed_at), or None."""
+        return self._one("SELECT token, rev, changed_at FROM calendar_feed WHERE user_id=?", (user_id,))
+
+    def calendar_user(self, token):
+        """The id of the user whose feed token this is, or None."""
+        row = self._one("SELECT user_id FROM calendar_feed WHERE token=?", (token,))
+        return row and row["user_id"]
+
+    def set_calendar_token(self, user_id, token):
+        self.db.execute(
+            "INSERT INTO calendar_feed(user_id, token) VALUES (?,?) "
+            "ON CONFLICT(user_id) DO UPDATE SET token=excluded.token",
+            (user_id, token),
+        )
+
+    # shifts
+
+    def shift(self, shift_id):
+        return self._one("SELECT * FROM shift WHERE id=?", (shift_id,))
+
+    def shift_exists(self, shift_id):
+        return self._one("SELECT 1 FROM shift WHERE id=?", (shift_id,)) is not None
+
+    def existing_shift_ids(self, ids):
+        """The shifts among `ids` that exist, as a set."""
+        return self._ids(f"SELECT id FROM shift WHERE id IN ({self._marks(ids)})", ids)
+
+    def shift_count(self):
+        return self._one("SELECT COUNT(*) c FROM shift")["c"]
+
+    def add_shift(self, title, location, starts_at, ends_at, capacity):
+        return self.db.execute(
+            "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+            (title, location, starts_at, ends_at, capacity),
+        ).lastrowid
+
+    def add_shifts(self, rows):
+        """Insert (title, location, starts_at, ends_at, capacity) rows with one executemany."""
+        self.db.executemany("INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)", rows)
+
+    def shift_keys_between(self, lo, hi):
+        """{(title, location or '', starts_at)} of the shifts starting in [lo, hi], for spotting duplicates."""
+        return {tuple(r) for r in self.db.execute(
+            "SELECT title, COALESCE(location,''), starts_at FROM shift WHERE starts_at BETWEEN ? AND ?", (lo, hi))}
+
+    def update_shift(self, shift_id, title, location, starts_at, ends_at, capacity):
+        self.db.execute(
+            "UPDATE shift SET title=?, location=?, starts_at=?, ends_at=?, capacity=? WHERE id=?",
+            (title, location, starts_at, ends_at, capacity, shift_id),
+        )
+
+    def delete_shift(self, shift_id):
+        # signups and waitlist rows go with it (ON DELETE CASCADE)
+        self.db.execute("DELETE FROM shift WHERE id=?", (shift_id,))
+
+    def seats(self, ids):
+        """(id, capacity, taken, wait_ct) rows for the shifts among `ids` that exist."""
+        return self.db.execute(
+            f"SELECT id, capacity, taken, wait_ct FROM shift WHERE id IN ({self._marks(ids)})", ids).fetchall()
+
+    def free_seats(self, shift_id):
+        """capacity - taken for a shift, or None if it's gone."""
+        row = self._one("SELECT capacity - taken AS free FROM shift WHERE id=?", (shift_id,))
+        return row and row["free"]
+
+    def shifts_with_waiters(self, now):
+        """Ids of shifts ending after `now` with both free seats and people waiting."""
+        return [r["id"] for r in self.db.execute(
+            "SELECT id FROM shift WHERE wait_ct > 0 AND taken < capacity AND ends_at > ?", (now,))]
+
+    def counter_drift(self):
+        """Shifts whose taken / wait_ct disagree with signup and waitlist, as
+        (id, taken, wait_ct, real_taken, real_wait_ct) rows."""
+        return self.db.execute(
+            """
+            SELECT id, taken, wait_ct, real_taken, real_wait_ct FROM (
+              SELECT s.id, s.taken, s.wait_ct,
+                     (SELECT COUNT(*) FROM signup x WHERE x.shift_id=s.id) AS real_taken,
+                     (SELECT COUNT(*) FROM waitlist w WHERE w.shift_id=s.id) AS real_wait_ct
+              FROM shift s
+            ) AS counts
+            WHERE taken != real_taken OR wait_ct != real_wait_ct
+            ORDER BY id
+            """
+        ).fetchall()
+
+    def set_counters(self, drift):
+        """Write the real counts from counter_drift() rows."""
+        self.db.executemany(
+            "UPDATE shift SET taken=?, wait_ct=? WHERE id=?",
+            [(r["real_taken"], r["real_wait_ct"], r["id"]) for r in drift],
+        )
+
+    def catalog_rev(self):
+        # PostgreSQL spreads the counter over several rows so writers don't queue on one
+        return self._one("SELECT CAST(SUM(rev) AS BIGINT) FROM catalog_version")[0]
+
+    def upcoming_shifts(self, now, q="", fts=False):
+        """(sql, params, ranked) for shifts ending after `now`, matching q if given.
+
+        With fts the match is the backend's full-text search and the rows carry
+        its rank (ranked is True); otherwise it is a substring match on title
+        and location.
+        """
+        search = self.backend.search(q) if q and fts else None
+        if search:
+            sql, params = search
+            return sql + " AND s.ends_at > ?", [*params, now], True
+        sql, params = "SELECT s.* FROM shift s WHERE s.ends_at > ?", [now]
+        if q:
+            sql += " AND (LOWER(s.title) LIKE ? OR LOWER(s.location) LIKE ?)"
+            pattern = f"%{q.lower()}%"
+            params.extend([pattern, pattern])
+        return sql, params, False
+
+    def shifts(self, archived=False):
+        """(sql, params) for every shift, with archived ones too if asked."""
+        return f"SELECT s.* FROM {SHIFT_SOURCES[archived]} s WHERE 1=1", ()
+
+    # signups
+
+    def book(self, user_id, shift_id):
+        """Sign a user up if the shift has a free seat; the new signup id, or None if it was full.
+
+        The capacity check and the insert are one statement, so concurrent
+        signups can't overbook.
+        """
+        cur = self.db.execute(
+            "INSERT INTO signup(shift_id,user_id) SELECT id, ? FROM shift WHERE id=? AND taken < capacity",
+            (user_id, shift_id),
+        )
+        return cur.lastrowid if cur.rowcount else None
+
+    def overlap(self, user_id, shift_id):
+        """One of the user's other signups whose time overlaps shift_id, or None.
+
+        A range scan of idx_signup_user_time: only the user's signups starting
+        before the new shift ends are visited. Back-to-back shifts don't overlap.
+        """
+        return self._one(
+            """
+            SELECT o.id, o.title, o.starts_at, o.ends_at
+            FROM shift n
+            JOIN signup x ON x.user_id = ? AND x.starts_at < n.ends_at AND x.ends_at > n.starts_at
+            JOIN shift o ON o.id = x.shift_id
+            WHERE n.id = ? AND x.shift_id != n.id
+            ORDER BY x.starts_at LIMIT 1
+            """,
+            (user_id, shift_id),
+        )
+
+    def signup(self, signup_id, user_id=None):
+        """A signup row, or None; with user_id, only if it is that user's."""
+        sql, params = "SELECT * FROM signup WHERE id=?", [signup_id]
+        if user_id is not None:
+            sql, params = sql + " AND user_id=?", params + [user_id]
+        return self._one(sql, params)
+
+    def delete_signup(self, signup_id):
+        self.db.execute("DELETE FROM signup WHERE id=?", (signup_id,))
+
+    def is_signed_up(self, user_id, shift_id):
+        return self._one("SELECT 1 FROM signup WHERE shift_id=? AND user_id=?", (shift_id, user_id)) is not None
+
+    def signed_up_ids(self, user_id, shift_ids):
+        """The shifts among `shift_ids` the user is signed up for, as a set."""
+        return self._ids(
+            f"SELECT shift_id FROM signup WHERE user_id=? AND shift_id IN ({self._marks(shift_ids)})",
+            [user_id, *shift_ids])
+
+    def signups(self, user_id, archived=False):
+        """(sql, params) for a user's signups with their shifts' details, archived ones too if asked."""
+        return f"""
+            SELECT su.id AS signup_id, su.shift_id, su.title, su.location, su.starts_at, su.ends_at, su.archived
+            FROM {SIGNUP_SOURCES[archived]} su
+            WHERE su.user_id=?
+        """, (user_id,)
+
+    def calendar_signups(self, user_id):
+        """A user's signups as their shifts' rows plus signup_id, by start time."""
+        return self.db.execute(
+            """
+            SELECT s.*, su.id AS signup_id FROM signup su
+            JOIN shift s ON s.id=su.shift_id
+            WHERE su.user_id=?
+            ORDER BY s.starts_at ASC
+            """,
+            (user_id,),
+        ).fetchall()
+
+    def signup_export(self, archived=False, since=None, until=None, shift_id=None):
+        """(sql, params) for the signups CSV: title, times and email, by start time then email.
+
+        since / until bound the shift start (until excluded); shift_id picks one shift.
+        """
+        sql = f"""
+            SELECT su.title, su.starts_at, su.ends_at, u.email
+            FROM {SIGNUP_SOURCES[archived]} su
+            JOIN app_user u ON u.id=su.user_id
+            WHERE 1=1
+        """
+        params = []
+        if since is not None:
+            sql += " AND su.starts_at >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND su.starts_at < ?"
+            params.append(until)
+        if shift_id is not None:
+            sql += " AND su.shift_id = ?"
+            params.append(shift_id)
+        return sql + " ORDER BY su.starts_at ASC, u.email ASC", params
+
+    # waitlist
+
+    def join_waitlist(self, user_id, shift_id):
+        """Queue a user for a shift; being on its waitlist already raises the backend's IntegrityError."""
+        self.db.execute("INSERT INTO waitlist(shift_id,user_id) VALUES (?,?)", (shift_id, user_id))
+
+    def join_waitlists(self, user_id, shift_ids):
+        self.db.executemany("INSERT INTO waitlist(shift_id,user_id) VALUES (?,?)", [(sid, user_id) for sid in shift_ids])
+
+    def waiting_ids(self, user_id, shift_ids):
+        """The shifts among `shift_ids` the user is waiting for, as a set."""
+        return self._ids(
+            f"SELECT shift_id FROM waitlist WHERE user_id=? AND shift_id IN ({self._marks(shift_ids)})",
+            [user_id, *shift_ids])
+
+    def waiters(self, shift_id):
+        """(id, user_id, created_at) waitlist rows for a shift, longest-waiting first.
+
+        Anyone who is already signed up for it is left out.
+        """
+        return self.db.execute(
+            """
+            SELECT w.id, w.user_id, w.created_at FROM waitlist w
+            WHERE w.shift_id=? AND NOT EXISTS (SELECT 1 FROM signup x WHERE x.shift_id=w.shift_id AND x.user_id=w.user_id)
+            ORDER BY w.created_at, w.id
+            """,
+            (shift_id,),
+        ).fetchall()
+
+    def promote(self, shift_id, waiters):
+        """Sign up the given waiters() rows and take them off the waitlist (seats aren't checked)."""
+        self.db.executemany("INSERT INTO signup(shift_id,user_id) VALUES (?,?)", [(shift_id, w["user_id"]) for w in waiters])
+        self.db.executemany("DELETE FROM waitlist WHERE id=?", [(w["id"],) for w in waiters])
+
+    # outbox
+
+    def queue_for_users(self, kind, user_ids, subject, body):
+        """One message per user in `user_ids`, to their email."""
+        self.db.execute(
+            f"INSERT INTO outbox(kind, recipient, subject, body) "
+            f"SELECT ?, email, ?, ? FROM app_user WHERE id IN ({self._marks(user_ids)})",
+            (kind, subject, body, *user_ids),
+        )
+
+    def queue_for_shift(self, kind, shift_id, subject, body):
+        """One message to everyone signed up for or waiting on a shift."""
+        self.db.execute(
+            "INSERT INTO outbox(kind, recipient, subject, body) "
+            "SELECT ?, email, ?, ? FROM app_user WHERE id IN "
+            "(SELECT user_id FROM signup WHERE shift_id=? UNION SELECT user_id FROM waitlist WHERE shift_id=?)",
+            (kind, subject, body, shift_id, shift_id),
+        )
+
+    def queue_each(self, kind, messages):
+        """A message per (user_id, subject, body), with one executemany."""
+        self.db.executemany(
+            "INSERT INTO outbox(kind, recipient, subject, body) SELECT ?, email, ?, ? FROM app_user WHERE id=?",
+            [(kind, subject, body, user_id) for user_id, subject, body in messages],
+        )
+
+    def claim_outbox(self, limit, lease_s):
+        """Lease up to `limit` due messages for lease_s seconds, oldest first, counting the attempt.
+
+        Returns (id, recipient, subject, body, attempts, created_at) rows. Call it
+        inside a write transaction; on PostgreSQL rows another worker is claiming
+        are skipped rather than waited for.
+        """
+        now = self.backend.now
+        return self.db.execute(
+            f"""
+            UPDATE outbox SET attempts = attempts + 1,
+                   next_attempt_at = {now(offset=True)}
+            WHERE id IN (
+              SELECT id FROM outbox
+              WHERE status = 'pending' AND next_attempt_at <= {now()}
+              ORDER BY next_attempt_at LIMIT ? {self.backend.skip_locked}
+            )
+            RETURNING id, recipient, subject, body, attempts, created_at
+            """,
+            (f"+{lease_s} seconds", limit),
+        ).fetchall()
+
+    def finish_outbox(self, sent=(), retry=(), failed=()):
+        """Record a delivery round.
+
+        sent: message ids; retry: (id, delay_s, error), due again after the
+        delay; failed: (id, error), given up on.
+        """
+        now = self.backend.now
+        self.db.executemany(
+            f"UPDATE outbox SET status='sent', sent_at={now()}, last_error=NULL WHERE id=?", [(i,) for i in sent])
+        self.db.executemany(
+            f"UPDATE outbox SET next_attempt_at={now(offset=True)}, last_error=? WHERE id=?",
+            [(f"+{delay} seconds", err, i) for i, delay, err in retry])
+        self.db.executemany("UPDATE outbox SET status='failed', last_error=? WHERE id=?", [(err, i) for i, err in failed])
+
+    def outbox_depth(self):
+        """(pending messages, created_at of the oldest or None)."""
+        row = self._one("SELECT COUNT(*) AS n, MIN(created_at) AS oldest FROM outbox WHERE status='pending'")
+        return row["n"], row["oldest"]
+
+
+# ---------- SQLite ----------
+# Tables as of migration 1; columns added before migrations existed are also
+# applied to older files by SQLiteBackend.baseline().
+TABLES = """
+CREATE TABLE IF NOT EXISTS app_user (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  email TEXT UNIQUE NOT NULL,
+  password_hash TEXT NOT NULL,
+  role TEXT NOT NULL CHECK (role IN ('ADMIN','VOLUNTEER'))
+);
+
+CREATE TABLE IF NOT EXISTS shift (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  title TEXT NOT NULL,
+  location TEXT,
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  capacity  INTEGER NOT NULL DEFAULT 1,
+  taken     INTEGER NOT NULL DEFAULT 0,
+  wait_ct   INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS signup (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  shift_id INTEGER NOT NULL REFERENCES shift(id) ON DELETE CASCADE,
+  user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  starts_at TEXT,
+  ends_at   TEXT,
+  UNIQUE (shift_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS waitlist (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  shift_id INTEGER NOT NULL REFERENCES shift(id) ON DELETE CASCADE,
+  user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE (shift_id, user_id)
+);
+
+-- when a volunteer can work, for the roster optimizer (higher preference = rather)
+CREATE TABLE IF NOT EXISTS availability (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  preference INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# shift.taken / shift.wait_ct are denormalized counts of signup / waitlist rows,
+# maintained by these triggers so every write path keeps them in step.
+COUNTER_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS signup_count_ins AFTER INSERT ON signup BEGIN
+  UPDATE shift SET taken = taken + 1 WHERE id = NEW.shift_id;
+END;
+CREATE TRIGGER IF NOT EXISTS signup_count_del AFTER DELETE ON signup BEGIN
+  UPDATE shift SET taken = taken - 1 WHERE id = OLD.shift_id;
+END;
+CREATE TRIGGER IF NOT EXISTS signup_count_upd AFTER UPDATE OF shift_id ON signup BEGIN
+  UPDATE shift SET taken = taken - 1 WHERE id = OLD.shift_id;
+  UPDATE shift SET taken = taken + 1 WHERE id = NEW.shift_id;
+END;
+CREATE TRIGGER IF NOT EXISTS waitlist_count_ins AFTER INSERT ON waitlist BEGIN
+  UPDATE shift SET wait_ct = wait_ct + 1 WHERE id = NEW.shift_id;
+END;
+CREATE TRIGGER IF NOT EXISTS waitlist_count_del AFTER DELETE ON waitlist BEGIN
+  UPDATE shift SET wait_ct = wait_ct - 1 WHERE id = OLD.shift_id;
+END;
+CREATE TRIGGER IF NOT EXISTS waitlist_count_upd AFTER UPDATE OF shift_id ON waitlist BEGIN
+  UPDATE shift SET wait_ct = wait_ct - 1 WHERE id = OLD.shift_id;
+  UPDATE shift SET wait_ct = wait_ct + 1 WHERE id = NEW.shift_id;
+END;
+"""
+
+# Shift times are stored as normalized 'YYYY-MM-DDTHH:MM:SS' text, so range
+# filters and ORDER BY compare the raw columns and can use these indexes.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_shift_ends_starts ON shift(ends_at, starts_at);
+CREATE INDEX IF NOT EXISTS idx_shift_starts ON shift(starts_at);
+CREATE INDEX IF NOT EXISTS idx_signup_user_time ON signup(user_id, starts_at, ends_at);
+DROP INDEX IF EXISTS idx_signup_user;
+-- rowid is the implicit last column, so this orders a shift's waiters by (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_waitlist_shift_created ON waitlist(shift_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_availability_user_starts ON availability(user_id, starts_at);
+"""
+# signup(shift_id) lookups are served by the UNIQUE (shift_id, user_id) index,
+# signup(user_id) ones by idx_signup_user_time.
+
+# signup.starts_at / ends_at copy the shift's times so a volunteer's bookings form
+# an interval index (idx_signup_user_time) for the overlap checks.
+SIGNUP_TIME_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS signup_times_ins AFTER INSERT ON signup BEGIN
+  UPDATE signup SET (starts_at, ends_at) = (SELECT starts_at, ends_at FROM shift WHERE id = NEW.shift_id)
+  WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS signup_times_shift_upd AFTER UPDATE OF starts_at, ends_at ON shift BEGIN
+  UPDATE signup SET starts_at = NEW.starts_at, ends_at = NEW.ends_at WHERE shift_id = NEW.id;
+END;
+"""
+
+# External-content FTS5 index over shift title/location, kept in sync by triggers
+# (the title/location-only UPDATE trigger skips counter updates on shift).
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS shift_fts USING fts5(
+  title, location, content='shift', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS shift_fts_ins AFTER INSERT ON shift BEGIN
+  INSERT INTO shift_fts(rowid, title, location) VALUES (NEW.id, NEW.title, NEW.location);
+END;
+CREATE TRIGGER IF NOT EXISTS shift_fts_del AFTER DELETE ON shift BEGIN
+  INSERT INTO shift_fts(shift_fts, rowid, title, location) VALUES ('delete', OLD.id, OLD.title, OLD.location);
+END;
+CREATE TRIGGER IF NOT EXISTS shift_fts_upd AFTER UPDATE OF title, location ON shift BEGIN
+  INSERT INTO shift_fts(shift_fts, rowid, title, location) VALUES ('delete', OLD.id, OLD.title, OLD.location);
+  INSERT INTO shift_fts(rowid, title, location) VALUES (NEW.id, NEW.title, NEW.location);
+END;
+"""
+
+# One row per user whose calendar has changed: rev is bumped (and changed_at stamped)
+# whenever one of their signups comes or goes or a shift they're on is edited, so the
+# .ics feed can be cached and answered with 304s. token authenticates the feed URL.
+CALENDAR_FEED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calendar_feed (
+  user_id INTEGER PRIMARY KEY REFERENCES app_user(id) ON DELETE CASCADE,
+  token TEXT UNIQUE,
+  rev INTEGER NOT NULL DEFAULT 0,
+  changed_at TEXT
+);
+CREATE TRIGGER IF NOT EXISTS calendar_signup_ins AFTER INSERT ON signup BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  VALUES (NEW.user_id, 1, strftime('%Y-%m-%dT%H:%M:%S','now'))
+  ON CONFLICT(user_id) DO UPDATE SET rev = rev + 1, changed_at = excluded.changed_at;
+END;
+CREATE TRIGGER IF NOT EXISTS calendar_signup_del AFTER DELETE ON signup BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  VALUES (OLD.user_id, 1, strftime('%Y-%m-%dT%H:%M:%S','now'))
+  ON CONFLICT(user_id) DO UPDATE SET rev = rev + 1, changed_at = excluded.changed_at;
+END;
+CREATE TRIGGER IF NOT EXISTS calendar_shift_upd AFTER UPDATE OF title, location, starts_at, ends_at ON shift BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  SELECT user_id, 1, strftime('%Y-%m-%dT%H:%M:%S','now') FROM signup WHERE shift_id = NEW.id
+  ON CONFLICT(user_id) DO UPDATE SET rev = rev + 1, changed_at = excluded.changed_at;
+END;
+"""
+# Deleting a shift cascades to its signups, which fires calendar_signup_del.
+
+# One row whose rev moves with every change to a shift, including its taken /
+# wait_ct counters (so every signup, cancel and waitlist change too). Cached
+# upcoming-shift pages are keyed on it.
+CATALOG_VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_version (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  rev INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO catalog_version(id, rev) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS catalog_shift_ins AFTER INSERT ON shift BEGIN
+  UPDATE catalog_version SET rev = rev + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS catalog_shift_upd AFTER UPDATE ON shift BEGIN
+  UPDATE catalog_version SET rev = rev + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS catalog_shift_del AFTER DELETE ON shift BEGIN
+  UPDATE catalog_version SET rev = rev + 1 WHERE id = 1;
+END;
+"""
+
+# Notifications waiting to be delivered, written in the same transaction as the
+# change they describe. next_attempt_at doubles as the lease on a claimed row.
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,
+  recipient TEXT NOT NULL,
+  subject TEXT NOT NULL,
+  body TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','sent','failed')),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
+  next_attempt_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
+  sent_at TEXT,
+  last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(next_attempt_at) WHERE status = 'pending';
+"""
+
+# Bearer tokens for the JSON API; only a SHA-256 of each token is stored.
+API_TOKEN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_token (
+  token_hash TEXT PRIMARY KEY,
+  user_id INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  name TEXT,
+  created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_api_token_user ON api_token(user_id);
+"""
+
+
+# Analytics rollups. shift_rollup sums shifts per (day, location): seats, taken,
+# waiting, full shifts, and volunteer-minutes (taken x shift length).
+# volunteer_rollup sums each volunteer's signups and minutes per month. Both are
+# kept current by triggers; shift_rollup follows shift.taken / wait_ct, so every
+# signup, cancel, promotion and edit moves it. Queries over them cost one row per
+# bucket, however many signups there are; keyed by time first and WITHOUT ROWID
+# so a date range is one contiguous slice of the primary key.
+ROLLUP_TABLES = """
+CREATE TABLE IF NOT EXISTS shift_rollup (
+  day TEXT NOT NULL,
+  location TEXT NOT NULL,
+  shifts INTEGER NOT NULL DEFAULT 0,
+  capacity INTEGER NOT NULL DEFAULT 0,
+  taken INTEGER NOT NULL DEFAULT 0,
+  wait_ct INTEGER NOT NULL DEFAULT 0,
+  full_shifts INTEGER NOT NULL DEFAULT 0,
+  minutes INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, location)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS volunteer_rollup (
+  user_id INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  month TEXT NOT NULL,
+  shifts INTEGER NOT NULL DEFAULT 0,
+  minutes INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, user_id)
+) WITHOUT ROWID;
+"""
+
+def _minutes_between(starts, ends):
+    return f"CAST(round((julianday({ends}) - julianday({starts})) * 1440) AS INTEGER)"
+
+def _minutes(row):
+    return _minutes_between(f"{row}.starts_at", f"{row}.ends_at")
+
+def _in_bucket(row):
+    return f"day = substr({row}.starts_at, 1, 10) AND location = COALESCE({row}.location, '')"
+
+_ADD_SHIFT = """
+  INSERT INTO shift_rollup(day, location, shifts, capacity, taken, wait_ct, full_shifts, minutes)
+  VALUES (substr(NEW.starts_at, 1, 10), COALESCE(NEW.location, ''), 1, NEW.capacity, NEW.taken, NEW.wait_ct,
+          NEW.taken >= NEW.capacity, NEW.taken * {minutes})
+  ON CONFLICT(day, location) DO UPDATE SET
+    shifts = shifts + 1, capacity = capacity + excluded.capacity, taken = taken + excluded.taken,
+    wait_ct = wait_ct + excluded.wait_ct, full_shifts = full_shifts + excluded.full_shifts,
+    minutes = minutes + excluded.minutes;
+""".format(minutes=_minutes("NEW"))
+_SUB_SHIFT = f"""
+  UPDATE shift_rollup SET
+    shifts = shifts - 1, capacity = capacity - OLD.capacity, taken = taken - OLD.taken,
+    wait_ct = wait_ct - OLD.wait_ct, full_shifts = full_shifts - (OLD.taken >= OLD.capacity),
+    minutes = minutes - OLD.taken * {_minutes("OLD")}
+  WHERE {_in_bucket("OLD")};
+"""
+_ADD_VOLUNTEER = f"""
+  INSERT INTO volunteer_rollup(user_id, month, shifts, minutes)
+  SELECT NEW.user_id, substr(NEW.starts_at, 1, 7), 1, {_minutes("NEW")} WHERE NEW.starts_at IS NOT NULL
+  ON CONFLICT(month, user_id) DO UPDATE SET shifts = shifts + 1, minutes = minutes + excluded.minutes;
+"""
+_SUB_VOLUNTEER = f"""
+  UPDATE volunteer_rollup SET shifts = shifts - 1, minutes = minutes - {_minutes("OLD")}
+  WHERE OLD.starts_at IS NOT NULL AND user_id = OLD.user_id AND month = substr(OLD.starts_at, 1, 7);
+"""
+# A counter change that stays in its bucket (every signup and cancel) is one
+# UPDATE; a shift moved to another day or location leaves one bucket for another.
+# signup_times_ins fills a new signup's times with an UPDATE, which is when
+# rollup_signup_upd counts it.
+ROLLUP_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS rollup_shift_ins AFTER INSERT ON shift BEGIN{_ADD_SHIFT}END;
+CREATE TRIGGER IF NOT EXISTS rollup_shift_del AFTER DELETE ON shift BEGIN{_SUB_SHIFT}END;
+CREATE TRIGGER IF NOT EXISTS rollup_shift_upd AFTER UPDATE OF location, starts_at, ends_at, capacity, taken, wait_ct ON shift
+WHEN substr(OLD.starts_at, 1, 10) = substr(NEW.starts_at, 1, 10) AND COALESCE(OLD.location, '') = COALESCE(NEW.location, '')
+BEGIN
+  UPDATE shift_rollup SET
+    capacity = capacity + NEW.capacity - OLD.capacity, taken = taken + NEW.taken - OLD.taken,
+    wait_ct = wait_ct + NEW.wait_ct - OLD.wait_ct,
+    full_shifts = full_shifts + (NEW.taken >= NEW.capacity) - (OLD.taken >= OLD.capacity),
+    minutes = minutes + NEW.taken * {_minutes("NEW")} - OLD.taken * {_minutes("OLD")}
+  WHERE {_in_bucket("NEW")};
+END;
+CREATE TRIGGER IF NOT EXISTS rollup_shift_move AFTER UPDATE OF location, starts_at ON shift
+WHEN substr(OLD.starts_at, 1, 10) != substr(NEW.starts_at, 1, 10) OR COALESCE(OLD.location, '') != COALESCE(NEW.location, '')
+BEGIN{_SUB_SHIFT}{_ADD_SHIFT}END;
+CREATE TRIGGER IF NOT EXISTS rollup_signup_ins AFTER INSERT ON signup BEGIN{_ADD_VOLUNTEER}END;
+CREATE TRIGGER IF NOT EXISTS rollup_signup_del AFTER DELETE ON signup BEGIN{_SUB_VOLUNTEER}END;
+CREATE TRIGGER IF NOT EXISTS rollup_signup_upd AFTER UPDATE OF user_id, starts_at, ends_at ON signup
+BEGIN{_SUB_VOLUNTEER}{_ADD_VOLUNTEER}END;
+"""
+
+# Shifts that ended long ago, moved out of shift / signup by the archive job
+# (their waitlists are dropped), so the live tables and their indexes stay the
+# size of the current season. Rows keep their ids; shift_archive.taken / wait_ct
+# are the counts when the shift was archived.
+ARCHIVE_TABLES = """
+CREATE TABLE IF NOT EXISTS shift_archive (
+  id INTEGER PRIMARY KEY,
+  title TEXT NOT NULL,
+  location TEXT,
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  capacity  INTEGER NOT NULL,
+  taken     INTEGER NOT NULL,
+  wait_ct   INTEGER NOT NULL,
+  archived_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signup_archive (
+  id INTEGER PRIMARY KEY,
+  shift_id INTEGER NOT NULL REFERENCES shift_archive(id) ON DELETE CASCADE,
+  user_id  INTEGER NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT,
+  starts_at TEXT,
+  ends_at   TEXT,
+  UNIQUE (shift_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_shift_archive_starts ON shift_archive(starts_at);
+CREATE INDEX IF NOT EXISTS idx_signup_archive_user_time ON signup_archive(user_id, starts_at);
+"""
+
+# Live and archived rows together, for listings asked to include history.
+# signup_all carries its shift's title, location and times: a join between two
+# UNION ALL views would have to build both in full first.
+ARCHIVE_VIEWS = """
+CREATE VIEW IF NOT EXISTS shift_all AS
+  SELECT id, title, location, starts_at, ends_at, capacity, taken, wait_ct, 0 AS archived FROM shift
+  UNION ALL
+  SELECT id, title, location, starts_at, ends_at, capacity, taken, wait_ct, 1 AS archived FROM shift_archive;
+CREATE VIEW IF NOT EXISTS signup_all AS
+  SELECT su.id, su.shift_id, su.user_id, s.title, s.location, s.starts_at, s.ends_at, 0 AS archived
+  FROM signup su JOIN shift s ON s.id = su.shift_id
+  UNION ALL
+  SELECT su.id, su.shift_id, su.user_id, s.title, s.location, s.starts_at, s.ends_at, 1 AS archived
+  FROM signup_archive su JOIN shift_archive s ON s.id = su.shift_id;
+"""
+
+# The rollups cover archived shifts too: copying a shift into the archive adds
+# it, and deleting it from shift takes it away again.
+ARCHIVE_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS rollup_shift_archive_ins AFTER INSERT ON shift_archive BEGIN{_ADD_SHIFT}END;
+CREATE TRIGGER IF NOT EXISTS rollup_shift_archive_del AFTER DELETE ON shift_archive BEGIN{_SUB_SHIFT}END;
+CREATE TRIGGER IF NOT EXISTS rollup_signup_archive_ins AFTER INSERT ON signup_archive BEGIN{_ADD_VOLUNTEER}END;
+CREATE TRIGGER IF NOT EXISTS rollup_signup_archive_del AFTER DELETE ON signup_archive BEGIN{_SUB_VOLUNTEER}END;
+"""
+
+
+def fts_query(q: str) -> str:
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    return " ".join(f'"{w}"*' for w in re.findall(r"\w+", q.lower()))
+
+def _ensure_fts(db):
+    """Create the shift_fts index (and backfill it) the first time."""
+    if db.execute("SELECT 1 FROM sqlite_master WHERE name='shift_fts'").fetchone():
+        return  # no script on every start
+    db.executescript(FTS_SCHEMA)
+    # title matches weigh twice as much as location matches in the bm25 rank
+    db.execute("INSERT INTO shift_fts(shift_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)')")
+    db.execute("INSERT INTO shift_fts(shift_fts) VALUES ('rebuild')")
+
+def _table_exists(db, name):
+    return db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+def _ensure_column(db, table, column, decl):
+    """Add a column to an existing table if it is missing. Returns True if added."""
+    cols = {r["name"] for r in db.execute(f"PRAGMA table_info({table})")}
+    if column in cols:
+        return False
+    db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return True
+
+
+class SQLiteBackend(Backend):
+    """One SQLite file in WAL mode; BEGIN IMMEDIATE serializes writers."""
+
+    name = "sqlite"
+    IntegrityError = sqlite3.IntegrityError
+
+    def __init__(self, path, **pool_options):
+        super().__init__(ConnectionPool(path, **pool_options))
+
+    def init_schema(self, db, fts=True, target=None, report=None):
+        applied = super().init_schema(db, fts, target, report)
+        # not a migration: whether FTS5 is there depends on the SQLite build
+        if fts:
+            _ensure_fts(db)
+        return applied
+
+    def baseline(self, db):
+        # shift times written before they were normalized may be in other ISO forms
+        added = {"shift.times"} if _table_exists(db, "shift") else set()
+        db.executescript(TABLES)
+        # counters on shift (taken / wait_ct), and shift times copied onto
+        # signup, for databases created before they existed
+        for table, column, decl in (
+            ("shift", "taken", "INTEGER NOT NULL DEFAULT 0"),
+            ("shift", "wait_ct", "INTEGER NOT NULL DEFAULT 0"),
+            ("signup", "starts_at", "TEXT"),
+            ("signup", "ends_at", "TEXT"),
+        ):
+            if _ensure_column(db, table, column, decl):
+                added.add(f"{table}.{column}")
+        db.executescript(COUNTER_TRIGGERS)
+        db.executescript(CALENDAR_FEED_SCHEMA)
+        db.executescript(CATALOG_VERSION_SCHEMA)
+        db.executescript(SIGNUP_TIME_TRIGGERS)
+        db.executescript(OUTBOX_SCHEMA)
+        db.executescript(API_TOKEN_SCHEMA)
+        db.executescript(INDEXES)
+        db.commit()
+        return added
+
+    def explain(self, db, sql, params=()):
+        return [r["detail"] for r in db.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    def dump_schema(self, db):
+        # sorted, so the text doesn't depend on the order things were created in;
+        # FTS5's shadow tables come with the virtual table
+        rows = db.execute(
+            """
+            SELECT sql FROM sqlite_master
+            WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+              AND NOT (type = 'table' AND name LIKE 'shift_fts_%')
+            ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, tbl_name, name
+            """
+        )
+        return "".join(f"{r[0]};\n\n" for r in rows)
+
+    @contextmanager
+    def schema_lock(self, db):
+        # server workers sharing the file migrate one at a time
+        if fcntl is None:
+            yield
+            return
+        with open(self.pool.path + ".migrate-lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def rollup_schema(self, db):
+        db.executescript(ROLLUP_TABLES)
+        db.executescript(ROLLUP_TRIGGERS)
+        db.commit()
+
+    def archive_schema(self, db):
+        db.executescript(ARCHIVE_TABLES)
+        db.executescript(ARCHIVE_VIEWS)
+        db.executescript(ARCHIVE_TRIGGERS)
+        db.commit()
+
+    def begin_write(self, db):
+        # takes the write lock up front: a read-check-write can't interleave with
+        # another writer (and never fails upgrading a read lock)
+        db.execute("BEGIN IMMEDIATE")
+
+    def lock(self, db, table, ids):
+        pass  # BEGIN IMMEDIATE already excludes every other writer
+
+    def now(self, offset=False):
+        return "strftime('%Y-%m-%dT%H:%M:%f', 'now', ?)" if offset else "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+
+    def minutes(self, starts, ends):
+        return _minutes_between(starts, ends)
+
+    def iso_time(self, col):
+        return f"strftime('%Y-%m-%dT%H:%M:%S', {col})"
+
+    def id_table(self, *cols):
+        if len(cols) == 1:
+            return f"(SELECT value AS {cols[0]} FROM json_each(?))"
+        picks = ", ".join(f"json_extract(value, '$[{i}]') AS {c}" for i, c in enumerate(cols))
+        return f"(SELECT {picks} FROM json_each(?))"
+
+    def search(self, q):
+        match = fts_query(q)
+        if not match:
+            return None
+        sql = """
+          SELECT s.*, f.rank AS rank
+          FROM shift_fts f JOIN shift s ON s.id=f.rowid
+          WHERE shift_fts MATCH ?
+        """
+        return sql, [match]
@@ -0,0 +1,610 @@
+"""PostgreSQL backend, for running several app hosts against one database.
+
+Needs psycopg 3 and psycopg_pool (requirements-postgres.txt). Connections are
+wrapped so app.py's sqlite3-style code runs unchanged: ? placeholders,
+rows readable by position or column name, cursor.lastrowid after an INSERT,
+and a data change outside write_transaction() opening a transaction that
+db.commit() ends.
+
+Unlike SQLite, writers don't exclude each other for the whole transaction;
+code that checks a row before writing (capacity, overlaps) takes lock() on it
+first. Shift search uses a GIN-indexed tsvector instead of FTS5.
+"""
+import re
+from contextlib import contextmanager
+from functools import lru_cache
+
+import psycopg
+import psycopg_pool
+from psycopg.pq import TransactionStatus
+
+import storage
+from pool import PoolTimeout
+
+# the catalog rev is spread over this many rows, picked per session, so shift
+# writers on different connections don't all queue on one row lock
+CATALOG_STRIPES = 16
+
+_DML = re.compile(r"\s*(INSERT|UPDATE|DELETE|WITH)\b", re.I)
+_INSERT = re.compile(r"\s*INSERT\s+INTO\s+(\w+)", re.I)
+# tables keyed by something other than an id column, or filled by INSERT ... SELECT
+# with ids copied from elsewhere: no RETURNING id for these
+_NO_ID = {"calendar_feed", "catalog_version", "api_token", "schema_version", "shift_rollup", "volunteer_rollup",
+          "shift_archive", "signup_archive"}
+
+_row_classes = {}
+
+def _row_class(names):
+    cls = _row_classes.get(names)
+    if cls is None:
+        index = {n: i for i, n in enumerate(names)}
+
+        class Row(tuple):
+            __slots__ = ()
+
+            def __getitem__(self, key):
+                return tuple.__getitem__(self, index[key] if isinstance(key, str) else key)
+
+            def keys(self):
+                return list(names)
+
+        cls = _row_classes[names] = Row
+    return cls
+
+def _rows(cursor):
+    """psycopg row factory: tuples that also index by column name, like sqlite3.Row."""
+    if cursor.description is None:
+        return tuple
+    return _row_class(tuple(c.name for c in cursor.description))
+
+# what _pg_sql() has to look at: quoted strings and identifiers, comments and
+# dollar-quoted bodies (copied over whole), and the bare ? and % between them
+_SQL_TOKEN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/|\$([A-Za-z_]\w*|)\$.*?\$\1\$|[?%]""", re.S)
+
+def _pg_token(m):
+    tok = m.group(0)
+    if tok == "?":
+        return "%s"
+    # psycopg reads % as the start of a placeholder even inside a string literal
+    return tok.replace("%", "%%")
+
+@lru_cache(maxsize=1024)
+def _pg_query(sql):
+    return _SQL_TOKEN.sub(_pg_token, sql)
+
+def _pg_sql(sql, params):
+    """Rewrite ? placeholders to psycopg's %s, leaving a ? inside quotes or comments alone.
+
+    Parameters always go with it (empty if there are none), so psycopg reads the
+    escaped %% the same way whether or not the statement takes any.
+    """
+    return _pg_query(sql), params or ()
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._cur = conn.raw.cursor()
+        self.lastrowid = None
+        self.row_factory = None  # accepted for sqlite3 compatibility; rows are always Row
+
+    def execute(self, sql, params=()):
+        self._conn._begin_if_dml(sql)
+        self.lastrowid = None
+        m = _INSERT.match(sql)
+        returning = m and m.group(1).lower() not in _NO_ID and " RETURNING " not in sql.upper()
+        if returning:
+            sql += " RETURNING id"
+        self._cur.execute(*_pg_sql(sql, params))
+        if returning:
+            row = self._cur.fetchone()
+            self.lastrowid = row[0] if row else None
+        return self
+
+    def executemany(self, sql, seq):
+        seq = list(seq)
+        self._conn._begin_if_dml(sql)
+        if seq:
+            self._cur.executemany(_pg_sql(sql, seq[0])[0], seq)
+        return self
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size):
+        return self._cur.fetchmany(size)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def close(self):
+        self._cur.close()
+
+
+class _Connection:
+    """sqlite3.Connection look-alike over an autocommit psycopg connection."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def in_transaction(self):
+        return self.raw.info.transaction_status != TransactionStatus.IDLE
+
+    def _begin_if_dml(self, sql):
+        # sqlite3 opens a transaction before a data change; so do we
+        if not self.in_transaction and _DML.match(sql):
+            self.raw.execute("BEGIN")
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def execute(self, sql, params=()):
+        return _Cursor(self).execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return _Cursor(self).executemany(sql, seq)
+
+    def commit(self):
+        if self.in_transaction:
+            self.raw.execute("COMMIT")
+
+    def rollback(self):
+        if self.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+    def close(self):
+        self.raw.close()
+
+
+class _Pool:
+    """acquire / release / stats / close over psycopg_pool, as pool.ConnectionPool has."""
+
+    def __init__(self, url, size, timeout):
+        self.size = size
+        self._pool = psycopg_pool.ConnectionPool(
+            url, min_size=1, max_size=size, timeout=timeout, open=True,
+            kwargs={"autocommit": True, "row_factory": _rows},
+        )
+
+    def acquire(self):
+        try:
+            return _Connection(self._pool.getconn())
+        except psycopg_pool.PoolTimeout as e:
+            raise PoolTimeout(str(e)) from e
+
+    def release(self, conn):
+        """Return a connection; anything left uncommitted is rolled back."""
+        try:
+            conn.rollback()
+        except psycopg.Error:
+            pass  # the pool checks and replaces broken connections
+        self._pool.putconn(conn.raw)
+
+    def close(self):
+        self._pool.close()
+
+    def stats(self):
+        s = self._pool.get_stats()
+        return {
+            "size": self.size,
+            "open": s.get("pool_size", 0),
+            "in_use": s.get("pool_size", 0) - s.get("pool_available", 0),
+            "idle": s.get("pool_available", 0),
+            "checkouts": s.get("requests_num", 0),
+            "waits": s.get("requests_queued", 0),
+            "timeouts": s.get("requests_errors", 0),
+        }
+
+
+# Times stay 'YYYY-MM-DDTHH:MM:SS' text, as on SQLite, so app.py compares and
+# orders them the same way on both.
+TABLES = """
+CREATE TABLE IF NOT EXISTS app_user (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  email TEXT UNIQUE NOT NULL,
+  password_hash TEXT NOT NULL,
+  role TEXT NOT NULL CHECK (role IN ('ADMIN','VOLUNTEER'))
+);
+
+CREATE TABLE IF NOT EXISTS shift (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  title TEXT NOT NULL,
+  location TEXT,
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  capacity  INTEGER NOT NULL DEFAULT 1,
+  taken     INTEGER NOT NULL DEFAULT 0,
+  wait_ct   INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS signup (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  shift_id BIGINT NOT NULL REFERENCES shift(id) ON DELETE CASCADE,
+  user_id  BIGINT NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT DEFAULT to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD HH24:MI:SS'),
+  starts_at TEXT,
+  ends_at   TEXT,
+  UNIQUE (shift_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS waitlist (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  shift_id BIGINT NOT NULL REFERENCES shift(id) ON DELETE CASCADE,
+  user_id  BIGINT NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT DEFAULT to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD HH24:MI:SS'),
+  UNIQUE (shift_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS availability (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  user_id  BIGINT NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  preference INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS calendar_feed (
+  user_id BIGINT PRIMARY KEY REFERENCES app_user(id) ON DELETE CASCADE,
+  token TEXT UNIQUE,
+  rev BIGINT NOT NULL DEFAULT 0,
+  changed_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS catalog_version (
+  id INTEGER PRIMARY KEY,
+  rev BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS outbox (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  kind TEXT NOT NULL,
+  recipient TEXT NOT NULL,
+  subject TEXT NOT NULL,
+  body TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','sent','failed')),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL DEFAULT to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD"T"HH24:MI:SS.MS'),
+  next_attempt_at TEXT NOT NULL DEFAULT to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD"T"HH24:MI:SS.MS'),
+  sent_at TEXT,
+  last_error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS api_token (
+  token_hash TEXT PRIMARY KEY,
+  user_id BIGINT NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  name TEXT,
+  created_at TEXT NOT NULL DEFAULT to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD HH24:MI:SS')
+);
+"""
+
+# The same denormalized data as the SQLite triggers in storage.py maintain.
+TRIGGERS = f"""
+CREATE OR REPLACE FUNCTION signup_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    UPDATE shift SET taken = taken - 1 WHERE id = OLD.shift_id;
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    UPDATE shift SET taken = taken + 1 WHERE id = NEW.shift_id;
+  END IF;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS signup_counts ON signup;
+CREATE TRIGGER signup_counts AFTER INSERT OR DELETE OR UPDATE OF shift_id ON signup
+  FOR EACH ROW EXECUTE FUNCTION signup_counts();
+
+CREATE OR REPLACE FUNCTION waitlist_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    UPDATE shift SET wait_ct = wait_ct - 1 WHERE id = OLD.shift_id;
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    UPDATE shift SET wait_ct = wait_ct + 1 WHERE id = NEW.shift_id;
+  END IF;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS waitlist_counts ON waitlist;
+CREATE TRIGGER waitlist_counts AFTER INSERT OR DELETE OR UPDATE OF shift_id ON waitlist
+  FOR EACH ROW EXECUTE FUNCTION waitlist_counts();
+
+CREATE OR REPLACE FUNCTION signup_times() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  SELECT starts_at, ends_at INTO NEW.starts_at, NEW.ends_at FROM shift WHERE id = NEW.shift_id;
+  RETURN NEW;
+END $$;
+DROP TRIGGER IF EXISTS signup_times ON signup;
+CREATE TRIGGER signup_times BEFORE INSERT ON signup FOR EACH ROW EXECUTE FUNCTION signup_times();
+
+CREATE OR REPLACE FUNCTION shift_times() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE signup SET starts_at = NEW.starts_at, ends_at = NEW.ends_at WHERE shift_id = NEW.id;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS shift_times ON shift;
+CREATE TRIGGER shift_times AFTER UPDATE OF starts_at, ends_at ON shift
+  FOR EACH ROW EXECUTE FUNCTION shift_times();
+
+-- a user deleted along with their signups gets no feed row
+CREATE OR REPLACE FUNCTION calendar_signup() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE uid BIGINT := CASE WHEN TG_OP = 'DELETE' THEN OLD.user_id ELSE NEW.user_id END;
+BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  SELECT uid, 1, to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD"T"HH24:MI:SS')
+  WHERE EXISTS (SELECT 1 FROM app_user WHERE id = uid)
+  ON CONFLICT (user_id) DO UPDATE SET rev = calendar_feed.rev + 1, changed_at = excluded.changed_at;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS calendar_signup ON signup;
+CREATE TRIGGER calendar_signup AFTER INSERT OR DELETE ON signup
+  FOR EACH ROW EXECUTE FUNCTION calendar_signup();
+
+CREATE OR REPLACE FUNCTION calendar_shift() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO calendar_feed(user_id, rev, changed_at)
+  SELECT user_id, 1, to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD"T"HH24:MI:SS') FROM signup WHERE shift_id = NEW.id
+  ON CONFLICT (user_id) DO UPDATE SET rev = calendar_feed.rev + 1, changed_at = excluded.changed_at;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS calendar_shift ON shift;
+CREATE TRIGGER calendar_shift AFTER UPDATE OF title, location, starts_at, ends_at ON shift
+  FOR EACH ROW EXECUTE FUNCTION calendar_shift();
+
+-- once per statement rather than per row, on this session's stripe
+INSERT INTO catalog_version(id, rev) SELECT generate_series(1, {CATALOG_STRIPES}), 0 ON CONFLICT DO NOTHING;
+CREATE OR REPLACE FUNCTION catalog_bump() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE catalog_version SET rev = rev + 1 WHERE id = 1 + pg_backend_pid() % {CATALOG_STRIPES};
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS catalog_bump ON shift;
+CREATE TRIGGER catalog_bump AFTER INSERT OR UPDATE OR DELETE ON shift
+  FOR EACH STATEMENT EXECUTE FUNCTION catalog_bump();
+"""
+
+def _minutes(starts, ends):
+    return f"CAST(round(EXTRACT(EPOCH FROM CAST({ends} AS timestamp) - CAST({starts} AS timestamp)) / 60) AS INTEGER)"
+
+# As storage.ROLLUP_TABLES, but shift_rollup is striped like catalog_version:
+# each session adds to its own stripe of a bucket, so signups on different
+# shifts of one busy day don't queue on a single row.
+ROLLUP_TABLES = """
+CREATE TABLE IF NOT EXISTS shift_rollup (
+  day TEXT NOT NULL,
+  location TEXT NOT NULL,
+  stripe INTEGER NOT NULL DEFAULT 0,
+  shifts INTEGER NOT NULL DEFAULT 0,
+  capacity INTEGER NOT NULL DEFAULT 0,
+  taken INTEGER NOT NULL DEFAULT 0,
+  wait_ct INTEGER NOT NULL DEFAULT 0,
+  full_shifts INTEGER NOT NULL DEFAULT 0,
+  minutes BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, location, stripe)
+);
+CREATE TABLE IF NOT EXISTS volunteer_rollup (
+  user_id BIGINT NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  month TEXT NOT NULL,
+  shifts INTEGER NOT NULL DEFAULT 0,
+  minutes BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, user_id)
+);
+"""
+
+# a bucket's rows are summed when read, so removing OLD from this session's stripe is fine
+ROLLUP_TRIGGERS = f"""
+CREATE OR REPLACE FUNCTION shift_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE st INTEGER := pg_backend_pid() % {CATALOG_STRIPES};
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    INSERT INTO shift_rollup AS r (day, location, stripe, shifts, capacity, taken, wait_ct, full_shifts, minutes)
+    VALUES (substr(OLD.starts_at, 1, 10), COALESCE(OLD.location, ''), st, -1, -OLD.capacity, -OLD.taken,
+            -OLD.wait_ct, -CAST(OLD.taken >= OLD.capacity AS INTEGER),
+            -OLD.taken * {_minutes("OLD.starts_at", "OLD.ends_at")})
+    ON CONFLICT (day, location, stripe) DO UPDATE SET
+      shifts = r.shifts + excluded.shifts, capacity = r.capacity + excluded.capacity,
+      taken = r.taken + excluded.taken, wait_ct = r.wait_ct + excluded.wait_ct,
+      full_shifts = r.full_shifts + excluded.full_shifts, minutes = r.minutes + excluded.minutes;
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    INSERT INTO shift_rollup AS r (day, location, stripe, shifts, capacity, taken, wait_ct, full_shifts, minutes)
+    VALUES (substr(NEW.starts_at, 1, 10), COALESCE(NEW.location, ''), st, 1, NEW.capacity, NEW.taken,
+            NEW.wait_ct, CAST(NEW.taken >= NEW.capacity AS INTEGER),
+            NEW.taken * {_minutes("NEW.starts_at", "NEW.ends_at")})
+    ON CONFLICT (day, location, stripe) DO UPDATE SET
+      shifts = r.shifts + excluded.shifts, capacity = r.capacity + excluded.capacity,
+      taken = r.taken + excluded.taken, wait_ct = r.wait_ct + excluded.wait_ct,
+      full_shifts = r.full_shifts + excluded.full_shifts, minutes = r.minutes + excluded.minutes;
+  END IF;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS shift_rollup ON shift;
+CREATE TRIGGER shift_rollup AFTER INSERT OR DELETE OR UPDATE OF location, starts_at, ends_at, capacity, taken, wait_ct
+  ON shift FOR EACH ROW EXECUTE FUNCTION shift_rollup();
+
+CREATE OR REPLACE FUNCTION volunteer_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' AND OLD.starts_at IS NOT NULL THEN
+    UPDATE volunteer_rollup SET shifts = shifts - 1, minutes = minutes - {_minutes("OLD.starts_at", "OLD.ends_at")}
+    WHERE user_id = OLD.user_id AND month = substr(OLD.starts_at, 1, 7);
+  END IF;
+  IF TG_OP <> 'DELETE' AND NEW.starts_at IS NOT NULL THEN
+    INSERT INTO volunteer_rollup AS r (user_id, month, shifts, minutes)
+    VALUES (NEW.user_id, substr(NEW.starts_at, 1, 7), 1, {_minutes("NEW.starts_at", "NEW.ends_at")})
+    ON CONFLICT (month, user_id) DO UPDATE SET shifts = r.shifts + 1, minutes = r.minutes + excluded.minutes;
+  END IF;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS volunteer_rollup ON signup;
+CREATE TRIGGER volunteer_rollup AFTER INSERT OR DELETE OR UPDATE OF user_id, starts_at, ends_at
+  ON signup FOR EACH ROW EXECUTE FUNCTION volunteer_rollup();
+"""
+
+# As storage.ARCHIVE_TABLES; the archive tables feed the rollups through the same functions.
+ARCHIVE_TABLES = """
+CREATE TABLE IF NOT EXISTS shift_archive (
+  id BIGINT PRIMARY KEY,
+  title TEXT NOT NULL,
+  location TEXT,
+  starts_at TEXT NOT NULL,
+  ends_at   TEXT NOT NULL,
+  capacity  INTEGER NOT NULL,
+  taken     INTEGER NOT NULL,
+  wait_ct   INTEGER NOT NULL,
+  archived_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signup_archive (
+  id BIGINT PRIMARY KEY,
+  shift_id BIGINT NOT NULL REFERENCES shift_archive(id) ON DELETE CASCADE,
+  user_id  BIGINT NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+  created_at TEXT,
+  starts_at TEXT,
+  ends_at   TEXT,
+  UNIQUE (shift_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_shift_archive_starts ON shift_archive(starts_at);
+CREATE INDEX IF NOT EXISTS idx_signup_archive_user_time ON signup_archive(user_id, starts_at);
+"""
+
+ARCHIVE_VIEWS = storage.ARCHIVE_VIEWS.replace("CREATE VIEW IF NOT EXISTS", "CREATE OR REPLACE VIEW")
+
+ARCHIVE_TRIGGERS = """
+DROP TRIGGER IF EXISTS shift_rollup ON shift_archive;
+CREATE TRIGGER shift_rollup AFTER INSERT OR DELETE ON shift_archive FOR EACH ROW EXECUTE FUNCTION shift_rollup();
+DROP TRIGGER IF EXISTS volunteer_rollup ON signup_archive;
+CREATE TRIGGER volunteer_rollup AFTER INSERT OR DELETE ON signup_archive FOR EACH ROW EXECUTE FUNCTION volunteer_rollup();
+"""
+
+# what search() matches: title words weigh more than location words
+SEARCH_DOC = (
+    "(setweight(to_tsvector('simple', title), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(location, '')), 'B'))"
+)
+
+INDEXES = f"""
+CREATE INDEX IF NOT EXISTS idx_shift_ends_starts ON shift(ends_at, starts_at);
+CREATE INDEX IF NOT EXISTS idx_shift_starts ON shift(starts_at);
+CREATE INDEX IF NOT EXISTS idx_shift_search ON shift USING gin ({SEARCH_DOC});
+CREATE INDEX IF NOT EXISTS idx_signup_user_time ON signup(user_id, starts_at, ends_at);
+CREATE INDEX IF NOT EXISTS idx_waitlist_shift_created ON waitlist(shift_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_availability_user_starts ON availability(user_id, starts_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(next_attempt_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_api_token_user ON api_token(user_id);
+"""
+
+# serializes migrations across hosts starting at once
+SCHEMA_LOCK_KEY = 0x5348494654  # "SHIFT"
+
+
+class PostgresBackend(storage.Backend):
+    """A PostgreSQL database shared by any number of app processes."""
+
+    name = "postgresql"
+    IntegrityError = psycopg.IntegrityError
+    skip_locked = "FOR UPDATE SKIP LOCKED"
+
+    def __init__(self, url, size=8, timeout=10.0):
+        super().__init__(_Pool(url, size, timeout))
+
+    def baseline(self, db):
+        with db.raw.transaction():
+            db.raw.execute(TABLES)
+            db.raw.execute(TRIGGERS)
+            db.raw.execute(INDEXES)
+        # created with the triggers in place: no counters to fill in
+        return set()
+
+    @contextmanager
+    def schema_lock(self, db):
+        db.raw.execute("SELECT pg_advisory_lock(%s)", (SCHEMA_LOCK_KEY,))
+        try:
+            yield
+        finally:
+            db.rollback()
+            db.raw.execute("SELECT pg_advisory_unlock(%s)", (SCHEMA_LOCK_KEY,))
+
+    def create_index(self, db, name, table, columns, where=None):
+        # CONCURRENTLY doesn't block writes while it builds, and can't run in a transaction
+        db.commit()
+        valid = db.execute(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+            " WHERE c.relname = ? AND pg_table_is_visible(c.oid)", (name,)
+        ).fetchone()
+        if valid is not None and not valid[0]:
+            db.raw.execute(f"DROP INDEX CONCURRENTLY {name}")  # left behind by an interrupted build
+        db.raw.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}({columns})" + (f" WHERE {where}" if where else "")
+        )
+
+    def rollup_schema(self, db):
+        with db.raw.transaction():
+            db.raw.execute(ROLLUP_TABLES)
+            db.raw.execute(ROLLUP_TRIGGERS)
+
+    def archive_schema(self, db):
+        with db.raw.transaction():
+            db.raw.execute(ARCHIVE_TABLES)
+            db.raw.execute(ARCHIVE_VIEWS)
+            db.raw.execute(ARCHIVE_TRIGGERS)
+
+    def begin_write(self, db):
+        db.raw.execute("BEGIN")
+
+    def lock(self, db, table, ids):
+        if ids:
+            db.execute(f"SELECT 1 FROM {table} WHERE id = ANY(?) ORDER BY id FOR UPDATE", (sorted(ids),)).fetchall()
+
+    def now(self, offset=False):
+        ts = "(now() AT TIME ZONE 'utc'" + (" + CAST(? AS interval))" if offset else ")")
+        return f"""to_char({ts}, 'YYYY-MM-DD"T"HH24:MI:SS.MS')"""
+
+    def minutes(self, starts, ends):
+        return _minutes(starts, ends)
+
+    def iso_time(self, col):
+        return f"""to_char(CAST({col} AS timestamp), 'YYYY-MM-DD"T"HH24:MI:SS')"""
+
+    def id_table(self, *cols):
+        if len(cols) == 1:
+            return f"(SELECT CAST(value AS BIGINT) AS {cols[0]} FROM json_array_elements_text(CAST(? AS json)))"
+        picks = ", ".join(f"CAST(value->>{i} AS BIGINT) AS {c}" for i, c in enumerate(cols))
+        return f"(SELECT {picks} FROM json_array_elements(CAST(? AS json)))"
+
+    def search(self, q):
+        words = re.findall(r"\w+", q.lower())
+        if not words:
+            return None
+        query = " & ".join(f"{w}:*" for w in words)
+        sql = f"""
+          SELECT s.*, f.rank AS rank
+          FROM (
+            SELECT id, -ts_rank({SEARCH_DOC}, to_tsquery('simple', ?)) AS rank
+            FROM shift WHERE {SEARCH_DOC} @@ to_tsquery('simple', ?)
+          ) f JOIN shift s ON s.id = f.id
+          WHERE 1=1
+        """
+        return sql, [query, query]
+
+    def explain(self, db, sql, params=()):
+        return [r[0] for r in db.execute("EXPLAIN " + sql, params)]
+
+    def stream(self, db, sql, params, batch_size):
+        # a named (server-side) cursor only fetches batch_size rows at a time
+        with db.raw.transaction(), db.raw.cursor(name="stream") as cur:
+            cur.itersize = batch_size
+            cur.execute(*_pg_sql(sql, params))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
@@ -1,5 +1,5 @@
 # tests/conftest.py
-import pathlib, sys, importlib
+import os, pathlib, sys, importlib, uuid
 import pytest
 
 # Ensure repo root on path
@@ -7,12 +7,26 @@ ROOT = pathlib.Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 mod = importlib.import_module("app")
-flask_app = getattr(mod, "app")
+
+# set to a postgresql:// URL to run the suite against PostgreSQL (each test gets its own schema)
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "sqlite_only: relies on SQLite internals (query plans, PRAGMAs, the pool)")
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE_URL:
+        skip = pytest.mark.skip(reason="SQLite-specific")
+        for item in items:
+            if "sqlite_only" in item.keywords:
+                item.add_marker(skip)
 
 @pytest.fixture
-def app():
-    flask_app.config.update(TESTING=True)
-    return flask_app
+def app(tmp_path):
+    """A new app on an empty temp SQLite database seeded by init_db()."""
+    yield mod.create_app({"TESTING": True, "DB_PATH": str(tmp_path / "shifts.db"), "DATABASE_URL": None,
+                          "OUTBOX_FILE": str(tmp_path / "outbox.jsonl")}, init=True)
+    mod.close_pools()
 
 @pytest.fixture
 def client(app):
@@ -35,3 +49,77 @@ def user_client(app):
         s["role"] = "VOLUNTEER"
     return c
 
+
+@pytest.fixture
+def fresh_app(tmp_path):
+    """A new app on an empty temp database seeded by init_db(), CSRF off."""
+    config = {"TESTING": True, "WTF_CSRF_ENABLED": False, "DB_PATH": str(tmp_path / "shifts.db"),
+              "DATABASE_URL": None, "OUTBOX_FILE": str(tmp_path / "outbox.jsonl")}
+    schema = None
+    if TEST_DATABASE_URL:
+        schema = _pg_schema("create")
+        sep = "&" if "?" in TEST_DATABASE_URL else "?"
+        config["DATABASE_URL"] = f"{TEST_DATABASE_URL}{sep}options=-csearch_path%3D{schema}"
+    # the caches are per process, and every test's database reuses the same ids
+    for cache in (mod.home_cache, mod.user_cache, mod.ics_cache):
+        cache.clear()
+    yield mod.create_app(config, init=True)
+    mod.close_pools()
+    if schema:
+        _pg_schema("drop", schema)
+
+@pytest.fixture
+def login(fresh_app):
+    """login(uid=None, role="VOLUNTEER") -> a fresh_app test client with that session."""
+    def login(uid=None, role="VOLUNTEER"):
+        c = fresh_app.test_client()
+        with c.session_transaction() as s:
+            if uid is not None:
+                s["uid"] = uid
+            s["role"] = role
+        return c
+    return login
+
+@pytest.fixture
+def fresh_admin(login):
+    """admin_client for fresh_app."""
+    return login(role="ADMIN")
+
+@pytest.fixture
+def make_user(fresh_app):
+    """make_user(email=None, role="VOLUNTEER", password_hash="x") -> id of a new user in fresh_app's database."""
+    n = iter(range(1_000_000))
+    def make_user(email=None, role="VOLUNTEER", password_hash="x"):
+        with fresh_app.app_context():
+            db = mod.get_db()
+            uid = db.execute("INSERT INTO app_user(email,password_hash,role) VALUES (?,?,?)",
+                             (email or f"user{next(n)}@test", password_hash, role)).lastrowid
+            db.commit()
+        return uid
+    return make_user
+
+@pytest.fixture
+def make_shift(fresh_app):
+    """make_shift(title=..., starts_at=..., ..., signups=(), waitlist=()) -> id of a new shift.
+
+    `signups` and `waitlist` are user ids, booked and queued in that order.
+    """
+    def make_shift(title="Shift", location="Hall", starts_at="2031-07-01T09:00:00",
+                   ends_at="2031-07-01T12:00:00", capacity=1, signups=(), waitlist=()):
+        with fresh_app.app_context():
+            db = mod.get_db()
+            sid = db.execute("INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,?)",
+                             (title, location, starts_at, ends_at, capacity)).lastrowid
+            db.executemany("INSERT INTO signup(shift_id,user_id) VALUES (?,?)", [(sid, u) for u in signups])
+            # same created_at second for everyone: id keeps the order
+            db.executemany("INSERT INTO waitlist(shift_id,user_id) VALUES (?,?)", [(sid, u) for u in waitlist])
+            db.commit()
+        return sid
+    return make_shift
+
+def _pg_schema(action, name=None):
+    import psycopg
+    name = name or "t_" + uuid.uuid4().hex[:12]
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {name}" if action == "create" else f"DROP SCHEMA {name} CASCADE")
+    return name
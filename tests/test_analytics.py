@@ -0,0 +1,80 @@
+import pytest
+import app as appmod
+import migrations
+
+@pytest.fixture
+def setup(make_user, make_shift):
+    users = [make_user(f"a{i}@test") for i in range(4)]
+    shifts = [make_shift("Pantry", "Hall", "2031-03-03T09:00:00", "2031-03-03T12:00:00", 2),  # Monday, 3 h
+              make_shift("Garden", "Park", "2031-03-05T10:00:00", "2031-03-05T11:30:00", 1),  # same week, 1.5 h
+              make_shift("Pantry", "Hall", "2031-03-11T09:00:00", "2031-03-11T11:00:00", 3)]  # next week
+    return users, shifts
+
+def _rollups(db):
+    # summed per bucket (PostgreSQL keeps one row per stripe), without init_db()'s example shift
+    return (
+        [tuple(map(str, r[:2])) + tuple(int(n) for n in r[2:]) for r in db.execute(
+            "SELECT day, location, SUM(shifts), SUM(capacity), SUM(taken), SUM(wait_ct), SUM(full_shifts), "
+            "SUM(minutes) FROM shift_rollup WHERE day >= '2031' GROUP BY day, location HAVING SUM(shifts) != 0 "
+            "ORDER BY day, location")],
+        [tuple(r) for r in db.execute("SELECT user_id, month, shifts, minutes FROM volunteer_rollup "
+                                      "WHERE shifts != 0 ORDER BY user_id, month")],
+    )
+
+def test_rollups_follow_every_write_path(fresh_app, setup):
+    (u1, u2, u3, u4), (s1, s2, s3) = setup
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        with appmod.write_transaction(db):
+            appmod.book_signup(db, u1, s1, "allow")
+            first, _ = appmod.book_signup(db, u2, s1, "allow")
+            appmod.book_signup(db, u1, s2, "allow")
+            appmod.book_signup(db, u3, s3, "allow")
+        db.execute("INSERT INTO waitlist(shift_id,user_id) VALUES (?,?)", (s1, u3))
+        db.execute("INSERT INTO waitlist(shift_id,user_id) VALUES (?,?)", (s1, u4))
+        db.commit()
+        with appmod.write_transaction(db):
+            appmod.cancel_signup(db, first)  # u3 is promoted off the waitlist
+        # moved to another day and place, and made longer
+        db.execute("UPDATE shift SET location='Depot', starts_at='2031-03-12T08:00:00', ends_at='2031-03-12T12:00:00', "
+                   "capacity=4 WHERE id=?", (s3,))
+        db.execute("DELETE FROM shift WHERE id=?", (s2,))
+        db.commit()
+
+        live = _rollups(db)
+        migrations.rebuild_rollups(db, appmod.get_backend())
+        assert _rollups(db) == live
+        shifts, volunteers = live
+        assert shifts == [
+            ("2031-03-03", "Hall", 1, 2, 2, 1, 1, 360),
+            ("2031-03-12", "Depot", 1, 4, 1, 0, 0, 240),
+        ]
+        assert volunteers == [(u1, "2031-03", 1, 180), (u3, "2031-03", 2, 420)]
+
+def test_dashboard_reads_rollups(fresh_app, fresh_admin, setup):
+    (u1, u2, u3, u4), (s1, s2, s3) = setup
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        with appmod.write_transaction(db):
+            for uid in (u1, u2):
+                appmod.book_signup(db, uid, s1, "allow")
+            appmod.book_signup(db, u1, s3, "allow")
+        db.execute("INSERT INTO waitlist(shift_id,user_id) VALUES (?,?)", (s1, u3))
+        db.commit()
+
+    c = fresh_admin
+    a = c.get("/admin/analytics.json?from=2031-03-01&to=2031-03-31").json
+    assert a["totals"] == {"shifts": 3, "capacity": 6, "taken": 3, "fill_rate": 0.5, "waiting": 1,
+                           "full_shifts": 1, "hours": 8.0, "active_volunteers": 2}
+    assert [(w["week"], w["shifts"], w["taken"]) for w in a["weeks"]] == [("2031-03-03", 2, 2), ("2031-03-10", 1, 1)]
+    assert a["locations"][0]["location"] == "Hall" and a["locations"][0]["waiting"] == 1
+    assert [(v["email"], v["shifts"], v["hours"]) for v in a["volunteers"]] == [("a0@test", 2, 5.0), ("a1@test", 1, 3.0)]
+
+    assert c.get("/admin/analytics.json?from=2031-04-01&to=2031-04-30").json["totals"]["shifts"] == 0
+    assert c.get("/admin/analytics.json?from=nope").status_code == 400
+    page = c.get("/admin/analytics?from=2031-03-01&to=2031-03-31")
+    assert page.status_code == 200 and b"a0@test" in page.data
+
+def test_rebuild_command(fresh_app, setup):
+    out = fresh_app.test_cli_runner().invoke(args=["rebuild-rollups"]).output
+    assert "rollups rebuilt" in out
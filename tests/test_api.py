@@ -0,0 +1,117 @@
+import os, time
+
+import pytest
+
+import app as appmod
+
+# generous ceiling per call on a test database; CI boxes are slow, regressions are not subtle
+LATENCY_BUDGET_MS = float(os.environ.get("API_LATENCY_BUDGET_MS", 250))
+
+def _at(hour):
+    return f"2031-05-01T{hour:02d}:00:00"
+
+@pytest.fixture
+def api(fresh_app, make_user, make_shift):
+    """(test client, volunteer headers, admin headers, shift ids)."""
+    uid = make_user("v@test")
+    sids = [make_shift("A", starts_at=_at(8), ends_at=_at(10), capacity=2),
+            make_shift("B", starts_at=_at(9), ends_at=_at(11)),
+            make_shift("C", starts_at=_at(12), ends_at=_at(14), capacity=2)]
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        admin = db.execute("SELECT id FROM app_user WHERE role='ADMIN'").fetchone()[0]
+        vol = {"Authorization": "Bearer " + appmod.issue_api_token(db, uid)}
+        adm = {"Authorization": "Bearer " + appmod.issue_api_token(db, admin)}
+    return fresh_app.test_client(), vol, adm, sids
+
+def test_token_login_and_auth_skip_session(api):
+    c, vol, _, _ = api
+    r = c.post("/api/v1/tokens", json={"email": "admin@example.com", "password": "admin123"})
+    assert r.status_code == 201 and r.json["user"]["role"] == "ADMIN"
+    assert c.post("/api/v1/tokens", json={"email": "admin@example.com", "password": "nope"}).status_code == 401
+
+    assert c.get("/api/v1/me").status_code == 401
+    assert c.get("/api/v1/me", headers={"Authorization": "Bearer bogus"}).status_code == 401
+    r = c.get("/api/v1/me", headers=vol)
+    assert r.json == {"id": r.json["id"], "email": "v@test", "role": "VOLUNTEER"}
+    assert "Set-Cookie" not in r.headers
+    assert b" " not in r.data  # compact separators
+
+    assert c.delete("/api/v1/tokens/current", headers=vol).status_code == 204
+    assert c.get("/api/v1/me", headers=vol).status_code == 401
+
+def test_field_selection(api):
+    c, vol, _, sids = api
+    r = c.get(f"/api/v1/shifts/{sids[0]}?fields=id,taken", headers=vol)
+    assert r.json == {"id": sids[0], "taken": 0}
+    r = c.get("/api/v1/shifts?fields=title&limit=2&q=A", headers=vol)
+    assert r.json["shifts"] == [{"title": "A"}] and r.json["next"] is None
+    assert c.get("/api/v1/shifts?fields=password_hash", headers=vol).status_code == 400
+
+def test_batch_signup_cancel_and_availability(fresh_app, api, monkeypatch):
+    c, vol, adm, sids = api
+    monkeypatch.setitem(fresh_app.config, "SIGNUP_CONFLICTS", "reject")
+    # A (8-10) and B (9-11) overlap: B is rejected because A was booked earlier in the batch
+    r = c.post("/api/v1/signups", json={"shift_ids": [sids[0], sids[1], sids[2], 9999, sids[0]]}, headers=vol)
+    statuses = [(x["shift_id"], x["status"]) for x in r.json["results"]]
+    assert statuses == [(sids[0], "signed_up"), (sids[1], "overlap"), (sids[2], "signed_up"), (9999, "not_found")]
+    assert r.json["results"][1]["overlaps"] == sids[0]
+
+    r = c.get(f"/api/v1/shifts/availability?ids={sids[0]},{sids[1]},4242", headers=vol)
+    assert r.json["missing"] == [4242]
+    assert {s["id"]: s["free"] for s in r.json["shifts"]} == {sids[0]: 1, sids[1]: 1}
+
+    mine = c.get("/api/v1/me/signups?fields=signup_id,shift_id", headers=vol).json["signups"]
+    assert [m["shift_id"] for m in mine] == [sids[0], sids[2]]
+    r = c.post("/api/v1/signups/cancel", json={"signup_ids": [mine[0]["signup_id"], 123456]}, headers=vol)
+    assert [x["status"] for x in r.json["results"]] == ["cancelled", "not_found"]
+
+    r = c.post("/api/v1/waitlist", json={"shift_ids": [sids[1], sids[2]]}, headers=vol)
+    assert [x["status"] for x in r.json["results"]] == ["waiting", "already_signed_up"]
+    assert c.post("/api/v1/signups", json={"shift_ids": list(range(1000))}, headers=vol).status_code == 400
+
+def test_cancel_only_own_signups(fresh_app, api):
+    c, vol, adm, sids = api
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        other = db.execute("INSERT INTO signup(shift_id,user_id) VALUES (?,1)", (sids[2],)).lastrowid
+        db.commit()
+    assert c.post("/api/v1/signups/cancel", json={"signup_ids": [other]}, headers=vol).json["results"][0]["status"] == "not_found"
+    assert c.post("/api/v1/signups/cancel", json={"signup_ids": [other]}, headers=adm).json["results"][0]["status"] == "cancelled"
+
+def test_admin_endpoints(api):
+    c, vol, adm, _ = api
+    assert c.get("/api/v1/users", headers=vol).status_code == 403
+    assert [u["email"] for u in c.get("/api/v1/users", headers=adm).json["users"]] == ["admin@example.com", "v@test"]
+    r = c.post("/api/v1/shifts", headers=adm, json={"shifts": [
+        {"title": "New", "location": "Hall", "starts_at": "2031-06-01T09:00", "ends_at": "2031-06-01T10:00", "capacity": 3},
+        {"title": "Bad", "starts_at": "2031-06-01T09:00", "ends_at": "2031-06-01T08:00"},
+    ]})
+    assert r.status_code == 201
+    assert (r.json["created"], r.json["invalid"], r.json["errors"][0]["index"]) == (1, 1, 1)
+    assert c.post("/api/v1/shifts", headers=vol, json={"shifts": []}).status_code == 403
+
+@pytest.mark.parametrize("method,path,body", [
+    ("get", "/api/v1/me", None),
+    ("get", "/api/v1/shifts?limit=50", None),
+    ("get", "/api/v1/shifts/availability?ids={ids}", None),
+    ("get", "/api/v1/me/signups", None),
+    ("post", "/api/v1/signups", {"shift_ids": "ids"}),
+    ("post", "/api/v1/signups/cancel", {"signup_ids": [1, 2, 3]}),
+])
+def test_endpoint_latency(api, make_shift, method, path, body):
+    c, vol, _, sids = api
+    sids = sids + [make_shift(f"L{i}", starts_at=_at(14 + i % 8), ends_at=_at(15 + i % 8), capacity=5)
+                   for i in range(97)]
+    ids = ",".join(map(str, sids))
+    timings = []
+    for _ in range(10):
+        kwargs = {"headers": vol}
+        if body is not None:
+            kwargs["json"] = {k: (sids if v == "ids" else v) for k, v in body.items()}
+        t0 = time.perf_counter()
+        r = getattr(c, method)(path.format(ids=ids), **kwargs)
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200
+    timings.sort()
+    assert timings[len(timings) // 2] < LATENCY_BUDGET_MS, timings
@@ -2,12 +2,7 @@
 import app as appmod
 from uuid import uuid4
 
-def test_index_and_ics():
-    app = appmod.app
-    # Fresh app context + (re)create tables/seed
-    with app.app_context():
-        appmod.init_db()
-
+def test_index_and_ics(app):
     client = app.test_client()
 
     # Home works
@@ -21,7 +16,7 @@ def test_index_and_ics():
         db = appmod.get_db()
         db.execute(
             "INSERT OR IGNORE INTO app_user(email,password_hash,role) VALUES (?,?,?)",
-            (unique_email, appmod.generate_password_hash("x", method=appmod.HASH_METHOD), "VOLUNTEER"),
+            (unique_email, appmod.get_hasher().hash("x"), "VOLUNTEER"),
         )
         db.commit()
         user_id = db.execute("SELECT id FROM app_user WHERE email=?", (unique_email,)).fetchone()[0]
@@ -36,3 +31,16 @@ def test_index_and_ics():
     if r.status_code == 200:
         ct = r.headers.get("Content-Type", "")
         assert "text/calendar" in ct or "text/plain" in ct  # tolerate dev headers
+
+def test_create_app_builds_independent_apps(tmp_path):
+    one = appmod.create_app({"DB_PATH": str(tmp_path / "one.db"), "DATABASE_URL": None, "PAGE_SIZE": 5}, init=True)
+    two = appmod.create_app({"DB_PATH": str(tmp_path / "two.db"), "DATABASE_URL": None}, init=False)
+    try:
+        assert one is not two and one.config["PAGE_SIZE"] == 5 != two.config["PAGE_SIZE"]
+        assert {"auth", "web", "admin", "api", "ops"} <= set(one.blueprints)
+        assert "migrate" in one.cli.commands
+        with one.app_context():
+            assert appmod.get_repo().user_count() == 1
+        assert not (tmp_path / "two.db").exists()  # init=False leaves the database alone
+    finally:
+        appmod.close_pools()
@@ -0,0 +1,76 @@
+import csv, io
+import pytest
+import app as appmod
+import migrations
+
+@pytest.fixture
+def setup(fresh_app, make_user, make_shift):
+    """Two shifts long over (one with a leftover waitlist), one recently over, one upcoming."""
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("DELETE FROM shift")
+        db.commit()
+    a0, a1, a2 = users = [make_user(f"a{i}@test") for i in range(3)]
+    shifts = [make_shift("Old A", starts_at="2020-01-06T09:00:00", ends_at="2020-01-06T12:00:00",
+                         signups=[a0], waitlist=[a2]),
+              make_shift("Old B", starts_at="2020-02-03T09:00:00", ends_at="2020-02-03T10:00:00", capacity=2,
+                         signups=[a0, a1]),
+              make_shift("Recent", starts_at=appmod.archive_cutoff(2), ends_at=appmod.archive_cutoff(1), capacity=2,
+                         signups=[a0]),
+              make_shift("Next", starts_at="2031-01-06T09:00:00", ends_at="2031-01-06T12:00:00", capacity=2,
+                         signups=[a0])]
+    return users, shifts
+
+def _rollups(db):
+    return ([tuple(int(n) for n in r) for r in db.execute(
+                "SELECT SUM(shifts), SUM(capacity), SUM(taken), SUM(wait_ct), SUM(full_shifts), SUM(minutes) "
+                "FROM shift_rollup")],
+            [tuple(r) for r in db.execute(
+                "SELECT user_id, month, shifts, minutes FROM volunteer_rollup WHERE shifts != 0 ORDER BY user_id, month")])
+
+def test_archives_in_batches_and_keeps_rollups(fresh_app, setup):
+    users, (old_a, old_b, recent, upcoming) = setup
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        before = _rollups(db)
+        moved = appmod.archive_past_shifts(db, batch_size=1)
+        assert moved == (2, 3, 1)
+        assert {r[0] for r in db.execute("SELECT id FROM shift")} == {recent, upcoming}
+        assert {r[0] for r in db.execute("SELECT id FROM shift_archive")} == {old_a, old_b}
+        assert tuple(db.execute("SELECT taken, wait_ct FROM shift_archive WHERE id=?", (old_a,)).fetchone()) == (1, 1)
+        assert db.execute("SELECT COUNT(*) FROM signup_archive").fetchone()[0] == 3
+        assert db.execute("SELECT COUNT(*) FROM waitlist").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM signup").fetchone()[0] == 2
+
+        # the analytics don't lose the archived season
+        assert _rollups(db) == before
+        migrations.rebuild_rollups(db, appmod.get_backend())
+        assert _rollups(db) == before
+        assert appmod.archive_past_shifts(db) == (0, 0, 0)
+
+    out = fresh_app.test_cli_runner().invoke(args=["archive-shifts", "--days", "0"]).output
+    assert "1 shift(s), 1 signup(s) archived" in out
+
+def test_listings_include_archive_when_asked(fresh_app, fresh_admin, login, setup):
+    users, (old_a, old_b, recent, upcoming) = setup
+    with fresh_app.app_context():
+        appmod.archive_past_shifts(appmod.get_db())
+
+    admin = fresh_admin
+    assert b"Old A" not in admin.get("/admin/shifts").data
+    page = admin.get("/admin/shifts?archived=1&limit=3").data
+    assert b"Old A" not in page and b"archived=1" in page  # on page 2, and the pager keeps the flag
+    page = admin.get("/admin/shifts?archived=1").data
+    assert b"Old A" in page and b"Old B" in page and b"Next" in page
+
+    def titles(query):
+        rows = list(csv.reader(io.StringIO(admin.get("/admin/signups.csv" + query).data.decode())))[1:]
+        return sorted(r[0] for r in rows)
+    assert titles("") == ["Next", "Recent"]
+    assert titles("?archived=1") == ["Next", "Old A", "Old B", "Old B", "Recent"]
+    assert titles("?archived=1&to=2020-01-31") == ["Old A"]
+
+    me = login(users[0])
+    assert b"Old A" not in me.get("/my").data
+    page = me.get("/my?archived=1").data
+    assert b"Old A" in page and b"Old B" in page and b"Next" in page
@@ -0,0 +1,83 @@
+import io
+from datetime import date, datetime
+import pytest
+import app as appmod
+
+def _shifts(app):
+    with app.app_context():
+        return appmod.get_db().execute(
+            "SELECT title, location, starts_at, ends_at, capacity FROM shift WHERE title != 'Food Bank Morning Shift' "
+            "ORDER BY starts_at"
+        ).fetchall()
+
+def test_expand_weekly_series_with_exclusions(fresh_app):
+    with fresh_app.app_context():
+        occ = list(appmod.expand_series(
+            datetime(2031, 1, 6, 9), datetime(2031, 1, 6, 12), "weekly",  # a Monday
+            weekdays=[0, 3], until=date(2031, 1, 20), exclude=[date(2031, 1, 9)],
+        ))
+    assert [s.date() for s, _ in occ] == [date(2031, 1, 6), date(2031, 1, 13), date(2031, 1, 16), date(2031, 1, 20)]
+    assert all((e - s).seconds == 3 * 3600 for s, e in occ)
+
+def test_series_rejects_weekdays_out_of_range(fresh_app, fresh_admin):
+    with fresh_app.app_context():
+        for weekdays in ([2, 9], [-1]):
+            with pytest.raises(ValueError, match="weekday must be 0-6"):
+                list(appmod.expand_series(datetime(2031, 1, 1, 9), datetime(2031, 1, 1, 10), "weekly",
+                                          count=3, weekdays=weekdays))
+    form = {"title": "Pantry", "location": "Hall", "starts_at": "2031-01-01T09:00", "ends_at": "2031-01-01T11:00",
+            "capacity": "4", "freq": "weekly", "interval": "1", "count": "3", "weekdays": ["2", "9"]}
+    r = fresh_admin.post("/admin/shifts/series", data=form, follow_redirects=True)
+    assert b"Invalid series: weekday must be 0-6" in r.data and _shifts(fresh_app) == []
+
+def test_expand_daily_series_count_and_interval(fresh_app):
+    with fresh_app.app_context():
+        occ = list(appmod.expand_series(datetime(2031, 1, 1, 9), datetime(2031, 1, 1, 10), "daily",
+                                        interval=2, count=3))
+        assert [s.day for s, _ in occ] == [1, 3, 5]
+        with pytest.raises(ValueError):
+            list(appmod.expand_series(datetime(2031, 1, 1, 9), datetime(2031, 1, 1, 10), "daily"))
+
+def test_series_form_creates_and_skips_duplicates(fresh_app, fresh_admin):
+    admin = fresh_admin
+    form = {"title": "Pantry", "location": "Hall", "starts_at": "2031-02-01T09:00", "ends_at": "2031-02-01T11:00",
+            "capacity": "4", "freq": "daily", "interval": "1", "count": "5"}
+    r = admin.post("/admin/shifts/series", data=form, follow_redirects=True)
+    assert b"5 shift(s) created, 0 skipped" in r.data
+    r = admin.post("/admin/shifts/series", data={**form, "count": "7"}, follow_redirects=True)
+    assert b"2 shift(s) created, 5 skipped" in r.data
+    rows = _shifts(fresh_app)
+    assert len(rows) == 7 and rows[0]["starts_at"] == "2031-02-01T09:00:00" and rows[0]["capacity"] == 4
+
+def test_csv_import_counts(fresh_app, fresh_admin, monkeypatch):
+    monkeypatch.setitem(fresh_app.config, "BULK_BATCH_SIZE", 2)
+    data = (
+        "title,location,starts_at,ends_at,capacity\n"
+        "A,Hall,2031-03-01T09:00,2031-03-01T10:00,3\n"
+        "B,,2031-03-02 09:00,2031-03-02 10:00,\n"
+        "A,Hall,2031-03-01T09:00,2031-03-01T10:00,3\n"
+        "Bad,Hall,2031-03-03T10:00,2031-03-03T09:00,1\n"
+        ",Hall,nope,2031-03-03T09:00,1\n"
+        "C,Park,2031-03-04T09:00,2031-03-04T12:00,2\n"
+    )
+    r = fresh_admin.post(
+        "/admin/shifts/import",
+        data={"file": (io.BytesIO(data.encode()), "shifts.csv")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert b"3 shift(s) created, 1 skipped as duplicates, 2 invalid" in r.data
+    assert b"Row 5: end time must be after the start time" in r.data
+    assert [(x["title"], x["starts_at"]) for x in _shifts(fresh_app)] == [
+        ("A", "2031-03-01T09:00:00"), ("B", "2031-03-02T09:00:00"), ("C", "2031-03-04T09:00:00"),
+    ]
+
+def test_csv_import_missing_column(fresh_app, fresh_admin):
+    r = fresh_admin.post(
+        "/admin/shifts/import",
+        data={"file": (io.BytesIO(b"title,starts_at\nA,2031-03-01T09:00\n"), "s.csv")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert b"missing column(s): ends_at" in r.data
+    assert _shifts(fresh_app) == []
@@ -0,0 +1,71 @@
+import threading
+import app as appmod
+
+THREADS = 40
+
+def _hammer(login, uids, path_for):
+    """Fire one POST per user, all released at once; return any thread errors."""
+    start, errors = threading.Barrier(len(uids)), []
+
+    def worker(uid):
+        client = login(uid)
+        start.wait()
+        try:
+            r = client.post(path_for(uid))
+            assert r.status_code == 302, r.status_code
+        except Exception as e:  # surfaced to the main thread below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in uids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+def _state(sid):
+    db = appmod.get_db()
+    shift = db.execute("SELECT taken, wait_ct, capacity FROM shift WHERE id=?", (sid,)).fetchone()
+    real = db.execute("SELECT COUNT(*) FROM signup WHERE shift_id=?", (sid,)).fetchone()[0]
+    return shift, real
+
+def test_concurrent_signups_never_overbook(fresh_app, login, make_user, make_shift):
+    uids = [make_user() for _ in range(THREADS)]
+    sid = make_shift(title="Hot Shift", capacity=5)
+
+    assert _hammer(login, uids, lambda uid: f"/shifts/{sid}/signups") == []
+
+    with fresh_app.app_context():
+        shift, real = _state(sid)
+        assert real == shift["taken"] == 5
+
+def test_concurrent_cancels_promote_without_overbooking(fresh_app, login, make_user, make_shift):
+    uids = [make_user() for _ in range(THREADS * 2)]
+    booked, waiting = uids[:THREADS // 2], uids[THREADS // 2:]
+    sid = make_shift(title="Hot Shift", capacity=THREADS // 2, signups=booked, waitlist=waiting)
+    with fresh_app.app_context():
+        signup_of = dict(appmod.get_db().execute("SELECT user_id, id FROM signup WHERE shift_id=?", (sid,)).fetchall())
+
+    # every booked volunteer cancels at once; each cancel promotes one waiter
+    assert _hammer(login, booked, lambda uid: f"/signups/{signup_of[uid]}/cancel") == []
+
+    with fresh_app.app_context():
+        shift, real = _state(sid)
+        assert real == shift["taken"] == shift["capacity"]
+        assert shift["wait_ct"] == len(waiting) - len(booked)
+        promoted = {r[0] for r in appmod.get_db().execute("SELECT user_id FROM signup WHERE shift_id=?", (sid,))}
+        assert promoted == set(waiting[:len(booked)])
+
+def test_cancel_only_own_signups(fresh_app, login, make_user, make_shift):
+    owner, other, admin = make_user(), make_user(), make_user(role="ADMIN")
+    sid = make_shift(signups=[owner])
+    with fresh_app.app_context():
+        signup_id = appmod.get_db().execute("SELECT id FROM signup WHERE shift_id=?", (sid,)).fetchone()[0]
+
+    r = login(other).post(f"/signups/{signup_id}/cancel", follow_redirects=True)
+    assert b"Signup not found" in r.data
+    with fresh_app.app_context():
+        assert _state(sid)[1] == 1
+    login(admin, "ADMIN").post(f"/signups/{signup_id}/cancel")
+    with fresh_app.app_context():
+        assert _state(sid)[1] == 0
@@ -0,0 +1,82 @@
+import itertools, random
+import pytest
+import app as appmod
+from datetime import datetime, timedelta
+
+BASE = datetime(2031, 4, 1, 9, 0)
+
+def _at(h):
+    return appmod.iso_no_seconds(BASE + timedelta(hours=h))
+
+def _signed_up(app, uid):
+    with app.app_context():
+        return {r[0] for r in appmod.get_db().execute("SELECT shift_id FROM signup WHERE user_id=?", (uid,))}
+
+def test_overlapping_signup_rejected(fresh_app, login, make_user, make_shift):
+    uid = make_user()
+    client = login(uid)
+    first = make_shift("First", starts_at=_at(0), ends_at=_at(3))
+    clash = make_shift(starts_at=_at(2), ends_at=_at(4))
+    after = make_shift(starts_at=_at(3), ends_at=_at(4))
+    client.post(f"/shifts/{first}/signups")
+    r = client.post(f"/shifts/{clash}/signups", follow_redirects=True)
+    assert b"overlaps First" in r.data
+    client.post(f"/shifts/{after}/signups")  # back to back is fine
+    assert _signed_up(fresh_app, uid) == {first, after}
+
+def test_warn_mode_books_anyway(fresh_app, monkeypatch, login, make_user, make_shift):
+    monkeypatch.setitem(fresh_app.config, "SIGNUP_CONFLICTS", "warn")
+    uid = make_user()
+    client = login(uid)
+    a = make_shift("First", starts_at=_at(0), ends_at=_at(3))
+    b = make_shift(starts_at=_at(1), ends_at=_at(2))
+    client.post(f"/shifts/{a}/signups")
+    r = client.post(f"/shifts/{b}/signups", follow_redirects=True)
+    assert b"Heads up: this overlaps First" in r.data
+    assert _signed_up(fresh_app, uid) == {a, b}
+
+def test_signup_times_follow_shift_edits(fresh_app, login, make_user, make_shift):
+    uid = make_user()
+    client = login(uid)
+    a = make_shift(starts_at=_at(0), ends_at=_at(2))
+    b = make_shift(starts_at=_at(5), ends_at=_at(7))
+    client.post(f"/shifts/{a}/signups")
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("UPDATE shift SET starts_at='2031-04-01T13:00:00', ends_at='2031-04-01T15:00:00' WHERE id=?", (a,))
+        db.commit()
+        assert tuple(db.execute("SELECT starts_at, ends_at FROM signup WHERE shift_id=?", (a,)).fetchone()) == \
+            ("2031-04-01T13:00:00", "2031-04-01T15:00:00")
+        assert appmod.find_overlap(db, uid, b)["id"] == a
+
+@pytest.mark.sqlite_only
+def test_overlap_check_uses_interval_index(fresh_app):
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        plan = " ".join(r["detail"] for r in db.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM signup x WHERE x.user_id=? AND x.starts_at < ? AND x.ends_at > ?",
+            (1, "2031", "2030"),
+        ))
+        assert "idx_signup_user_time" in plan
+
+def test_conflict_report_matches_brute_force(fresh_app, fresh_admin, make_user, make_shift):
+    rnd = random.Random(7)
+    starts = [rnd.randrange(0, 200) for _ in range(60)]
+    spans = [(h, h + rnd.choice([1, 2, 3, 6])) for h in starts]
+    uids = [make_user() for _ in range(8)]
+    picks = {u: set(rnd.sample(range(60), 12)) for u in uids}
+    for i, (a, b) in enumerate(spans):
+        make_shift(f"S{i}", starts_at=_at(a), ends_at=_at(b), capacity=8, signups=[u for u in uids if i in picks[u]])
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        got = {(r["user_id"], frozenset((r["first_id"], r["second_id"]))) for r in appmod.find_conflicts(db)}
+        want = set()
+        for u in uids:
+            rows = db.execute("SELECT shift_id, starts_at, ends_at FROM signup WHERE user_id=?", (u,)).fetchall()
+            for a, b in itertools.combinations(rows, 2):
+                if a["starts_at"] < b["ends_at"] and b["starts_at"] < a["ends_at"]:
+                    want.add((u, frozenset((a["shift_id"], b["shift_id"]))))
+        assert want and got == want
+        assert appmod.find_conflicts(db, since="2032-01-01T00:00:00") == []
+
+    assert b"overlapping pair(s)" in fresh_admin.get("/admin/conflicts?all=1").data
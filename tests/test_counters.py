@@ -0,0 +1,42 @@
+import app as appmod
+
+def _counts(shift_id):
+    r = appmod.get_db().execute("SELECT taken, wait_ct FROM shift WHERE id=?", (shift_id,)).fetchone()
+    return r["taken"], r["wait_ct"]
+
+def test_counters_follow_signup_waitlist_and_cancel(fresh_app, login, make_user, make_shift):
+    sid = make_shift(title="Counted")
+    ca, cb = login(make_user()), login(make_user())
+    ca.post(f"/shifts/{sid}/signups")
+    cb.post(f"/shifts/{sid}/waitlist")
+    with fresh_app.app_context():
+        assert _counts(sid) == (1, 1)
+        signup_id = appmod.get_db().execute("SELECT id FROM signup WHERE shift_id=?", (sid,)).fetchone()[0]
+
+    # cancel promotes b off the waitlist: still one taken, none waiting
+    ca.post(f"/signups/{signup_id}/cancel")
+    with fresh_app.app_context():
+        assert _counts(sid) == (1, 0)
+
+def test_waitlist_for_missing_shift(fresh_app, login, make_user):
+    r = login(make_user()).post("/shifts/999999/waitlist", follow_redirects=True)
+    assert b"Shift not found" in r.data and b"already on the waitlist" not in r.data
+    with fresh_app.app_context():
+        assert appmod.get_db().execute("SELECT COUNT(*) FROM waitlist").fetchone()[0] == 0
+
+def test_reconcile_reports_and_fixes_drift(fresh_app, make_user, make_shift):
+    sid = make_shift(title="Counted", capacity=2, signups=[make_user()])
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("UPDATE shift SET taken=7, wait_ct=3 WHERE id=?", (sid,))
+        db.commit()
+
+        drift = appmod.reconcile_counters(db)
+        assert [(r["id"], r["real_taken"], r["real_wait_ct"]) for r in drift] == [(sid, 1, 0)]
+        assert _counts(sid) == (1, 0)
+        assert appmod.reconcile_counters(db) == []
+
+def test_reconcile_cli(fresh_app):
+    result = fresh_app.test_cli_runner().invoke(args=["reconcile-counters"])
+    assert result.exit_code == 0
+    assert "0 shift(s) corrected" in result.output
@@ -0,0 +1,42 @@
+import csv, gzip, io
+import pytest
+import app as appmod
+from datetime import datetime, timedelta
+
+@pytest.fixture
+def seed(fresh_app, make_shift, make_user):
+    """Three daily shifts with the same five volunteers on each; returns the shift ids."""
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("DELETE FROM shift")
+        db.commit()
+    uids = [make_user(f"v{i}@test") for i in range(5)]
+    base = datetime(2031, 3, 1, 9, 0)
+    return [make_shift(f"Day {d}", starts_at=appmod.iso_no_seconds(base + timedelta(days=d)),
+                       ends_at=appmod.iso_no_seconds(base + timedelta(days=d, hours=2)), capacity=10, signups=uids)
+            for d in range(3)]
+
+def _rows(data):
+    return list(csv.reader(io.StringIO(data.decode())))
+
+def test_streams_all_rows_in_small_batches(fresh_app, fresh_admin, seed, monkeypatch):
+    monkeypatch.setitem(fresh_app.config, "EXPORT_BATCH_SIZE", 2)
+    r = fresh_admin.get("/admin/signups.csv")
+    assert r.is_streamed
+    rows = _rows(r.data)
+    assert rows[0] == ["shift_title", "starts_at", "ends_at", "user_email"]
+    assert len(rows) == 1 + 15
+    assert rows[1] == ["Day 0", "2031-03-01T09:00:00", "2031-03-01T11:00:00", "v0@test"]
+
+def test_filters_by_date_range_and_shift(fresh_admin, seed):
+    sids, admin = seed, fresh_admin
+    rows = _rows(admin.get("/admin/signups.csv?from=2031-03-02&to=2031-03-02").data)[1:]
+    assert {r[0] for r in rows} == {"Day 1"} and len(rows) == 5
+    rows = _rows(admin.get(f"/admin/signups.csv?shift_id={sids[2]}").data)[1:]
+    assert {r[0] for r in rows} == {"Day 2"}
+    assert admin.get("/admin/signups.csv?from=nope").status_code == 302
+
+def test_gzip_when_accepted(fresh_admin, seed):
+    r = fresh_admin.get("/admin/signups.csv", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert len(_rows(gzip.decompress(r.data))) == 16
@@ -0,0 +1,55 @@
+import app as appmod
+
+def test_repeat_visits_hit_until_a_write(fresh_app, login, make_user, make_shift):
+    sid = make_shift("Cached", capacity=2)
+    c = fresh_app.test_client()
+    assert b"2 spots left" in c.get("/?q=Cached").data
+    before = appmod.home_cache.stats()
+    assert b"2 spots left" in c.get("/?q=Cached").data
+    assert appmod.home_cache.stats()["hits"] == before["hits"] + 1
+
+    # a signup only touches the counters, which still moves the catalog rev
+    login(make_user()).post(f"/shifts/{sid}/signups")
+    assert b"1 spots left" in c.get("/?q=Cached").data
+
+def test_every_shift_write_bumps_rev(fresh_app, make_user, make_shift):
+    sid, uid = make_shift("Cached", capacity=2), make_user()
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        revs = [appmod.catalog_rev(db)]
+        for sql, args in [
+            ("INSERT INTO waitlist(shift_id,user_id) VALUES (?,?)", (sid, uid)),
+            ("UPDATE shift SET title='Renamed' WHERE id=?", (sid,)),
+            ("DELETE FROM shift WHERE id=?", (sid,)),
+        ]:
+            db.execute(sql, args)
+            db.commit()
+            revs.append(appmod.catalog_rev(db))
+    assert revs == sorted(set(revs))
+
+def test_etag_revalidation(fresh_app, fresh_admin, make_shift):
+    sid = make_shift("Cached", capacity=2)
+    c = fresh_app.test_client()
+    for url in ("/", "/shifts.json"):
+        r = c.get(url)
+        etag = r.headers["ETag"]
+        assert r.status_code == 200 and etag
+        r = c.get(url, headers={"If-None-Match": etag})
+        assert r.status_code == 304 and not r.data
+
+    fresh_admin.post(f"/admin/shifts/{sid}/update", data={
+        "title": "Cached", "location": "Hall", "starts_at": "2031-07-01T09:00",
+        "ends_at": "2031-07-01T12:00", "capacity": "5"})
+    r = c.get("/shifts.json", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+
+def test_etag_differs_per_visitor(fresh_app, login, make_user, make_shift):
+    make_shift("Cached", capacity=2)
+    anon = fresh_app.test_client().get("/").headers["ETag"]
+    assert login(make_user()).get("/", headers={"If-None-Match": anon}).status_code == 200
+
+def test_stats_endpoint(fresh_app, fresh_admin, make_shift):
+    make_shift("Cached", capacity=2)
+    fresh_app.test_client().get("/")
+    caches = fresh_admin.get("/admin/stats.json").json["caches"]
+    assert {"hits", "misses", "evictions", "size", "catalog_rev"} <= set(caches["home"])
@@ -0,0 +1,65 @@
+import re
+import pytest
+import app as appmod
+
+UID = re.compile(rb"^UID:(.*)$", re.M)
+
+@pytest.fixture
+def volunteer(login, make_user, make_shift):
+    """(logged-in client, shift ids) for a volunteer signed up to two shifts."""
+    uid = make_user()
+    sids = [make_shift(f"Shift {i}", starts_at=f"2031-05-0{i + 1}T09:00:00", ends_at=f"2031-05-0{i + 1}T11:00:00",
+                       capacity=5, signups=[uid]) for i in range(2)]
+    return login(uid), sids
+
+def test_stable_uids_and_conditional_get(fresh_app, volunteer):
+    appmod.ics_cache.clear()
+    client, sids = volunteer
+    first = client.get("/my.ics")
+    assert first.status_code == 200
+    assert first.headers["ETag"] and first.headers["Last-Modified"]
+    assert UID.findall(first.data) == UID.findall(client.get("/my.ics").data)
+    assert len(UID.findall(first.data)) == 2
+
+    again = client.get("/my.ics", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+    # editing a shift the user is on changes the feed
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("UPDATE shift SET title='Renamed' WHERE id=?", (sids[0],))
+        db.commit()
+    changed = client.get("/my.ics", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200 and b"SUMMARY:Renamed" in changed.data
+    assert UID.findall(changed.data) == UID.findall(first.data)
+
+    # so does losing a signup, including through a cascading shift delete
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("DELETE FROM shift WHERE id=?", (sids[1],))
+        db.commit()
+    r = client.get("/my.ics", headers={"If-None-Match": changed.headers["ETag"]})
+    assert r.status_code == 200 and len(UID.findall(r.data)) == 1
+
+def test_other_users_changes_keep_feed_cached(fresh_app, volunteer, make_user):
+    appmod.ics_cache.clear()
+    client, sids = volunteer
+    etag = client.get("/my.ics").headers["ETag"]
+    other = make_user()
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("INSERT INTO signup(shift_id,user_id) VALUES (?,?)", (sids[0], other))
+        db.commit()
+    assert client.get("/my.ics", headers={"If-None-Match": etag}).status_code == 304
+
+def test_token_feed(fresh_app, volunteer):
+    client, _ = volunteer
+    page = client.get("/my")
+    url = re.search(rb'value="(http[^"]+/calendar/[^"]+\.ics)"', page.data).group(1).decode()
+    anon = fresh_app.test_client()
+    r = anon.get(url)
+    assert r.status_code == 200 and b"SUMMARY:Shift 0" in r.data
+
+    client.post("/my/calendar/reset")
+    assert anon.get(url).status_code == 404
+    assert anon.get("/calendar/nope.ics").status_code == 404
@@ -0,0 +1,100 @@
+import json, queue, socket, threading, time
+import pytest
+from werkzeug.serving import make_server
+import app as appmod
+import live
+
+@pytest.fixture
+def hub(fresh_app, monkeypatch):
+    monkeypatch.setattr(appmod.live_hub, "coalesce", 0.3)
+    yield appmod.live_hub
+    appmod.live_hub.stop()
+
+def _events(data):
+    return [json.loads(line[6:]) for line in data.decode().splitlines() if line.startswith("data: ")]
+
+def _next(chunks, timeout=5):
+    # a broken stream should fail the test, not hang it
+    box = queue.Queue()
+    threading.Thread(target=lambda: box.put(next(chunks)), daemon=True).start()
+    return box.get(timeout=timeout)
+
+def test_stream_sends_snapshot_then_coalesced_changes(fresh_app, hub, login, fresh_admin, make_user, make_shift):
+    u1, u2 = make_user(), make_user()
+    popular, quiet = make_shift("Popular"), make_shift("Quiet")
+    resp = fresh_app.test_client().get(f"/shifts/live?ids={popular},{quiet}", buffered=False)
+    assert resp.mimetype == "text/event-stream"
+    chunks = iter(resp.response)
+    first = _next(chunks)
+    assert first.startswith(b"retry: ")
+    assert _events(first) == [{str(popular): {"capacity": 1, "taken": 0, "wait_ct": 0},
+                               str(quiet): {"capacity": 1, "taken": 0, "wait_ct": 0}}]
+
+    # a signup and a waitlist join in one burst go out as one event, with only that shift
+    login(u1).post(f"/shifts/{popular}/signups")
+    login(u2).post(f"/shifts/{popular}/waitlist")
+    assert _events(_next(chunks)) == [{str(popular): {"capacity": 1, "taken": 1, "wait_ct": 1}}]
+
+    with fresh_app.app_context():
+        signup = appmod.get_db().execute("SELECT id FROM signup WHERE user_id=?", (u1,)).fetchone()[0]
+    login(u1).post(f"/signups/{signup}/cancel")  # u2 is promoted
+    assert _events(_next(chunks)) == [{str(popular): {"capacity": 1, "taken": 1, "wait_ct": 0}}]
+
+    fresh_admin.post(f"/admin/shifts/{popular}/delete")
+    assert _events(_next(chunks)) == [{str(popular): None}]
+    assert hub.stats()["subscribers"] == 1
+    resp.close()
+    assert hub.stats()["subscribers"] == 0
+
+def _read_until(sock, buf, marker):
+    while marker not in buf:
+        data = sock.recv(65536)
+        assert data, "connection closed"
+        buf += data
+    head, _, rest = buf.partition(marker)
+    return head, rest
+
+def test_handed_off_streams_hold_no_threads(fresh_app, hub, login, make_user, make_shift):
+    u1, popular = make_user(), make_shift("Popular", capacity=5)
+    server = make_server("127.0.0.1", 0, fresh_app, threaded=True, request_handler=live.RequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threads = threading.active_count()
+    n = 200
+    socks = [socket.create_connection(("127.0.0.1", server.port), timeout=5) for _ in range(n)]
+    try:
+        for s in socks:
+            s.sendall(f"GET /shifts/live?ids={popular} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        rest = []
+        for s in socks:
+            head, body = _read_until(s, b"", b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.0 200") and b"text/event-stream" in head
+            snapshot, body = _read_until(s, body, b"\n\n")
+            assert _events(snapshot + b"\n") == [{str(popular): {"capacity": 5, "taken": 0, "wait_ct": 0}}]
+            rest.append(body)
+        assert hub.stats()["subscribers"] == n
+        # the request threads are gone: only the hub's one thread stays
+        deadline = time.monotonic() + 5
+        while threading.active_count() > threads + 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert threading.active_count() <= threads + 1
+
+        login(u1).post(f"/shifts/{popular}/signups")
+        for s, body in zip(socks, rest):
+            event, _ = _read_until(s, body, b"\n\n")
+            assert _events(event + b"\n") == [{str(popular): {"capacity": 5, "taken": 1, "wait_ct": 0}}]
+    finally:
+        for s in socks:
+            s.close()
+        server.shutdown()
+    deadline = time.monotonic() + 5
+    while hub.stats()["subscribers"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert hub.stats()["subscribers"] == 0
+
+def test_bad_ids_and_full_hub(fresh_app, hub, monkeypatch):
+    c = fresh_app.test_client()
+    assert c.get("/shifts/live?ids=1,x").status_code == 400
+    assert c.get("/shifts/live?ids=" + ",".join(map(str, range(500)))).status_code == 400
+    monkeypatch.setattr(hub, "max_subscribers", 0)
+    resp = c.get("/shifts/live?ids=1")
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "30"
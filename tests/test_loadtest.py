@@ -0,0 +1,38 @@
+import pathlib, sys
+import app as appmod
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "bench"))
+import datagen  # noqa: E402
+import loadtest  # noqa: E402
+
+def _generate(app):
+    with app.app_context():
+        return datagen.generate(appmod.get_db(), shifts=200, users=100, signups=2000, report=lambda msg: None)
+
+def test_generated_data_is_consistent(fresh_app):
+    made = _generate(fresh_app)
+    assert made["users"] == 100 and abs(made["signups"] - 2000) < 100 and made["waitlists"] > 0
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        drifted = db.execute("""
+            SELECT COUNT(*) FROM shift s
+            WHERE taken != (SELECT COUNT(*) FROM signup WHERE shift_id = s.id) OR taken > capacity
+               OR wait_ct != (SELECT COUNT(*) FROM waitlist WHERE shift_id = s.id)
+        """).fetchone()[0]
+        assert drifted == 0
+        # only full shifts have a waitlist, and nobody waits for a shift they're on
+        assert db.execute("SELECT COUNT(*) FROM shift WHERE wait_ct > 0 AND taken < capacity").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM waitlist w JOIN signup s "
+                          "ON s.shift_id = w.shift_id AND s.user_id = w.user_id").fetchone()[0] == 0
+
+def test_every_scenario_runs_without_errors(fresh_app):
+    _generate(fresh_app)
+    results = loadtest.run(fresh_app, requests=16, warmup=2, report=lambda msg: None)
+    assert list(results) == list(loadtest.SCENARIOS)
+    assert all(r["n"] and not r["errors"] for r in results.values()), results
+
+def test_compare_flags_only_real_regressions():
+    def run(**ms):
+        return {"scenarios": {name: {"p95_ms": v} for name, v in ms.items()}}
+    rows = loadtest.compare(run(home=10.0, search=0.5, ics=4.0), run(home=14.0, search=0.9, ics=4.2), threshold=0.25)
+    assert {name: regressed for name, *_, regressed in rows} == {"home": True, "search": False, "ics": False}
@@ -0,0 +1,68 @@
+import logging
+import app as appmod
+import metrics
+
+def test_histogram_renders_cumulative_buckets():
+    reg = metrics.Registry()
+    h = reg.histogram("t_seconds", "test", buckets=(0.1, 1.0), labels=("endpoint",))
+    for v in (0.05, 0.5, 0.5, 3):
+        h.observe(v, "x")
+    text = reg.render()
+    assert 't_seconds_bucket{endpoint="x",le="0.1"} 1' in text
+    assert 't_seconds_bucket{endpoint="x",le="1.0"} 3' in text
+    assert 't_seconds_bucket{endpoint="x",le="+Inf"} 4' in text
+    assert 't_seconds_count{endpoint="x"} 4' in text
+
+def test_requests_and_statements_are_counted(fresh_app):
+    c = fresh_app.test_client()
+    before = appmod.REQUEST_SECONDS.count("web.index", "GET")
+    statements = appmod.REQUEST_STATEMENTS.count("web.index")
+    c.get("/")
+    c.get("/")
+    assert appmod.REQUEST_SECONDS.count("web.index", "GET") == before + 2
+    assert appmod.REQUEST_STATEMENTS.count("web.index") == statements + 2
+
+    text = c.get("/metrics").data.decode()
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert 'http_requests_total{endpoint="web.index",method="GET",status="200"}' in text
+    assert 'db_pool_connections{state="in_use"}' in text and "outbox_depth " in text
+
+def test_metrics_token(fresh_app, monkeypatch):
+    monkeypatch.setitem(fresh_app.config, "METRICS_TOKEN", "s3cret")
+    c = fresh_app.test_client()
+    assert c.get("/metrics").status_code == 401
+    assert c.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+def test_repeated_statement_flagged_as_n_plus_one(fresh_app, monkeypatch, fresh_admin, make_user, make_shift):
+    monkeypatch.setitem(fresh_app.config, "N_PLUS_ONE_THRESHOLD", 4)
+    uid = make_user()
+    sids = [make_shift(f"M{i}", starts_at=f"2031-09-0{i + 1}T09:00:00", ends_at=f"2031-09-0{i + 1}T10:00:00",
+                       capacity=5) for i in range(5)]
+    with fresh_app.app_context():
+        headers = {"Authorization": "Bearer " + appmod.issue_api_token(appmod.get_db(), uid)}
+    c = fresh_app.test_client()
+    before = appmod.N_PLUS_ONE.value("api.api_sign_up")
+    # one signup per shift, each with its own capacity/overlap statements
+    assert c.post("/api/v1/signups", json={"shift_ids": sids}, headers=headers).status_code == 200
+    assert appmod.N_PLUS_ONE.value("api.api_sign_up") == before + 1
+    c.get("/api/v1/me", headers=headers)
+    assert appmod.N_PLUS_ONE.value("api.api_me") == 0
+
+    flagged = fresh_admin.get("/admin/stats.json").json["sql"]["n_plus_one"]
+    assert any(f["endpoint"] == "api.api_sign_up" and f["times"] >= 5 for f in flagged)
+
+def test_slow_statement_logged_with_plan(fresh_app, monkeypatch, caplog):
+    monkeypatch.setitem(fresh_app.config, "SLOW_QUERY_MS", 0)
+    appmod._reported.clear()
+    with caplog.at_level(logging.WARNING, logger=fresh_app.logger.name):
+        fresh_app.test_client().get("/?q=food")
+    slow = [s for s in appmod.slow_log if s["endpoint"] == "web.index" and s["sql"].startswith("SELECT")]
+    assert slow and all(s["plan"] for s in slow)
+    assert any("slow SQL" in r.getMessage() for r in caplog.records)
+
+def test_server_timing_header(fresh_app, monkeypatch):
+    c = fresh_app.test_client()
+    assert "Server-Timing" not in c.get("/").headers
+    monkeypatch.setitem(fresh_app.config, "SERVER_TIMING", True)
+    timing = c.get("/").headers["Server-Timing"]
+    assert timing.startswith("app;dur=") and "statements" in timing
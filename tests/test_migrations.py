@@ -0,0 +1,105 @@
+import pathlib, sqlite3
+import pytest
+import app as appmod
+import migrations
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+def test_fresh_database_records_every_version(fresh_app):
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        done = migrations.applied(db)
+        assert [a.version for a in done] == [m.version for m in migrations.MIGRATIONS]
+        assert all(a.duration_ms >= 0 and a.applied_at for a in done)
+        assert appmod.get_backend().init_schema(db) == []
+        assert migrations.pending(db) == []
+
+def test_failed_migration_rolls_back_and_reruns(fresh_app, monkeypatch):
+    calls = []
+
+    def up(db, backend):
+        db.execute("INSERT INTO shift(title,location,starts_at,ends_at,capacity) "
+                   "VALUES ('Half done','X','2031-01-01T09:00:00','2031-01-01T10:00:00',1)")
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    version = migrations.MIGRATIONS[-1].version + 1
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [
+        migrations.Migration(version, "flaky", up, True)])
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        with pytest.raises(RuntimeError):
+            migrations.migrate(db, appmod.get_backend())
+        count = "SELECT COUNT(*) FROM shift WHERE title='Half done'"
+        assert db.execute(count).fetchone()[0] == 0
+        assert [m.version for m in migrations.pending(db)] == [version]
+
+        seen = []
+        assert [a.version for a in migrations.migrate(db, appmod.get_backend(), report=seen.append)] == [version]
+        assert [a.name for a in seen] == ["flaky"]
+        assert db.execute(count).fetchone()[0] == 1
+
+def test_backfill_commits_in_batches(fresh_app):
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.executemany(
+            "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,'X','2031-01-01T09:00:00','2031-01-01T10:00:00',1)",
+            [(f"B{i}",) for i in range(5)],
+        )
+        db.commit()
+        n = migrations.backfill(db, "shift", "location = 'Y'", where="title LIKE 'B%'", batch_size=2)
+        assert n == 5 and not db.in_transaction
+        assert db.execute("SELECT COUNT(*) FROM shift WHERE location = 'Y'").fetchone()[0] == 5
+
+def test_cli_lists_and_applies(fresh_app):
+    runner = fresh_app.test_cli_runner()
+    out = runner.invoke(args=["migrate", "--list"]).output
+    assert "baseline schema" in out and "pending" not in out
+    assert "0 migration(s) applied" in runner.invoke(args=["migrate"]).output
+
+@pytest.mark.sqlite_only
+def test_upgrades_pre_migration_database(fresh_app, tmp_path, monkeypatch):
+    # a file from before versioning: no counters, no signup times, one-off time formats
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE app_user (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE NOT NULL,
+              password_hash TEXT NOT NULL, role TEXT NOT NULL);
+            CREATE TABLE shift (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, location TEXT,
+              starts_at TEXT NOT NULL, ends_at TEXT NOT NULL, capacity INTEGER NOT NULL DEFAULT 1);
+            CREATE TABLE signup (id INTEGER PRIMARY KEY AUTOINCREMENT, shift_id INTEGER NOT NULL,
+              user_id INTEGER NOT NULL, created_at TEXT DEFAULT CURRENT_TIMESTAMP, UNIQUE (shift_id, user_id));
+            CREATE TABLE waitlist (id INTEGER PRIMARY KEY AUTOINCREMENT, shift_id INTEGER NOT NULL,
+              user_id INTEGER NOT NULL, created_at TEXT DEFAULT CURRENT_TIMESTAMP, UNIQUE (shift_id, user_id));
+            INSERT INTO app_user VALUES (1, 'a@test', 'x', 'VOLUNTEER'), (2, 'b@test', 'x', 'VOLUNTEER');
+            INSERT INTO shift VALUES (1, 'Old', 'X', '2030-01-02T09:00', '2030-01-02 12:00', 1);
+            INSERT INTO signup(shift_id, user_id) VALUES (1, 1);
+            INSERT INTO waitlist(shift_id, user_id) VALUES (1, 2);
+        """)
+    conn.close()
+    monkeypatch.setitem(fresh_app.config, "DB_PATH", str(path))
+    with fresh_app.app_context():
+        appmod.init_db()
+        db = appmod.get_db()
+        shift = db.execute("SELECT starts_at, ends_at, taken, wait_ct FROM shift WHERE id=1").fetchone()
+        assert tuple(shift) == ("2030-01-02T09:00:00", "2030-01-02T12:00:00", 1, 1)
+        signup = db.execute("SELECT starts_at, ends_at FROM signup").fetchone()
+        assert tuple(signup) == ("2030-01-02T09:00:00", "2030-01-02T12:00:00")
+        assert migrations.pending(db) == []
+
+@pytest.mark.sqlite_only
+def test_waitlist_sweep_uses_partial_index(fresh_app):
+    with fresh_app.app_context():
+        plan = [r["detail"] for r in appmod.get_db().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM shift WHERE wait_ct > 0 AND taken < capacity")]
+    assert any("idx_shift_waiting" in d for d in plan), plan
+
+@pytest.mark.sqlite_only
+def test_schema_sql_is_current(fresh_app):
+    if not fresh_app.config["SEARCH_FTS"]:
+        pytest.skip("schema.sql includes the FTS5 index")
+    dumped = fresh_app.test_cli_runner().invoke(args=["schema-dump"]).output
+    checked_in = (ROOT / "schema.sql").read_text()
+    body = "".join(line for line in checked_in.splitlines(keepends=True) if not line.startswith("--")).lstrip("\n")
+    assert dumped == body, "schema.sql is out of date: regenerate it with flask schema-dump"
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+import app as appmod
+import outbox
+
+@pytest.fixture
+def setup(make_shift, make_user):
+    """setup(capacity=1, booked=1, waiting=1) -> (shift id, user ids: booked, then waiting)."""
+    def setup(capacity=1, booked=1, waiting=1):
+        uids = [make_user(f"o{i}@test") for i in range(booked + waiting)]
+        return make_shift("Pantry", capacity=capacity, signups=uids[:booked], waitlist=uids[booked:]), uids
+    return setup
+
+def _queued(app):
+    with app.app_context():
+        return [tuple(r) for r in appmod.get_db().execute(
+            "SELECT kind, recipient, status, attempts FROM outbox ORDER BY id")]
+
+def _mailbox(app):
+    with open(app.config["OUTBOX_FILE"], encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_cancel_queues_confirmation_and_promotion(fresh_app, login, setup):
+    sid, uids = setup()
+    with fresh_app.app_context():
+        signup_id = appmod.get_db().execute("SELECT id FROM signup WHERE shift_id=?", (sid,)).fetchone()[0]
+    login(uids[0]).post(f"/signups/{signup_id}/cancel")
+    assert _queued(fresh_app) == [("cancelled", "o0@test", "pending", 0), ("promoted", "o1@test", "pending", 0)]
+
+    r = fresh_app.test_cli_runner().invoke(args=["outbox-worker", "--once"])
+    assert "2 message(s) processed" in r.output
+    assert [(m["to"], m["subject"]) for m in _mailbox(fresh_app)] == [
+        ("o0@test", "Cancelled: Pantry"), ("o1@test", "You're in: Pantry")]
+    assert {q[2] for q in _queued(fresh_app)} == {"sent"}
+
+def test_shift_edit_notifies_only_on_visible_change(fresh_app, fresh_admin, setup):
+    sid, _ = setup(capacity=1, booked=1, waiting=1)
+    form = {"title": "Pantry", "location": "Hall", "starts_at": "2031-07-01T09:00",
+            "ends_at": "2031-07-01T12:00", "capacity": "1"}
+    c = fresh_admin
+    c.post(f"/admin/shifts/{sid}/update", data=form)
+    assert _queued(fresh_app) == []
+    c.post(f"/admin/shifts/{sid}/update", data={**form, "location": "Annex"})
+    assert sorted(q[:2] for q in _queued(fresh_app)) == [("shift_changed", "o0@test"), ("shift_changed", "o1@test")]
+
+    c.post(f"/admin/shifts/{sid}/delete")
+    assert sorted(q[:2] for q in _queued(fresh_app) if q[0] == "shift_deleted") == [
+        ("shift_deleted", "o0@test"), ("shift_deleted", "o1@test")]
+
+def test_rolled_back_change_queues_nothing(fresh_app, setup):
+    sid, uids = setup()
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        try:
+            with appmod.write_transaction(db):
+                db.execute("DELETE FROM signup WHERE shift_id=?", (sid,))
+                appmod.promote_waitlist(db, sid)
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+    assert _queued(fresh_app) == []
+
+class FlakyTransport(outbox.Transport):
+    def __init__(self, failures):
+        self.failures = failures
+
+    def send(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("refused")
+
+def test_failed_delivery_backs_off_then_gives_up(fresh_app, setup, monkeypatch):
+    sid, uids = setup(waiting=0)
+    monkeypatch.setitem(fresh_app.config, "OUTBOX_MAX_ATTEMPTS", 2)
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        appmod.enqueue(db, "test", [uids[0]], "hi", "body")
+        db.commit()
+        assert appmod.drain_outbox(db, FlakyTransport(5)) == 1
+        row = db.execute("SELECT status, attempts, last_error, next_attempt_at > created_at FROM outbox").fetchone()
+        assert tuple(row) == ("pending", 1, "ConnectionError: refused", 1)
+        # not due yet: the backoff keeps it out of the next batch
+        assert appmod.drain_outbox(db, FlakyTransport(5)) == 0
+
+        db.execute("UPDATE outbox SET next_attempt_at = created_at")
+        db.commit()
+        assert appmod.drain_outbox(db, FlakyTransport(5)) == 1
+        assert tuple(db.execute("SELECT status, attempts FROM outbox").fetchone()) == ("failed", 2)
+        stats = appmod.outbox_stats(db)
+    assert stats["depth"] == 0 and stats["failed"] >= 1 and stats["retried"] >= 1
+
+def test_worker_pool_drains_in_background(fresh_app, setup, monkeypatch):
+    monkeypatch.setitem(fresh_app.config, "OUTBOX_POLL_S", 0.05)
+    sid, uids = setup(waiting=0)
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        appmod.enqueue(db, "test", [uids[0]], "hi", "body")
+        db.commit()
+    pool = appmod.start_outbox_workers(fresh_app)
+    try:
+        for _ in range(100):
+            if _queued(fresh_app)[0][2] == "sent":
+                break
+            pool._stop.wait(0.05)
+    finally:
+        pool.stop()
+    assert _queued(fresh_app)[0][2] == "sent"
+    assert _mailbox(fresh_app) == [{"to": "o0@test", "subject": "hi", "body": "body"}]
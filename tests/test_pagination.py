@@ -0,0 +1,64 @@
+import base64, json
+import pytest
+import app as appmod
+from datetime import datetime, timedelta
+
+@pytest.fixture
+def seed(fresh_app, make_shift):
+    """seed(n): replace the example shift with n hourly ones, "Shift 00" first."""
+    def seed(n):
+        with fresh_app.app_context():
+            db = appmod.get_db()
+            db.execute("DELETE FROM shift")
+            db.commit()
+        start = datetime(2031, 7, 1, 9, 0)
+        for i in range(n):
+            s = start + timedelta(hours=i)
+            make_shift(f"Shift {i:02d}", starts_at=appmod.iso_no_seconds(s),
+                       ends_at=appmod.iso_no_seconds(s + timedelta(hours=1)), capacity=2)
+    return seed
+
+def _titles(payload):
+    return [s["title"] for s in payload["shifts"]]
+
+def test_json_pages_forward_and_back(fresh_app, seed):
+    seed(7)
+    client = fresh_app.test_client()
+
+    p1 = client.get("/shifts.json?limit=3").get_json()
+    assert _titles(p1) == ["Shift 00", "Shift 01", "Shift 02"]
+    assert p1["prev"] is None and p1["next"]
+
+    p2 = client.get(f"/shifts.json?limit=3&after={p1['next']}").get_json()
+    assert _titles(p2) == ["Shift 03", "Shift 04", "Shift 05"]
+    p3 = client.get(f"/shifts.json?limit=3&after={p2['next']}").get_json()
+    assert _titles(p3) == ["Shift 06"]
+    assert p3["next"] is None
+
+    back = client.get(f"/shifts.json?limit=3&before={p3['prev']}").get_json()
+    assert _titles(back) == _titles(p2)
+    first = client.get(f"/shifts.json?limit=3&before={back['prev']}").get_json()
+    assert _titles(first) == _titles(p1)
+    assert first["prev"] is None
+
+def test_page_size_config_and_bad_cursor(fresh_app, monkeypatch, seed):
+    monkeypatch.setitem(fresh_app.config, "PAGE_SIZE", 4)
+    seed(6)
+    client = fresh_app.test_client()
+    assert len(client.get("/shifts.json").get_json()["shifts"]) == 4
+    assert len(client.get("/shifts.json?after=%%%").get_json()["shifts"]) == 4
+
+def test_malformed_cursor_falls_back_to_first_page(fresh_app, seed):
+    seed(3)
+    client = fresh_app.test_client()
+    first = _titles(client.get("/shifts.json").get_json())
+    for values in ([[1], {"a": 1}], {"a": 1}, [True, 1], [None, 1]):
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        r = client.get("/shifts.json", query_string={"after": cursor})
+        assert r.status_code == 200 and _titles(r.get_json()) == first
+
+def test_admin_list_pages_newest_first(fresh_admin, seed):
+    seed(5)
+    r = fresh_admin.get("/admin/shifts?limit=2")
+    assert b"Shift 04" in r.data and b"Shift 03" in r.data and b"Shift 02" not in r.data
+    assert b"Next" in r.data
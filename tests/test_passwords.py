@@ -0,0 +1,39 @@
+import app as appmod
+import passwords
+
+def _stored(app):
+    with app.app_context():
+        return appmod.get_db().execute("SELECT password_hash FROM app_user WHERE email='p@test'").fetchone()[0]
+
+def test_hashes_in_worker_process():
+    hasher = passwords.Hasher(1000, workers=1)
+    try:
+        stored = hasher.hash("pw")
+        assert stored.startswith("pbkdf2:sha256:1000$")
+        assert hasher.verify(stored, "pw") and not hasher.verify(stored, "nope")
+        assert hasher.pending() == 0
+    finally:
+        hasher.shutdown()
+
+def test_login_rehashes_when_work_factor_changes(fresh_app, monkeypatch, make_user):
+    make_user("p@test", password_hash=passwords.Hasher(2000, workers=0).hash("pw"))
+    monkeypatch.setitem(fresh_app.config, "PASSWORD_HASH_ITERATIONS", 1000)
+    c = fresh_app.test_client()
+    assert c.post("/login", data={"email": "p@test", "password": "wrong"}).status_code == 200
+    assert _stored(fresh_app).startswith("pbkdf2:sha256:2000$")
+
+    assert c.post("/login", data={"email": "p@test", "password": "pw"}).status_code == 302
+    assert _stored(fresh_app).startswith("pbkdf2:sha256:1000$")
+    assert fresh_app.test_client().post("/login", data={"email": "p@test", "password": "pw"}).status_code == 302
+
+def test_full_queue_answers_503(fresh_app, monkeypatch, make_user):
+    make_user("p@test", password_hash=passwords.Hasher(1000, workers=0).hash("pw"))
+    monkeypatch.setitem(fresh_app.config, "PASSWORD_HASH_QUEUE", 0)
+    c = fresh_app.test_client()
+    before = appmod.PASSWORD_BUSY.value()
+    resp = c.post("/login", data={"email": "p@test", "password": "pw"})
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "1"
+    resp = c.post("/api/v1/tokens", json={"email": "p@test", "password": "pw"})
+    assert resp.status_code == 503 and "error" in resp.json
+    assert c.post("/register", data={"email": "new@test", "password": "pw"}).status_code == 503
+    assert appmod.PASSWORD_BUSY.value() == before + 3
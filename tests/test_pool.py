@@ -0,0 +1,48 @@
+import pytest
+import app as appmod
+from pool import ConnectionPool, PoolTimeout
+
+@pytest.mark.sqlite_only
+def test_connections_are_reused_and_tuned(fresh_app):
+    client = fresh_app.test_client()
+    for _ in range(5):
+        assert client.get("/").status_code == 200
+    with fresh_app.app_context():
+        stats = appmod.get_pool().stats()
+        assert stats["open"] == 1 and stats["in_use"] == 0
+        assert stats["checkouts"] >= 5
+        db = appmod.get_db()
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert db.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert db.execute("PRAGMA busy_timeout").fetchone()[0] == fresh_app.config["DB_BUSY_TIMEOUT_MS"]
+
+def test_exhausted_pool_waits_then_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "p.db"), size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert pool.stats()["waits"] == 1 and pool.stats()["timeouts"] == 1
+
+def test_release_rolls_back_and_drops_closed(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "p.db"), size=2)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t(x)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+    assert pool.acquire().execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    broken = pool.acquire()
+    broken.close()
+    pool.release(broken)
+    assert pool.stats()["open"] == 1
+
+def test_delete_shift_cascades(fresh_app, fresh_admin, make_user, make_shift):
+    sid = make_shift(signups=[make_user()])
+    fresh_admin.post(f"/admin/shifts/{sid}/delete")
+    with fresh_app.app_context():
+        assert appmod.get_db().execute("SELECT COUNT(*) FROM signup").fetchone()[0] == 0
+    assert fresh_admin.get("/admin/stats.json").get_json()["db_pool"]["checkouts"] > 0
@@ -0,0 +1,61 @@
+import pytest
+import app as appmod
+
+@pytest.fixture
+def setup(make_shift, make_user):
+    """setup(capacity, booked, waiting) -> (shift id, booked user ids, waiting user ids)."""
+    def setup(capacity, booked, waiting):
+        uids = [make_user(f"p{i}@test") for i in range(booked + waiting)]
+        sid = make_shift("P", capacity=capacity, signups=uids[:booked], waitlist=uids[booked:])
+        return sid, uids[:booked], uids[booked:]
+    return setup
+
+def _state(app, sid):
+    with app.app_context():
+        db = appmod.get_db()
+        shift = db.execute("SELECT taken, wait_ct FROM shift WHERE id=?", (sid,)).fetchone()
+        signed = {r[0] for r in db.execute("SELECT user_id FROM signup WHERE shift_id=?", (sid,))}
+        return shift["taken"], shift["wait_ct"], signed
+
+def test_capacity_increase_promotes_in_order_and_signals(fresh_app, fresh_admin, setup):
+    sid, booked, waiting = setup(capacity=2, booked=2, waiting=4)
+    batches = []
+
+    def receiver(sender, db, promotions):
+        batches.append(promotions)
+
+    appmod.waitlist_promoted.connect(receiver)
+    try:
+        r = fresh_admin.post(f"/admin/shifts/{sid}/update", data={
+            "title": "P", "location": "Hall", "starts_at": "2031-07-01T09:00",
+            "ends_at": "2031-07-01T12:00", "capacity": "5"}, follow_redirects=True)
+    finally:
+        appmod.waitlist_promoted.disconnect(receiver)
+    assert b"3 promoted from the waitlist" in r.data
+    taken, wait_ct, signed = _state(fresh_app, sid)
+    assert (taken, wait_ct) == (5, 1) and signed == set(booked + waiting[:3])
+    assert len(batches) == 1 and [p.user_id for p in batches[0]] == waiting[:3]
+
+def test_sweep_fills_seats_freed_outside_cancel(fresh_app, setup):
+    sid, booked, waiting = setup(capacity=3, booked=3, waiting=3)
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("DELETE FROM signup WHERE shift_id=? AND user_id IN (?,?)", (sid, booked[0], booked[1]))
+        db.commit()
+    result = fresh_app.test_cli_runner().invoke(args=["promote-waitlists"])
+    assert "2 volunteer(s) promoted" in result.output
+    taken, wait_ct, signed = _state(fresh_app, sid)
+    assert (taken, wait_ct) == (3, 1) and signed == {booked[2], *waiting[:2]}
+
+def test_overlapping_waiter_is_skipped(fresh_app, make_shift, setup):
+    sid, booked, waiting = setup(capacity=1, booked=1, waiting=2)
+    make_shift("O", starts_at="2031-07-01T10:00:00", ends_at="2031-07-01T11:00:00", signups=[waiting[0]])
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("DELETE FROM signup WHERE shift_id=?", (sid,))
+        db.commit()
+        with appmod.write_transaction(db):
+            promoted = appmod.promote_waitlist(db, sid)
+    assert [p.user_id for p in promoted] == [waiting[1]]
+    _, wait_ct, _ = _state(fresh_app, sid)
+    assert wait_ct == 1  # the skipped waiter keeps their place
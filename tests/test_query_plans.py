@@ -0,0 +1,69 @@
+import re, sqlite3
+import pytest
+import app as appmod
+from datetime import datetime, timedelta, timezone
+
+pytestmark = pytest.mark.sqlite_only  # EXPLAIN QUERY PLAN
+
+# A plan step that reads a whole table without any index
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+@pytest.fixture
+def traced(fresh_app, monkeypatch):
+    """Record every statement the app runs, with parameters expanded."""
+    seen = []
+    real_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(seen.append)
+        return conn
+
+    monkeypatch.setattr(appmod.sqlite3, "connect", connect)
+    appmod.close_pools()  # pooled connections opened before the patch aren't traced
+    return seen
+
+def _seed(make_user, make_shift, n=50):
+    start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=n // 2)
+    uid, other = make_user("p@test"), make_user("q@test")
+    for i in range(n):
+        s = start + timedelta(days=i)
+        last = i == n - 1
+        make_shift(f"Shift {i}", starts_at=appmod.iso_no_seconds(s), ends_at=appmod.iso_no_seconds(s + timedelta(hours=2)),
+                   signups=[uid] if last else (), waitlist=[other] if last else ())
+    db = appmod.get_db()
+    db.execute("ANALYZE")
+    db.commit()
+    return uid
+
+def _plan(sql):
+    db = appmod.get_db()
+    return [r["detail"] for r in db.execute("EXPLAIN QUERY PLAN " + sql)]
+
+def _hot_selects(seen, *tables):
+    return [
+        sql for sql in seen
+        if sql.lstrip().upper().startswith("SELECT")
+        and any(re.search(rf"\b(FROM|JOIN)\s+{t}\b", sql) for t in tables)
+    ]
+
+def test_hot_queries_use_indexes(fresh_app, traced, login, make_user, make_shift):
+    with fresh_app.app_context():
+        uid = _seed(make_user, make_shift)
+
+    client = login(uid)
+    traced.clear()
+    assert client.get("/").status_code == 200
+    assert client.get("/my").status_code == 200
+    with fresh_app.app_context():
+        signup_id = appmod.get_db().execute("SELECT id FROM signup WHERE user_id=?", (uid,)).fetchone()[0]
+    client.post(f"/signups/{signup_id}/cancel")
+
+    queries = _hot_selects(traced, "shift", "signup", "waitlist")
+    assert any("ends_at >" in q for q in queries)
+    assert any("FROM waitlist" in q for q in queries)
+    assert any("su.user_id" in q for q in queries)
+    with fresh_app.app_context():
+        for sql in queries:
+            plan = _plan(sql)
+            assert not [d for d in plan if FULL_SCAN.match(d)], (sql, plan)
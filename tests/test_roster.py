@@ -0,0 +1,78 @@
+import pytest
+import roster
+import app as appmod
+from roster import Shift, Window
+
+def test_load_is_levelled_before_anyone_doubles_up():
+    shifts = [Shift(1, 0, 60, 1), Shift(2, 60, 120, 1), Shift(3, 120, 180, 1)]
+    # greedy in order would hand "a" the first two shifts and leave 3 empty
+    availability = {"a": [Window(0, 180, 0)], "b": [Window(0, 120, 0)], "c": [Window(0, 60, 0)]}
+    got = dict(roster.plan(shifts, availability))
+    assert sorted(got.values()) == [1, 2, 3] and got == {"a": 3, "b": 2, "c": 1}
+
+def test_augmenting_path_maximises_coverage():
+    shifts = [Shift(1, 0, 60, 1), Shift(2, 100, 160, 1)]
+    # "a" prefers shift 1, but only "b" can do it; the matching moves "a" over
+    availability = {"a": [Window(0, 60, 1), Window(100, 160, 0)], "b": [Window(0, 60, 0)]}
+    assert sorted(roster.plan(shifts, availability)) == [("a", 2), ("b", 1)]
+
+def test_respects_hours_overlaps_and_existing_bookings():
+    shifts = [Shift(1, 0, 120, 3), Shift(2, 60, 180, 3), Shift(3, 200, 320, 3), Shift(4, 400, 520, 3)]
+    availability = {"a": [Window(0, 600, 0)]}
+    got = roster.plan(shifts, availability, booked={"a": [(330, 390)]}, max_time=300)
+    assert sorted(sid for _, sid in got) in ([1, 3], [2, 3], [1, 4], [2, 4], [3, 4])
+    assert len(got) == 2  # 60 booked + 2 x 120 rostered hits the 300 limit
+
+@pytest.fixture
+def seeded(fresh_app, make_user, make_shift):
+    """(shift ids, user ids): three two-seat shifts, three volunteers free for all of them, the first waiting on one."""
+    uids = [make_user() for _ in range(3)]
+    sids = [make_shift(f"R{i}", starts_at=f"2031-06-0{i + 1}T09:00:00", ends_at=f"2031-06-0{i + 1}T13:00:00",
+                       capacity=2, waitlist=[uids[0]] if i == 0 else ()) for i in range(3)]
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.executemany(
+            "INSERT INTO availability(user_id,starts_at,ends_at) VALUES (?,?,?)",
+            [(u, "2031-06-01T00:00:00", "2031-06-04T00:00:00") for u in uids],
+        )
+        db.commit()
+    return sids, uids
+
+def _signups(app):
+    with app.app_context():
+        return appmod.get_db().execute("SELECT COUNT(*) FROM signup").fetchone()[0]
+
+def test_admin_preview_then_apply(fresh_app, fresh_admin, seeded):
+    form = {"from": "2031-06-01T00:00", "to": "2031-06-05T00:00", "max_hours": "8"}
+    r = fresh_admin.get("/admin/roster", query_string=form)
+    assert b"6 of 6 open seat(s) would be filled" in r.data
+    assert _signups(fresh_app) == 0
+
+    r = fresh_admin.post("/admin/roster", data=form, follow_redirects=True)
+    assert b"6 signup(s) added" in r.data
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        per_user = [r[0] for r in db.execute("SELECT COUNT(*) FROM signup GROUP BY user_id")]
+        assert per_user == [2, 2, 2]
+        assert db.execute("SELECT COUNT(*) FROM waitlist").fetchone()[0] == 0
+
+def test_seat_taken_after_preview_keeps_waitlist_place(fresh_app, seeded):
+    sids, uids = seeded
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        db.execute("DELETE FROM availability WHERE user_id != ?", (uids[0],))
+        db.commit()
+        plan = appmod.build_roster(db, "2031-06-01T00:00", "2031-06-02T00:00", 8)
+        assert plan.assignments == [(uids[0], sids[0])]
+        # the seats go to others between the preview and the apply
+        db.executemany("INSERT INTO signup(shift_id,user_id) VALUES (?,?)", [(sids[0], uids[1]), (sids[0], uids[2])])
+        db.commit()
+        assert appmod.apply_roster(db, plan.assignments) == 0
+        assert db.execute("SELECT COUNT(*) FROM waitlist WHERE user_id=? AND shift_id=?",
+                          (uids[0], sids[0])).fetchone()[0] == 1
+
+def test_cli_dry_run_writes_nothing(fresh_app, seeded):
+    result = fresh_app.test_cli_runner().invoke(args=["roster", "--from", "2031-06-01", "--max-hours", "4"])
+    assert result.exit_code == 0, result.output
+    assert "3 of 6 open seat(s) filled from 3 volunteer(s)" in result.output
+    assert "dry run" in result.output and _signups(fresh_app) == 0
@@ -0,0 +1,55 @@
+import pytest
+import app as appmod
+
+def _day(n, hour=9):
+    return f"2031-07-{n:02d}T{hour:02d}:00:00"
+
+def _clear(app):
+    with app.app_context():
+        db = appmod.get_db()
+        db.execute("DELETE FROM shift")
+        db.commit()
+
+def _search(client, q):
+    return [s["title"] for s in client.get("/shifts.json", query_string={"q": q}).get_json()["shifts"]]
+
+@pytest.fixture(params=[True, False], ids=["fts5", "like"])
+def search_app(request, fresh_app, monkeypatch, make_shift):
+    if request.param and not appmod._fts5_available():
+        pytest.skip("SQLite built without FTS5")
+    monkeypatch.setitem(fresh_app.config, "SEARCH_FTS", request.param)
+    _clear(fresh_app)
+    make_shift("Park Cleanup", "Riverside Park", _day(1), _day(1, 11))
+    make_shift("Food Bank Sorting", "Warehouse", _day(2), _day(2, 11))
+    make_shift("Food Drive", "Community Food Center", _day(3), _day(3, 11))
+    return fresh_app
+
+def test_prefix_search_both_paths(search_app):
+    client = search_app.test_client()
+    assert sorted(_search(client, "foo")) == ["Food Bank Sorting", "Food Drive"]
+    assert _search(client, "riverside") == ["Park Cleanup"]
+    assert _search(client, "nothing here") == []
+
+def test_fts_ranks_and_tracks_admin_edits(fresh_app, fresh_admin, make_shift):
+    if not fresh_app.config["SEARCH_FTS"]:
+        pytest.skip("SQLite built without FTS5")
+    _clear(fresh_app)
+    make_shift("Sorting", "Food Bank", _day(1), _day(1, 11))
+    make_shift("Food Bank Food Sorting", "Food Hall", _day(2), _day(2, 11))
+    client = fresh_app.test_client()
+    # the shift mentioning "food" most often ranks first despite starting later
+    assert _search(client, "food") == ["Food Bank Food Sorting", "Sorting"]
+
+    admin = fresh_admin
+    s, e = _day(5)[:16], _day(5, 11)[:16]
+    admin.post("/admin/shifts", data={"title": "Garden Day", "location": "Allotments",
+                                      "starts_at": s, "ends_at": e, "capacity": 2})
+    assert _search(client, "gard") == ["Garden Day"]
+    with fresh_app.app_context():
+        sid = appmod.get_db().execute("SELECT id FROM shift WHERE title='Garden Day'").fetchone()[0]
+    admin.post(f"/admin/shifts/{sid}/update", data={"title": "Orchard Day", "location": "Allotments",
+                                                    "starts_at": s, "ends_at": e, "capacity": 2})
+    assert _search(client, "gard") == []
+    assert _search(client, "orch") == ["Orchard Day"]
+    admin.post(f"/admin/shifts/{sid}/delete")
+    assert _search(client, "orch") == []
@@ -0,0 +1,76 @@
+import json, os, signal, subprocess, sys, time, urllib.request
+from contextlib import contextmanager
+import pytest
+import app as appmod
+
+pytest.importorskip("gunicorn")
+pytestmark = [pytest.mark.sqlite_only,
+              pytest.mark.skipif(not os.path.exists("/proc/self/task"), reason="needs fork and /proc")]
+
+@contextmanager
+def serve(tmp_path, workers, threads):
+    """`flask serve` in a subprocess on a free port; yields (process, base url)."""
+    env = dict(os.environ, DB_PATH=str(tmp_path / "serve.db"), OUTBOX_FILE=str(tmp_path / "outbox.log"),
+               PASSWORD_HASH_WORKERS="0", SERVER_GRACEFUL_TIMEOUT="5")
+    env.pop("DATABASE_URL", None)
+    proc = subprocess.Popen([sys.executable, "-m", "flask", "--app", "app", "serve", "--port", "0",
+                             "--workers", str(workers), "--threads", str(threads)],
+                            cwd=os.path.dirname(appmod.__file__), env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True)
+    try:
+        line = proc.stdout.readline()
+        assert line.startswith("serving on http://127.0.0.1:"), line
+        yield proc, line.split()[2]
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+def next_seats(stream):
+    """The data of the next event on a /shifts/live stream, or None once it closes."""
+    for line in stream:
+        if line.startswith(b"data:"):
+            return json.loads(line[5:])
+    return None
+
+def test_serve_restarts_workers_and_shuts_down(tmp_path):
+    with serve(tmp_path, workers=2, threads=2) as (proc, url):
+        assert urllib.request.urlopen(url + "/", timeout=5).status == 200
+
+        def workers():
+            with open(f"/proc/{proc.pid}/task/{proc.pid}/children") as f:
+                return set(f.read().split())
+        def wait_for(done):
+            deadline = time.monotonic() + 10
+            while not done() and time.monotonic() < deadline:
+                time.sleep(0.1)
+        wait_for(lambda: len(workers()) == 2)  # gunicorn reports ready before it forks
+        before = workers()
+        assert len(before) == 2
+        os.kill(int(min(before)), signal.SIGKILL)
+        wait_for(lambda: len(workers()) == 2 and workers() != before)
+        assert len(workers()) == 2 and workers() != before
+        assert urllib.request.urlopen(url + "/shifts.json", timeout=5).status == 200
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(15) == 0
+
+def test_live_streams_hold_no_thread_and_hear_every_worker(tmp_path):
+    with serve(tmp_path, workers=2, threads=1) as (proc, url):
+        # more streams than the two workers have threads between them
+        streams = [urllib.request.urlopen(url + "/shifts/live?ids=1", timeout=10) for _ in range(4)]
+        assert [next_seats(s)["1"]["taken"] for s in streams] == [0, 0, 0, 0]
+
+        def call(path, body, token=None):
+            req = urllib.request.Request(url + path, json.dumps(body).encode(), method="POST",
+                                         headers={"Content-Type": "application/json",
+                                                  **({"Authorization": "Bearer " + token} if token else {})})
+            return json.load(urllib.request.urlopen(req, timeout=5))
+        token = call("/api/v1/tokens", {"email": "admin@example.com", "password": "admin123"})["token"]
+        assert call("/api/v1/signups", {"shift_ids": [1]}, token)["results"][0]["status"] == "signed_up"
+        # whichever worker took the signup, every stream hears it
+        assert [next_seats(s)["1"]["taken"] for s in streams] == [1, 1, 1, 1]
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(15) == 0
+        assert [next_seats(s) for s in streams] == [None] * 4
@@ -0,0 +1,65 @@
+import json
+import pytest
+import app as appmod
+
+def test_backend_sql_helpers(fresh_app):
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        b = appmod.get_backend()
+        rows = db.execute(f"SELECT t.id FROM {b.id_table('id')} t ORDER BY t.id", (json.dumps([3, 1, 2]),)).fetchall()
+        assert [r["id"] for r in rows] == [1, 2, 3]
+        row = db.execute(f"SELECT p.a, p.b FROM {b.id_table('a', 'b')} p", (json.dumps([[7, 8]]),)).fetchone()
+        assert (row["a"], row[1]) == (7, 8)
+
+        now, later = db.execute(f"SELECT {b.now()}, {b.now(offset=True)}", ("+60 seconds",)).fetchone()
+        assert len(now) == 23 and now[10] == "T" and later > now
+
+        db.executemany(
+            "INSERT INTO shift(title,location,starts_at,ends_at,capacity) VALUES (?,?,?,?,1)",
+            [("Garden weeding", "Park", "2031-01-01T09:00:00", "2031-01-01T10:00:00"),
+             ("Kitchen", "Garden Hall", "2031-01-01T09:00:00", "2031-01-01T10:00:00")],
+        )
+        db.commit()
+        sql, params = b.search("gard")
+        found = db.execute(sql + " ORDER BY f.rank, s.id", params).fetchall()
+        # title matches rank ahead of location matches
+        assert [r["title"] for r in found] == ["Garden weeding", "Kitchen"]
+        assert b.search("  ?! ") is None
+
+def test_stream_batches_and_unique_violation(fresh_app):
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        b = appmod.get_backend()
+        batches = list(b.stream(db, "SELECT id FROM app_user UNION ALL SELECT id FROM app_user", (), 1))
+        assert [len(x) for x in batches] == [1, 1]
+        with pytest.raises(b.IntegrityError):
+            with appmod.write_transaction(db):
+                db.execute("INSERT INTO app_user(email,password_hash,role) VALUES ('admin@example.com','x','ADMIN')")
+        assert not db.in_transaction
+
+def test_literals_keep_question_marks_and_percents(fresh_app):
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        # a ? or % inside quotes is text, with or without parameters
+        assert tuple(db.execute("SELECT 'what?', '100%' -- why?").fetchone()) == ("what?", "100%")
+        assert tuple(db.execute("SELECT 'what?', '100%', ? -- why?", (5,)).fetchone()) == ("what?", "100%", 5)
+        assert db.execute("SELECT COUNT(*) FROM app_user WHERE email LIKE '%?%'").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM app_user WHERE email LIKE '%@%' AND id > ?", (0,)).fetchone()[0] == 1
+
+def test_repository_books_promotes_and_queues(fresh_app, make_user, make_shift):
+    first, second, third = make_user(), make_user(), make_user()
+    sid = make_shift(capacity=1, waitlist=[second, third])
+    with fresh_app.app_context():
+        db = appmod.get_db()
+        repo = appmod.get_repo(db)
+        signup_id = repo.book(first, sid)
+        assert signup_id and repo.book(third, sid) is None  # full
+        assert repo.signup(signup_id, user_id=second) is None
+        repo.delete_signup(signup_id)
+        waiters = repo.waiters(sid)
+        assert [w["user_id"] for w in waiters] == [second, third]
+        repo.promote(sid, waiters[:repo.free_seats(sid)])
+        repo.queue_for_shift("test", sid, "hi", "body")
+        db.commit()
+        assert repo.signed_up_ids(second, [sid]) == {sid} and repo.waiting_ids(third, [sid]) == {sid}
+        assert repo.outbox_depth()[0] == 2  # the one signed up and the one still waiting
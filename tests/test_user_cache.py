@@ -0,0 +1,48 @@
+import re, sqlite3
+import pytest
+from flask import session
+import app as appmod
+
+pytestmark = pytest.mark.sqlite_only  # counts statements with sqlite3 trace callbacks
+
+USER_LOOKUP = re.compile(r"FROM app_user WHERE id=")
+
+@pytest.fixture
+def user_lookups(fresh_app, monkeypatch):
+    seen = []
+    real_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(lambda sql: USER_LOOKUP.search(sql) and seen.append(sql))
+        return conn
+
+    monkeypatch.setattr(appmod.sqlite3, "connect", connect)
+    appmod.close_pools()
+    appmod.user_cache.clear()
+    yield seen
+    appmod.user_cache.clear()
+
+@pytest.mark.parametrize("path", ["/", "/my", "/my.ics"])
+def test_one_user_lookup_per_request(user_lookups, login, make_user, path):
+    client = login(make_user())
+    user_lookups.clear()
+    assert client.get(path).status_code == 200
+    assert len(user_lookups) == 1
+
+def test_process_cache_and_invalidation(fresh_app, user_lookups, monkeypatch, login, make_user):
+    monkeypatch.setitem(fresh_app.config, "USER_CACHE_TTL", 30)
+    uid = make_user("c@test")
+    client = login(uid)
+    user_lookups.clear()
+    for _ in range(3):
+        client.get("/my")
+    assert len(user_lookups) == 1
+
+    result = fresh_app.test_cli_runner().invoke(args=["set-role", "c@test", "ADMIN"])
+    assert result.exit_code == 0, result.output
+    client.get("/my")
+    assert len(user_lookups) == 2
+    with fresh_app.test_request_context():
+        session["uid"] = uid
+        assert appmod.current_user()["role"] == "ADMIN"